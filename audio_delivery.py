@@ -0,0 +1,165 @@
+"""Delivering synthesized speech to the browser by URL.
+
+Audio used to be base64-inlined into the page as a data URI, which inflates
+every MP3 by a third, ships it inside the websocket delta and keeps raw and
+encoded copies in memory. Two URL-based paths replace it:
+
+- ``media`` (default): ``st.audio`` hands the bytes to Streamlit's media file
+  manager, which serves them from ``/media/...`` with HTTP range support.
+- ``sidecar``: a small process-wide HTTP server publishes a SpeechPipeline
+  under a one-off URL and streams its segments as they are synthesized, so
+  playback starts on segment one while later sentences are still rendering.
+  Finished clips are served with range support.
+"""
+import re
+import secrets
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import AUDIO_DELIVERY_CONFIG
+
+RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class _Clip:
+    def __init__(self, speech):
+        self.speech = speech
+        self.data = None  # set once every segment has been served
+        self._lock = threading.Lock()
+
+    def segments(self):
+        with self._lock:
+            data, speech = self.data, self.speech
+        if data is not None:
+            yield data
+            return
+        parts = []
+        for segment in speech.iter_segments():
+            parts.append(segment)
+            yield segment
+        with self._lock:
+            self.data = b"".join(parts)
+            self.speech = None
+
+
+class AudioServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, public_url, max_clips):
+        super().__init__(address, _AudioHandler)
+        self.public_url = public_url.rstrip("/")
+        self.max_clips = max_clips
+        self.clips = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, speech):
+        """Register a SpeechPipeline (open or closed); returns its URL."""
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self.clips[token] = _Clip(speech)
+            while len(self.clips) > self.max_clips:
+                self.clips.popitem(last=False)
+        return f"{self.public_url}/audio/{token}.mp3"
+
+    def get(self, token):
+        with self._lock:
+            return self.clips.get(token)
+
+
+class _AudioHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        match = re.fullmatch(r"/audio/([\w-]+)\.mp3", self.path)
+        clip = self.server.get(match.group(1)) if match else None
+        if clip is None:
+            self.send_error(404)
+            return
+
+        if clip.data is not None:
+            self._send_complete(clip.data)
+            return
+
+        # Still synthesizing: stream segments as they become ready
+        self.send_response(200)
+        self.send_header("content-type", "audio/mpeg")
+        self.send_header("transfer-encoding", "chunked")
+        self.send_header("cache-control", "no-store")
+        self.end_headers()
+        for segment in clip.segments():
+            self.wfile.write(f"{len(segment):x}\r\n".encode() + segment + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_complete(self, data):
+        start, end = 0, len(data) - 1
+        match = RANGE.fullmatch(self.headers.get("range", ""))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                if match.group(2):
+                    end = min(int(match.group(2)), end)
+            else:
+                start = max(0, len(data) - int(match.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header("content-range", f"bytes */{len(data)}")
+                self.send_header("content-length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("content-range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("content-type", "audio/mpeg")
+        self.send_header("accept-ranges", "bytes")
+        self.send_header("content-length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(data[start:end + 1])
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_audio_server():
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = AudioServer(
+                (AUDIO_DELIVERY_CONFIG["host"], AUDIO_DELIVERY_CONFIG["port"]),
+                AUDIO_DELIVERY_CONFIG["public_url"],
+                AUDIO_DELIVERY_CONFIG["max_clips"]
+            )
+            threading.Thread(target=_server.serve_forever, name="audio-sidecar", daemon=True).start()
+        return _server
+
+
+def deliver(speech):
+    """Prepare a turn's audio for playback.
+
+    Returns a URL (sidecar; does not wait for synthesis to finish) or the MP3
+    bytes for ``st.audio`` (media file manager).
+    """
+    if AUDIO_DELIVERY_CONFIG["backend"] == "sidecar":
+        speech.close()
+        return get_audio_server().publish(speech)
+    return speech.audio()
+
+
+def render_player(audio):
+    """Autoplaying player for whatever ``deliver`` returned."""
+    import streamlit as st
+
+    if isinstance(audio, str):
+        st.markdown(
+            f'<audio src="{audio}" autoplay controls preload="auto" '
+            f'style="width: 100%; margin-top: 10px;"></audio>',
+            unsafe_allow_html=True
+        )
+    else:
+        st.audio(audio, format="audio/mpeg", autoplay=True)
@@ -0,0 +1,139 @@
+"""Sentence-pipelined text-to-speech.
+
+Text is fed in as it streams from the LLM, cut at sentence boundaries and
+synthesized on a shared worker pool, so TTS for the first sentence runs while
+the rest of the reply is still being generated. Segments come back as an
+ordered playlist of MP3 chunks; MP3 frames concatenate cleanly, so the joined
+playlist is itself a playable file.
+"""
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from config import TTS_CONFIG
+from tracing import NULL_TRACE
+from tts_cache import cache_key, get_tts_cache
+
+# Sentence end: terminal punctuation (optionally closed by a quote/bracket)
+# followed by whitespace.
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=TTS_CONFIG["workers"],
+            thread_name_prefix="tts"
+        )
+    return _executor
+
+
+def render_speech(text, lang, tld):
+    """Render one chunk of text to MP3 bytes with gTTS."""
+    from gtts import gTTS
+
+    audio_buffer = BytesIO()
+    gTTS(text=text, lang=lang, tld=tld).write_to_fp(audio_buffer)
+    return audio_buffer.getvalue()
+
+
+def synthesize(text, lang=None, tld=None):
+    """Cached TTS: repeated openers and re-shown feedback skip gTTS."""
+    lang = lang or TTS_CONFIG["lang"]
+    tld = tld or TTS_CONFIG["tld"]
+    return get_tts_cache().fetch(cache_key(text, lang, tld), lambda: render_speech(text, lang, tld))
+
+
+def split_sentences(text, min_chars=0):
+    """Split off complete sentences; returns (chunks, unfinished remainder).
+
+    Consecutive sentences are merged until a chunk reaches ``min_chars`` so
+    we don't pay a TTS round trip for every "Great." or "Okay.".
+    """
+    chunks = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        end = match.end()
+        if end - start >= min_chars:
+            chunks.append(text[start:end].strip())
+            start = end
+    # Sentences shorter than min_chars stay in the remainder for next time
+    return chunks, text[start:]
+
+
+class SpeechPipeline:
+    """Feed streamed text in, get an ordered playlist of audio segments out."""
+
+    def __init__(self, lang=None, tld=None, synthesize_fn=None, executor=None):
+        self.lang = lang or TTS_CONFIG["lang"]
+        self.tld = tld or TTS_CONFIG["tld"]
+        self.synthesize_fn = synthesize_fn or synthesize
+        self.executor = executor or get_executor()
+        self.min_chars = TTS_CONFIG["min_chunk_chars"]
+        self.buffer = ""
+        self.chunks = []
+        self.playlist = []  # futures, in playback order
+        self.closed = False
+        self.trace = NULL_TRACE  # set by the orchestrator for a traced turn
+        self._changed = threading.Condition()
+
+    def _synthesize(self, chunk):
+        with self.trace.span("tts", chars=len(chunk)):
+            return self.synthesize_fn(chunk, self.lang, self.tld)
+
+    def _submit(self, chunk):
+        future = self.executor.submit(self._synthesize, chunk)
+        with self._changed:
+            self.chunks.append(chunk)
+            self.playlist.append(future)
+            self._changed.notify_all()
+
+    def feed(self, text):
+        if self.closed:
+            raise RuntimeError("SpeechPipeline is closed")
+        self.buffer += text
+        chunks, self.buffer = split_sentences(self.buffer, self.min_chars)
+        for chunk in chunks:
+            self._submit(chunk)
+
+    def flush(self):
+        """Cut a segment boundary here, even mid-sentence."""
+        tail = self.buffer.strip()
+        self.buffer = ""
+        if tail:
+            self._submit(tail)
+
+    def close(self):
+        """Flush the trailing partial sentence; no more text will be fed."""
+        if self.closed:
+            return
+        self.flush()
+        with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+    def iter_segments(self):
+        """Yield MP3 segments in order, each as soon as it is ready.
+
+        Safe to consume from another thread while text is still being fed;
+        the iterator ends once the pipeline is closed and drained.
+        """
+        index = 0
+        while True:
+            with self._changed:
+                while index >= len(self.playlist) and not self.closed:
+                    self._changed.wait()
+                if index >= len(self.playlist):
+                    return
+                future = self.playlist[index]
+            index += 1
+            yield future.result()
+
+    def audio(self):
+        """Block until every segment is ready and return them joined."""
+        self.close()
+        return b"".join(self.iter_segments())
@@ -0,0 +1,260 @@
+"""Trim and shrink recorded answers before they are uploaded to Whisper.
+
+The recorder hands us a WAV with dead air at both ends, often at 44.1/48 kHz.
+Upload size and transcription time grow with all of it. Before upload each
+clip is:
+
+- downmixed to mono and resampled to 16 kHz, which is what Whisper uses;
+- cut down to the frames a local voice-activity detector marks as speech,
+  plus a little padding (long pauses inside the answer shrink too);
+- optionally encoded as FLAC (needs ``soundfile``; otherwise 16-bit WAV).
+
+A clip with almost no speech is rejected without calling the API. Bytes and
+estimated transcription time saved are counted per utterance and overall.
+"""
+import threading
+import time
+import wave
+from io import BytesIO
+
+from config import AUDIO_PREPROCESS_CONFIG
+
+
+class NoSpeechError(ValueError):
+    """The recording contains (almost) no speech; nothing was uploaded."""
+
+
+class PreparedAudio:
+    def __init__(self, data, filename, original_bytes, original_seconds, seconds,
+                 speech_seconds, prepare_seconds, processed=True):
+        self.data = data
+        self.filename = filename
+        self.original_bytes = original_bytes
+        self.original_seconds = original_seconds
+        self.seconds = seconds
+        self.speech_seconds = speech_seconds
+        self.prepare_seconds = prepare_seconds
+        self.processed = processed  # False: passed through untouched
+        self.transcribe_seconds = None
+        self.samples = None  # trimmed mono float32 at the target rate, when processed
+
+    @property
+    def silent(self):
+        return bool(self.processed and self.speech_seconds < AUDIO_PREPROCESS_CONFIG["min_speech_ms"] / 1000)
+
+    @property
+    def bytes_saved(self):
+        return self.original_bytes - (0 if self.silent else len(self.data))
+
+    def report(self):
+        return {
+            "bytes_in": self.original_bytes,
+            "bytes_out": 0 if self.silent else len(self.data),
+            "bytes_saved": self.bytes_saved,
+            "seconds_in": self.original_seconds,
+            "seconds_out": 0.0 if self.silent else self.seconds,
+            "rejected": self.silent,
+            "prepare_seconds": self.prepare_seconds,
+            "transcribe_seconds": self.transcribe_seconds,
+            "latency_saved_seconds": audio_stats.latency_saved(self),
+        }
+
+
+def decode_wav(data):
+    """(samples as float32 in [-1, 1], channels, rate)."""
+    import numpy as np
+
+    with wave.open(BytesIO(data)) as reader:
+        channels = reader.getnchannels()
+        width = reader.getsampwidth()
+        rate = reader.getframerate()
+        frames = reader.readframes(reader.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"unsupported sample width: {width}")
+    return samples, channels, rate
+
+
+def to_mono(samples, channels):
+    if channels == 1:
+        return samples
+    return samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+
+
+def resample(samples, rate, target):
+    """Windowed-sinc low-pass, then linear interpolation onto the new grid."""
+    import numpy as np
+
+    if rate == target or not len(samples):
+        return samples
+    if target < rate:
+        cutoff = 0.5 * target / rate
+        taps = np.arange(-32, 33)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        samples = np.convolve(samples, kernel / kernel.sum(), mode="same")
+    positions = np.arange(0, len(samples), rate / target)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def speech_mask(samples, rate):
+    """Per-frame speech flags from frame energy against the noise floor."""
+    import numpy as np
+
+    frame = max(1, int(rate * AUDIO_PREPROCESS_CONFIG["frame_ms"] / 1000))
+    count = len(samples) // frame
+    if not count:
+        return np.zeros(0, dtype=bool), frame
+    frames = samples[:count * frame].reshape(count, frame)
+    db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+    # Above the noise floor, or close enough to the loudest frame that a
+    # clip with no pauses at all isn't cut up; never below the silence level
+    threshold = min(
+        np.percentile(db, 10) + AUDIO_PREPROCESS_CONFIG["noise_margin_db"],
+        db.max() - AUDIO_PREPROCESS_CONFIG["speech_range_db"]
+    )
+    return db > max(threshold, AUDIO_PREPROCESS_CONFIG["silence_db"]), frame
+
+
+def keep_mask(voiced, frame, rate):
+    """Speech frames widened by the padding on both sides."""
+    import numpy as np
+
+    pad = int(AUDIO_PREPROCESS_CONFIG["padding_ms"] / 1000 * rate / frame)
+    if not pad or not voiced.any():
+        return voiced
+    return np.convolve(voiced.astype(np.int32), np.ones(2 * pad + 1, dtype=np.int32), mode="same") > 0
+
+
+def encode(samples, rate):
+    """(bytes, filename) in the configured codec."""
+    import numpy as np
+
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    if AUDIO_PREPROCESS_CONFIG["codec"] == "flac":
+        try:
+            import soundfile
+        except ImportError:
+            pass  # fall back to WAV
+        else:
+            out = BytesIO()
+            soundfile.write(out, pcm, rate, format="FLAC", subtype="PCM_16")
+            return out.getvalue(), "answer.flac"
+    out = BytesIO()
+    with wave.open(out, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(pcm.tobytes())
+    return out.getvalue(), "answer.wav"
+
+
+def prepare_audio(audio_bytes):
+    """Trim, downsample and encode one recorded answer.
+
+    Clips that aren't a readable WAV (or with preprocessing switched off) are
+    passed through unchanged.
+    """
+    start = time.perf_counter()
+    if not AUDIO_PREPROCESS_CONFIG["enabled"]:
+        return PreparedAudio(audio_bytes, "answer.wav", len(audio_bytes), None, None, None, 0.0, processed=False)
+    try:
+        samples, channels, rate = decode_wav(audio_bytes)
+    except (wave.Error, EOFError, ValueError):
+        return PreparedAudio(
+            audio_bytes, "answer.wav", len(audio_bytes), None, None, None,
+            time.perf_counter() - start, processed=False
+        )
+    samples = to_mono(samples, channels)
+    original_seconds = len(samples) / rate if rate else 0.0
+    target = AUDIO_PREPROCESS_CONFIG["target_rate"]
+    samples = resample(samples, rate, target)
+
+    voiced, frame = speech_mask(samples, target)
+    keep = keep_mask(voiced, frame, target)
+    speech = samples[:len(keep) * frame].reshape(-1, frame)[keep].reshape(-1) if len(keep) else samples[:0]
+    data, filename = encode(speech, target)
+    prepared = PreparedAudio(
+        data, filename, len(audio_bytes), original_seconds, len(speech) / target,
+        float(voiced.sum()) * frame / target, time.perf_counter() - start
+    )
+    prepared.samples = speech
+    audio_stats.record(prepared)
+    return prepared
+
+
+class AudioStats:
+    """Process-wide upload savings; the transcription rate comes from real calls."""
+
+    def __init__(self):
+        self.utterances = 0
+        self.rejected = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds_in = 0.0
+        self.seconds_out = 0.0
+        self.transcriptions = 0
+        self.transcribe_seconds = 0.0
+        self.transcribed_audio_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, prepared):
+        with self._lock:
+            self.utterances += 1
+            self.bytes_in += prepared.original_bytes
+            if prepared.silent:
+                self.rejected += 1
+                return
+            self.bytes_out += len(prepared.data)
+            self.seconds_in += prepared.original_seconds
+            self.seconds_out += prepared.seconds
+
+    def record_transcription(self, prepared, elapsed):
+        prepared.transcribe_seconds = elapsed
+        with self._lock:
+            self.transcriptions += 1
+            self.transcribe_seconds += elapsed
+            self.transcribed_audio_seconds += prepared.seconds or 0.0
+
+    def latency_saved(self, prepared):
+        """Estimated transcription time saved for one utterance."""
+        with self._lock:
+            if not self.transcriptions:
+                return None
+            per_call = self.transcribe_seconds / self.transcriptions
+            per_audio_second = (
+                self.transcribe_seconds / self.transcribed_audio_seconds
+                if self.transcribed_audio_seconds else 0.0
+            )
+        if not prepared.processed:
+            return 0.0
+        if prepared.silent:
+            return per_call - prepared.prepare_seconds
+        trimmed = prepared.original_seconds - prepared.seconds
+        return trimmed * per_audio_second - prepared.prepare_seconds
+
+    def snapshot(self):
+        with self._lock:
+            per_audio_second = (
+                self.transcribe_seconds / self.transcribed_audio_seconds
+                if self.transcribed_audio_seconds else 0.0
+            )
+            per_call = self.transcribe_seconds / self.transcriptions if self.transcriptions else 0.0
+            return {
+                "utterances": self.utterances,
+                "rejected": self.rejected,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "seconds_trimmed": self.seconds_in - self.seconds_out,
+                "latency_saved_seconds": (
+                    (self.seconds_in - self.seconds_out) * per_audio_second + self.rejected * per_call
+                ),
+            }
+
+
+audio_stats = AudioStats()
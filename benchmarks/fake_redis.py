@@ -0,0 +1,118 @@
+"""Local stand-in for a Redis server.
+
+Speaks enough of the Redis protocol for ``shared_state.RedisBackend``: PING,
+GET, SET with EX/PX/NX, DEL, EXISTS, SELECT and FLUSHDB. Multi-worker setups
+can be tried without installing Redis:
+
+    python -m benchmarks.fake_redis --port 6399
+    SHARED_STATE_URL=redis://127.0.0.1:6399/0 python -m engine.server --port 8600
+    SHARED_STATE_URL=redis://127.0.0.1:6399/0 python -m engine.server --port 8601
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, _Handler)
+        self.data = {}  # key -> (value, expires or None); one keyspace for every db
+        self.commands = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-redis", daemon=True).start()
+        return self
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self.data[key]
+            return None
+        return entry
+
+    def run(self, args):
+        command = args[0].upper()
+        with self.lock:
+            self.commands += 1
+            if command == b"PING":
+                return "+PONG"
+            if command in (b"SELECT", b"AUTH"):
+                return "+OK"
+            if command == b"FLUSHDB":
+                self.data.clear()
+                return "+OK"
+            if command == b"GET":
+                entry = self._live(args[1])
+                return entry[0] if entry is not None else None
+            if command == b"EXISTS":
+                return sum(self._live(key) is not None for key in args[1:])
+            if command == b"DEL":
+                return sum(self.data.pop(key, None) is not None for key in args[1:])
+            if command == b"SET":
+                key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+                expires = None
+                if b"PX" in options:
+                    expires = time.time() + int(options[options.index(b"PX") + 1]) / 1000
+                elif b"EX" in options:
+                    expires = time.time() + int(options[options.index(b"EX") + 1])
+                if b"NX" in options and self._live(key) is not None:
+                    return None
+                self.data[key] = (value, expires)
+                return "+OK"
+        return RuntimeError(f"ERR unknown command '{command.decode()}'")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            reply = self.server.run(args)
+            if reply is None:
+                out = b"$-1\r\n"
+            elif isinstance(reply, RuntimeError):
+                out = f"-{reply}\r\n".encode()
+            elif isinstance(reply, int):
+                out = f":{reply}\r\n".encode()
+            elif isinstance(reply, str):
+                out = reply.encode() + b"\r\n"
+            else:
+                out = b"$%d\r\n%s\r\n" % (len(reply), reply)
+            self.wfile.write(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6399)
+    args = parser.parse_args()
+    server = FakeRedisServer((args.host, args.port))
+    print(f"Fake Redis on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Local fake of the Groq/OpenAI endpoints the app uses.
+
+Serves ``/v1/chat/completions`` (blocking and SSE streaming) and
+``/v1/audio/transcriptions`` with configurable latency and token rate, so the
+turn loop can be exercised and timed without network access or API quota.
+
+Transcription returns a fixed sentence, except for clips made with
+``speak()``: each word of ``SPOKEN_ANSWER`` is a tone of its own pitch, so
+the fake "hears" exactly the words in the clip. That makes chunked
+transcription (cut points, overlap de-duplication) checkable end to end.
+
+    python -m benchmarks.fake_server --port 8765 --ttft 0.3 --tokens-per-second 250
+    LLM_BASE_URL=http://127.0.0.1:8765/v1 GROQ_API_KEY=fake streamlit run app.py
+"""
+import argparse
+import io
+import json
+import struct
+import sys
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Thanks for sharing that. Can you walk me through a specific challenge you faced, "
+    "what you did, and what the outcome was?"
+)
+SCORE_REPLY = json.dumps({
+    "scores": {"technical_knowledge": 6, "problem_solving": 7, "communication": 8,
+               "experience_relevance": 6, "cultural_fit": 7},
+    "strength": "Clear structure",
+    "improvement": "Give concrete numbers",
+})
+VALIDATION_REPLY = json.dumps({"use": True, "lead_in": "Good, that covers it."})
+TRANSCRIPT_REPLY = "I led a migration of our billing service to a new database."
+SPOKEN_ANSWER = (
+    "In my last role I owned the payments platform and its public API. At peak traffic our "
+    "checkout latency doubled, so I profiled the hot path, found a chatty database query, "
+    "batched the lookups behind a small cache and rolled it out behind a flag. The p95 "
+    "dropped by half, error rates fell, and the team adopted the same profiling routine "
+    "for every release after that."
+)
+TONE_WORDS = tuple(dict.fromkeys(SPOKEN_ANSWER.split()))
+_TONE_BASE, _TONE_STEP = 400.0, 50.0  # Hz; clear of fake_recording's 220 Hz hum
+
+
+def speak(text=SPOKEN_ANSWER, rate=16000, word_seconds=0.3, gap_seconds=0.12, lead=0.3):
+    """A 16-bit mono WAV "saying" ``text`` (words from TONE_WORDS) as tones."""
+    import numpy as np
+
+    t = np.arange(int(word_seconds * rate)) / rate
+    ramp = np.minimum(1, np.minimum(t, t[::-1]) / 0.01)  # no clicks at the edges
+    gap = np.zeros(int(gap_seconds * rate))
+    parts = [np.zeros(int(lead * rate))]
+    for word in text.split():
+        frequency = _TONE_BASE + _TONE_STEP * TONE_WORDS.index(word)
+        parts.extend([0.3 * ramp * np.sin(2 * np.pi * frequency * t), gap])
+    parts.append(np.zeros(int(lead * rate)))
+    out = io.BytesIO()
+    with wave.open(out, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes((np.concatenate(parts) * 32767).astype("<i2").tobytes())
+    return out.getvalue()
+
+
+def hear(upload):
+    """(words heard, audio seconds) for a multipart upload; words is None
+    when the clip isn't a WAV or isn't made of ``speak()`` tones."""
+    import numpy as np
+
+    from audio_preprocess import decode_wav, to_mono
+
+    start = upload.find(b"RIFF")
+    if start < 0:
+        return None, 0.0
+    size = struct.unpack("<I", upload[start + 4:start + 8])[0]
+    try:
+        samples, channels, rate = decode_wav(upload[start:start + 8 + size])
+    except (wave.Error, EOFError, ValueError):
+        return None, 0.0
+    samples = to_mono(samples, channels)
+    frame = int(0.01 * rate)
+    count = len(samples) // frame
+    loud = (samples[:count * frame].reshape(count, frame) ** 2).mean(axis=1) > 1e-3
+    words, run_start = [], None
+    for i, on in enumerate(list(loud) + [False]):
+        if on and run_start is None:
+            run_start = i
+        elif not on and run_start is not None:
+            if i - run_start >= 10:  # clipped word fragments (<100 ms) aren't heard
+                segment = samples[run_start * frame:i * frame]
+                spectrum = np.abs(np.fft.rfft(segment * np.hanning(len(segment))))
+                peak = np.argmax(spectrum) * rate / len(segment)
+                index = round((peak - _TONE_BASE) / _TONE_STEP)
+                if not 0 <= index < len(TONE_WORDS) or abs(peak - _TONE_BASE - index * _TONE_STEP) > 10:
+                    return None, len(samples) / rate
+                words.append(TONE_WORDS[index])
+            run_start = None
+    return words or None, len(samples) / rate
+
+
+FEEDBACK_REPLY = (
+    "**Strengths (only if actually demonstrated):**\n"
+    "- Clear structure in the second answer.\n\n**Areas for Improvement:**\n"
+    "- Give concrete examples.\n\n**Recommendations:**\n- Practice the STAR method."
+)
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, ttft=0.2, tokens_per_second=200.0, transcribe_latency=0.3,
+                 reply=DEFAULT_REPLY, transcribe_per_second=0.0):
+        super().__init__(address, _Handler)
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.transcribe_latency = transcribe_latency
+        self.transcribe_per_second = transcribe_per_second  # extra seconds per second of audio
+        self.transcriptions = 0
+        self.reply = reply
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, transcription=False):
+        with self._lock:
+            self.requests += 1
+            self.transcriptions += transcription
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-llm", daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address):
+        # Sync clients drop the kept-alive connection after a stream's [DONE]
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        server = self.server
+        transcription = self.path.endswith("/audio/transcriptions")
+        server.count(transcription)
+        raw = self.rfile.read(int(self.headers.get("content-length", 0)))
+
+        if transcription:
+            words, seconds = hear(raw)
+            time.sleep(server.transcribe_latency + seconds * server.transcribe_per_second)
+            return self._send_json({"text": " ".join(words) if words else TRANSCRIPT_REPLY})
+
+        request = json.loads(raw)
+        prompt = json.dumps(request.get("messages", []))
+        if "Drafted next question" in prompt:
+            text = VALIDATION_REPLY
+        elif (request.get("response_format") or {}).get("type") == "json_object":
+            text = SCORE_REPLY
+        elif "Areas for Improvement" in prompt:
+            text = FEEDBACK_REPLY
+        else:
+            text = server.reply
+        words = [w + " " for w in text.split(" ")]
+        prompt_tokens = len(prompt) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                 "total_tokens": prompt_tokens + len(words)}
+        time.sleep(server.ttft)
+
+        if not request.get("stream"):
+            time.sleep(len(words) / server.tokens_per_second)
+            return self._send_json({
+                "id": "fake", "object": "chat.completion", "created": int(time.time()),
+                "model": request["model"], "usage": usage,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+            })
+
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("transfer-encoding", "chunked")
+        self.end_headers()
+        for word in words:
+            chunk = {
+                "id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": request["model"],
+                "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+            time.sleep(1 / server.tokens_per_second)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--transcribe-latency", type=float, default=0.3)
+    parser.add_argument("--transcribe-per-second", type=float, default=0.0,
+                        help="extra transcription seconds per second of audio")
+    args = parser.parse_args()
+    server = FakeLLMServer(
+        (args.host, args.port), args.ttft, args.tokens_per_second, args.transcribe_latency,
+        transcribe_per_second=args.transcribe_per_second
+    )
+    print(f"Fake LLM server on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Offline A/B of the model tiers on recorded interviews.
+
+Replays each interviewer reply of recorded sessions through both tiers of
+MODEL_ROUTING_CONFIG. Each tier gets the request the session would have sent
+at that point (system prompt, context window, the candidate's answer):
+
+    python -m benchmarks.model_ab --limit 50 --output ab.json
+    python -m benchmarks.model_ab --transcripts sessions.json --route general --judge
+    python -m benchmarks.model_ab --fake  # dry run against benchmarks.fake_server
+
+Transcripts come from the interview history (HISTORY_CONFIG) or from a JSON
+list of session snapshots (``InterviewSession.snapshot()``). Per route and
+tier the report has:
+
+- latency and time to first token, p50/p95;
+- tokens and estimated cost;
+- how often the reply keeps to the prompt's word limit;
+- how often an interview reply ends with a question;
+- similarity to the reply the candidate actually got.
+
+It also prices the router's choice for each turn, including escalations,
+against sending every turn to the strong tier. With ``--judge``, the strong
+model is shown each pair in random order and picks the better reply.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import time
+
+from benchmarks.turn_loop import summarize
+from config import MODEL_ROUTING_CONFIG
+from context_window import ContextWindow, count_tokens, estimate_tokens
+from history_store import get_history_store
+from llm_client import get_client
+from model_router import TIERS, choose, cost, route_name
+from prompts import get_system_prompt
+from session_store import SessionTranscript
+from shared_state import get_shared_backend
+from streaming import StreamingResponse
+from tracing import percentile
+
+WORD_LIMIT = re.compile(r"under (\d+) words")
+HASHING_DIMS = 512
+
+JUDGE_SYSTEM_PROMPT = "You compare two replies of an interview practice partner. You reply with JSON only."
+
+
+def judge_messages(system_prompt, answer, first, second):
+    prompt = f"""
+The interviewer's instructions:
+{system_prompt}
+
+The candidate's last message: {answer}
+
+Reply A: {first}
+Reply B: {second}
+
+Which reply follows the instructions better and moves the interview forward more usefully? Answer "tie" if they are about as good.
+
+Reply with JSON: {{"better": "A", "B" or "tie"}}
+"""
+    return [
+        {"role": "system", "content": JUDGE_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+class HashingEmbedder:
+    """Character-trigram feature hashing; no model download, no extra deps.
+
+    Lexical, which is enough to compare a reply with the recorded one.
+    """
+
+    def __init__(self, dims=HASHING_DIMS):
+        self.dims = dims
+
+    def __call__(self, text):
+        import numpy as np
+
+        vector = np.zeros(self.dims, dtype=np.float32)
+        padded = f" {text} "
+        for i in range(len(padded) - 2):
+            digest = hashlib.blake2b(padded[i:i + 3].encode("utf-8"), digest_size=4).digest()
+            vector[int.from_bytes(digest, "little") % self.dims] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def load_transcripts(path=None, limit=None):
+    if path is None:
+        return get_history_store().transcripts(limit)
+    with open(path, encoding="utf-8") as f:
+        transcripts = json.load(f)[:limit]
+    for transcript in transcripts:
+        if isinstance(transcript["messages"], dict):
+            # A snapshot holds the tail; the rest is read back from the shared backend
+            transcript["messages"] = list(SessionTranscript.from_dict(transcript["messages"], get_shared_backend()))
+    return transcripts
+
+
+def ask(client, model, messages):
+    reply = StreamingResponse(client, model, messages)
+    text = "".join(reply)
+    prompt_tokens, completion_tokens = count_tokens(messages), estimate_tokens(text)
+    return {
+        "text": text,
+        "seconds": reply.total_time,
+        "ttft": reply.ttft,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": cost(model, prompt_tokens, completion_tokens),
+    }
+
+
+def judge(client, system_prompt, answer, replies, rng):
+    """The tier whose reply the strong model prefers, "tie", or None if unparsable."""
+    order = rng.sample(TIERS, 2)
+    response = client.chat.completions.create(
+        model=MODEL_ROUTING_CONFIG["tiers"]["strong"],
+        messages=judge_messages(system_prompt, answer, replies[order[0]]["text"], replies[order[1]]["text"]),
+        response_format={"type": "json_object"},
+        max_tokens=20,
+        temperature=0
+    )
+    try:
+        better = json.loads(response.choices[0].message.content).get("better")
+    except ValueError:
+        return None
+    return {"A": order[0], "B": order[1], "tie": "tie"}.get(better)
+
+
+def replay(client, transcript, embed, rng, routes=None, use_judge=False):
+    """One result per interviewer reply that followed a candidate message."""
+    mode, interview_type = transcript["mode"], transcript.get("interview_type") or "general"
+    name = route_name(mode, interview_type)
+    if routes and name not in routes:
+        return []
+    system_prompt = get_system_prompt(transcript["role"], mode, interview_type, transcript.get("level"))
+    limit = WORD_LIMIT.search(system_prompt)
+    context = ContextWindow()
+    messages = transcript["messages"]
+    results = []
+    for i, message in enumerate(messages):
+        if message["role"] != "assistant" or i == 0 or messages[i - 1]["role"] != "user":
+            continue
+        history, answer = messages[:i], messages[i - 1]["content"]
+        routed = choose(name, answer)
+        replies = {}
+        for tier in rng.sample(TIERS, 2):  # neither tier always goes first
+            model = MODEL_ROUTING_CONFIG["tiers"][tier]
+            reply = replies[tier] = ask(client, model, context.build(client, system_prompt, history, model))
+            reply["words"] = len(reply["text"].split())
+            reply["within_limit"] = reply["words"] <= int(limit.group(1)) if limit else None
+            reply["asks_question"] = reply["text"].rstrip().endswith("?") if mode != "chat" else None
+            reply["similarity"] = float(embed(reply["text"]) @ embed(message["content"]))
+        results.append({
+            "route": name,
+            "routed_tier": routed.tier,
+            "reason": routed.reason,
+            "tiers": replies,
+            "judge": judge(client, system_prompt, answer, replies, rng) if use_judge else None,
+        })
+    return results
+
+
+def _share(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def report(results):
+    by_route = {}
+    for result in results:
+        by_route.setdefault(result["route"], []).append(result)
+    summary = {}
+    for name, turns in sorted(by_route.items()):
+        tiers = {}
+        for tier in TIERS:
+            replies = [turn["tiers"][tier] for turn in turns]
+            tiers[tier] = {
+                "model": MODEL_ROUTING_CONFIG["tiers"][tier],
+                "latency_seconds": summarize([r["seconds"] for r in replies]),
+                "ttft_seconds": summarize([r["ttft"] for r in replies if r["ttft"] is not None]),
+                "prompt_tokens": sum(r["prompt_tokens"] for r in replies),
+                "completion_tokens": sum(r["completion_tokens"] for r in replies),
+                "cost_usd": sum(r["cost_usd"] for r in replies),
+                "words_p50": percentile(sorted(r["words"] for r in replies), 50),
+                "within_limit_rate": _share([r["within_limit"] for r in replies]),
+                "question_rate": _share([r["asks_question"] for r in replies]),
+                "similarity_to_recorded": _share([r["similarity"] for r in replies]),
+            }
+        judged = [turn["judge"] for turn in turns if turn["judge"] is not None]
+        summary[name] = {
+            "turns": len(turns),
+            "tiers": tiers,
+            "routed_fast_rate": _share([turn["routed_tier"] == "fast" for turn in turns]),
+            "escalations": {
+                reason: sum(1 for turn in turns if turn["reason"] == reason)
+                for reason in sorted({turn["reason"] for turn in turns if turn["reason"] is not None})
+            },
+            "routed_cost_usd": sum(turn["tiers"][turn["routed_tier"]]["cost_usd"] for turn in turns),
+            "judge": {
+                outcome: sum(1 for j in judged if j == outcome) / len(judged) for outcome in ("fast", "strong", "tie")
+            } if judged else None,
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded interviews through both model tiers")
+    parser.add_argument("--transcripts", help="JSON list of session snapshots (default: the interview history)")
+    parser.add_argument("--limit", type=int, help="most recent sessions to replay")
+    parser.add_argument("--route", action="append", help="only these routes (chat, general, technical, ...)")
+    parser.add_argument("--judge", action="store_true", help="have the strong model pick the better reply")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fake", action="store_true", help="run against a local fake server (no API key)")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    transcripts = load_transcripts(args.transcripts, args.limit)
+    server = None
+    if args.fake:
+        from benchmarks.fake_server import FakeLLMServer
+
+        server = FakeLLMServer(("127.0.0.1", 0), ttft=0.05, tokens_per_second=500.0).start()
+        client = get_client("fake", server.base_url)
+    else:
+        from environment import load_environment
+
+        api_key = load_environment().api_key
+        if not api_key:
+            parser.error("GROQ_API_KEY is not set (or use --fake)")
+        client = get_client(api_key)
+
+    embed = HashingEmbedder()
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    results = []
+    for transcript in transcripts:
+        results.extend(replay(client, transcript, embed, rng, args.route, args.judge))
+    if server is not None:
+        server.shutdown()
+
+    summary = report(results)
+    for name, route in summary.items():
+        fast, strong = route["tiers"]["fast"], route["tiers"]["strong"]
+        saving = 1 - route["routed_cost_usd"] / strong["cost_usd"] if strong["cost_usd"] else 0.0
+        print(
+            f"{name:<14} {route['turns']:>4} turns: p50 {fast['latency_seconds']['p50']:.2f}s fast vs "
+            f"{strong['latency_seconds']['p50']:.2f}s strong, routed {route['routed_fast_rate']:.0%} fast, "
+            f"{saving:.0%} cheaper than all-strong"
+            + (f", judge prefers fast {route['judge']['fast']:.0%} / strong {route['judge']['strong']:.0%}"
+               if route["judge"] else ""),
+            file=sys.stderr
+        )
+    if not results:
+        print("No interviewer replies to replay.", file=sys.stderr)
+
+    payload = json.dumps({
+        "config": vars(args),
+        "tiers": MODEL_ROUTING_CONFIG["tiers"],
+        "wall_seconds": time.perf_counter() - started,
+        "routes": summary,
+        "turns": results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Startup and rerun timing for the Streamlit page.
+
+Each sample runs the page in a fresh interpreter through Streamlit's
+``AppTest``: one cold run (process start, imports, first render) followed by
+warm reruns, which is the cost every click pays. It also lists which heavy
+modules the first render pulled in, so lazy loading stays lazy.
+
+    python -m benchmarks.startup --samples 5 --reruns 20 --output startup.json
+
+No API key or network is needed; the page never calls the LLM before the
+first message.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.turn_loop import summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("openai", "gtts", "audio_recorder_streamlit", "numpy")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+cold = time.perf_counter()
+if at.exception:
+    raise SystemExit(str(at.exception))
+loaded = [m for m in {heavy!r} if m in sys.modules]
+time.sleep({settle})
+reruns = []
+for _ in range({reruns}):
+    t = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - t)
+print(json.dumps({{"streamlit_import": imported - start, "first_run": cold - imported,
+                  "reruns": reruns, "loaded": loaded}}))
+"""
+
+
+def sample(reruns, settle):
+    env = dict(os.environ, GROQ_API_KEY=os.environ.get("GROQ_API_KEY", "startup-probe"))
+    code = _PROBE.format(
+        app=os.path.join(ROOT, "app.py"), heavy=HEAVY_MODULES, reruns=reruns, settle=settle
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit page startup/rerun timing")
+    parser.add_argument("--samples", type=int, default=5, help="fresh processes")
+    parser.add_argument("--reruns", type=int, default=20, help="warm reruns per process")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="seconds between the first run and the reruns, like a user reading the page")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    samples = [sample(args.reruns, args.settle) for _ in range(args.samples)]
+    results = {
+        "config": vars(args),
+        "first_run_seconds": summarize([s["first_run"] for s in samples]),
+        "rerun_seconds": summarize([r for s in samples for r in s["reruns"]]),
+        "streamlit_import_seconds": summarize([s["streamlit_import"] for s in samples]),
+        "loaded_on_first_run": samples[0]["loaded"],
+    }
+
+    first, rerun = results["first_run_seconds"], results["rerun_seconds"]
+    print(
+        f"first run p50 {first['p50']:.3f}s p95 {first['p95']:.3f}s, "
+        f"rerun p50 {rerun['p50'] * 1000:.1f}ms p95 {rerun['p95'] * 1000:.1f}ms, "
+        f"loaded: {', '.join(results['loaded_on_first_run']) or 'none'}",
+        file=sys.stderr
+    )
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Per-stage p50/p95 from a span log written with TRACE_JSONL.
+
+    TRACE_JSONL=spans.jsonl python -m benchmarks.turn_loop --sessions 10
+    python -m benchmarks.trace_report spans.jsonl
+    python -m benchmarks.trace_report spans.jsonl --baseline last-release.jsonl --max-regression 20
+
+With ``--baseline``, each stage's p50/p95 is compared with the baseline log.
+The exit status is 1 when any of them got slower by more than
+``--max-regression`` percent, so the report can gate a release.
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+from tracing import percentile
+
+# Pipeline order; stages not listed here sort after these, by name
+STAGE_ORDER = (
+    "turn", "audio_prep", "transcription", "context_fold", "prefetch_check", "question_bank", "prompt_build",
+    "queue", "completion", "completion_ttft", "tts", "audio_delivery", "audio_embed", "render", "feedback",
+    "scoring_wait",
+)
+
+
+def load(path, kind=None):
+    """``{(kind, stage): [seconds]}`` and completion tokens/s by kind."""
+    seconds = defaultdict(list)
+    rates = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            span = json.loads(line)
+            if kind and span["kind"] != kind:
+                continue
+            seconds[(span["kind"], span["stage"])].append(span["seconds"])
+            if span.get("tokens_per_second") is not None:
+                rates[span["kind"]].append(span["tokens_per_second"])
+    return seconds, rates
+
+
+def _order(key):
+    kind, stage = key
+    rank = STAGE_ORDER.index(stage) if stage in STAGE_ORDER else len(STAGE_ORDER)
+    return kind, rank, stage
+
+
+def _change(now, before):
+    if now is None or not before:
+        return None
+    return 100 * (now - before) / before
+
+
+def report(seconds, rates, baseline=None, max_regression=None):
+    """Lines of the table, and the (kind, stage, quantile) keys that regressed."""
+    lines = []
+    regressions = []
+    header = f"{'kind':<10} {'stage':<16} {'count':>6} {'p50 ms':>9} {'p95 ms':>9}"
+    if baseline is not None:
+        header += f" {'p50 Δ':>8} {'p95 Δ':>8}"
+    lines += [header, "-" * len(header)]
+    for key in sorted(seconds, key=_order):
+        values = sorted(seconds[key])
+        p50, p95 = percentile(values, 50), percentile(values, 95)
+        line = f"{key[0]:<10} {key[1]:<16} {len(values):>6} {1000 * p50:>9.1f} {1000 * p95:>9.1f}"
+        if baseline is not None:
+            before = sorted(baseline.get(key) or [])
+            for quantile, now in (("p50", p50), ("p95", p95)):
+                change = _change(now, percentile(before, int(quantile[1:])) if before else None)
+                line += f" {change:>+7.0f}%" if change is not None else f" {'new':>8}"
+                if change is not None and max_regression is not None and change > max_regression:
+                    regressions.append((*key, quantile))
+        lines.append(line)
+    for kind in sorted(rates):
+        values = sorted(rates[kind])
+        lines.append(
+            f"{kind} completion speed: p50 {percentile(values, 50):.0f} tokens/s, "
+            f"p5 {percentile(values, 5):.0f} tokens/s"
+        )
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage latency report from a TRACE_JSONL span log")
+    parser.add_argument("spans", help="JSONL span log")
+    parser.add_argument("--baseline", help="span log to compare against")
+    parser.add_argument("--kind", help="only this trace kind (turn, feedback, scoring, prefetch)")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="exit 1 if a stage's p50 or p95 grew by more than this percent")
+    args = parser.parse_args(argv)
+
+    seconds, rates = load(args.spans, args.kind)
+    baseline = load(args.baseline, args.kind)[0] if args.baseline else None
+    lines, regressions = report(seconds, rates, baseline, args.max_regression)
+    print("\n".join(lines))
+    if regressions:
+        print("\nSlower than the baseline: " + ", ".join(f"{k}/{s} {q}" for k, s, q in regressions),
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""Headless load test for the interview turn loop.
+
+Drives the chat, mock-interview, voice and feedback flows through the same
+engine sessions the Streamlit page uses, against the local fake server, at
+several concurrency levels. Every level runs that many sessions of each flow
+at once, each on its own thread like a Streamlit script run.
+
+    python -m benchmarks.turn_loop --sessions 1 10 100 --output bench.json
+
+Results are JSON so runs can be diffed between releases.
+"""
+import argparse
+import array
+import io
+import json
+import math
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+import wave
+
+from audio_engine import SpeechPipeline
+from audio_preprocess import audio_stats
+from benchmarks.fake_server import FakeLLMServer
+from config import SCHEDULER_CONFIG
+from engine import InterviewEngine
+from model_router import route_stats
+from question_bank import bank_stats
+from tracing import get_recorder, percentile
+
+FLOWS = ("chat", "mock_interview", "voice")
+DOMAIN = "Computer Science & Technology"
+
+
+def fake_recording(rate=44100, lead=0.5, voiced=1.5, tail=1.0):
+    """A recorder-like WAV: silence, a voiced tone, then trailing silence."""
+    samples = array.array("h", bytes(2 * int(rate * lead)))
+    samples.extend(
+        int(8000 * math.sin(2 * math.pi * 220 * i / rate)) for i in range(int(rate * voiced))
+    )
+    samples.extend(array.array("h", bytes(2 * int(rate * tail))))
+    out = io.BytesIO()
+    with wave.open(out, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(samples.tobytes())
+    return out.getvalue()
+
+
+FAKE_AUDIO = fake_recording()
+ANSWER = (
+    "In my last role I owned the payments API. We had latency problems at peak, "
+    "so I profiled the hot path, added caching and cut p95 by half."
+)
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return {
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "mean": statistics.fmean(values) if values else None,
+    }
+
+
+def make_tts(latency):
+    def synthesize(text, lang, tld):
+        time.sleep(latency)
+        return bytes(len(text) * 40)  # roughly MP3-sized
+    return synthesize
+
+
+class Session:
+    """Timings for one simulated session; state lives in the engine session."""
+
+    def __init__(self, flow, engine):
+        self.flow = flow
+        mode = "chat" if flow == "chat" else "mock_interview"
+        self.session = engine.new_session(role=DOMAIN, mode=mode)
+        self.last_audio = None
+        self.turn_latencies = []
+        self.ttfts = []
+        self.tokens = []
+        self.feedback_latency = None
+
+
+def run_session(session, turns, synthesize, errors):
+    try:
+        for i in range(turns):
+            speech = SpeechPipeline(synthesize_fn=synthesize)
+            start = time.perf_counter()
+            if session.flow == "voice":
+                turn = session.session.turn(audio_bytes=FAKE_AUDIO, speech=speech)
+            else:
+                turn = session.session.turn(text=f"{ANSWER} ({i})", speech=speech)
+            turn.user_text()
+            deltas = sum(1 for _ in turn.deltas())
+            turn.result()
+            session.last_audio = speech.audio()
+            session.turn_latencies.append(time.perf_counter() - start)
+            session.ttfts.append(turn.ttft)
+            session.tokens.append(session.session.context.last_request_tokens + deltas)
+
+        if session.flow != "chat":
+            speech = SpeechPipeline(synthesize_fn=synthesize)
+            start = time.perf_counter()
+            session.session.feedback(speech=speech)
+            session.last_audio = speech.audio()
+            session.feedback_latency = time.perf_counter() - start
+    except Exception as e:
+        errors.append(repr(e))
+
+
+def run_level(engine, sessions, turns, synthesize):
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    pool = [Session(flow, engine) for flow in FLOWS for _ in range(sessions)]
+    errors = []
+    threads = [
+        threading.Thread(target=run_session, args=(s, turns, synthesize, errors))
+        for s in pool
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    # Sessions are still alive here, so this is the state they hold
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    latencies = [x for s in pool for x in s.turn_latencies]
+    feedback = [s.feedback_latency for s in pool if s.feedback_latency is not None]
+    return {
+        "sessions": sessions,  # per flow
+        "turns": len(latencies),
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput_turns_per_second": len(latencies) / wall if wall else None,
+        "turn_latency_seconds": summarize(latencies),
+        "ttft_seconds": summarize([x for s in pool for x in s.ttfts if x is not None]),
+        "feedback_latency_seconds": summarize(feedback),
+        "tokens_per_turn": summarize([x for s in pool for x in s.tokens]),
+        "memory_bytes_per_session": retained / len(pool),
+        "flows": {
+            flow: {
+                "turn_latency_seconds": summarize([x for s in pool if s.flow == flow for x in s.turn_latencies]),
+                "ttft_seconds": summarize([x for s in pool if s.flow == flow for x in s.ttfts if x is not None]),
+            }
+            for flow in FLOWS
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interview turn-loop load test")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100],
+                        help="concurrent sessions of each flow, per level")
+    parser.add_argument("--turns", type=int, default=4, help="turns per session")
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--transcribe-latency", type=float, default=0.3)
+    parser.add_argument("--tts-latency", type=float, default=0.1, help="seconds per TTS segment")
+    parser.add_argument("--no-rate-limits", action="store_true",
+                        help="lift the scheduler's Groq quota limits to measure the app alone")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.no_rate_limits:
+        for key in ("requests_per_minute", "tokens_per_minute",
+                    "session_requests_per_minute", "session_tokens_per_minute"):
+            SCHEDULER_CONFIG[key] = None
+
+    server = FakeLLMServer(
+        ("127.0.0.1", 0), args.ttft, args.tokens_per_second, args.transcribe_latency
+    ).start()
+    engine = InterviewEngine("fake", server.base_url, history=False)
+    synthesize = make_tts(args.tts_latency)
+    # Warm-up turn so one-time imports and pools don't count as session memory
+    run_level(engine, 1, 1, synthesize)
+
+    results = {
+        "config": vars(args),
+        "levels": [run_level(engine, n, args.turns, synthesize) for n in args.sessions],
+        "server_requests": server.requests,
+        "audio_uploads": audio_stats.snapshot(),
+        "question_bank": bank_stats.snapshot(),
+        "models": route_stats.snapshot(),
+        "scheduler": engine.scheduler_stats(),
+        "stages": get_recorder().snapshot(),
+    }
+    server.shutdown()
+
+    for level in results["levels"]:
+        lat = level["turn_latency_seconds"]
+        print(
+            f"{level['sessions']:>4} sessions per flow: {level['throughput_turns_per_second']:.1f} turns/s, "
+            f"p50 {lat['p50']:.3f}s p95 {lat['p95']:.3f}s p99 {lat['p99']:.3f}s, "
+            f"{level['memory_bytes_per_session'] / 1024:.0f} KiB/session, "
+            f"{len(level['errors'])} errors",
+            file=sys.stderr
+        )
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
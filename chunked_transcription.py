@@ -0,0 +1,176 @@
+"""Chunked, concurrent transcription for long spoken answers.
+
+A long answer used to go to Whisper as one request after recording stopped,
+so the wait grew with the answer. ``ChunkedTranscriber`` takes audio as it
+arrives, cuts it into overlapping chunks (at the quietest point near each
+boundary, so words are rarely split) and transcribes every chunk as soon as
+it is complete, concurrently. Neighbouring chunk texts are stitched by
+dropping the words repeated in the overlap. The transcript of the chunks
+finished so far is available at any time, and when recording stops only the
+last chunk is still outstanding.
+
+Fed from the engine's websocket as the candidate speaks, or with a whole clip
+at once for long recordings from the mic button.
+"""
+import asyncio
+import re
+
+from audio_preprocess import encode, speech_mask
+from config import STREAMING_STT_CONFIG
+
+_WORD = re.compile(r"[^\w']+")
+
+
+def _normalize(word):
+    return _WORD.sub("", word.lower())
+
+
+def merge_overlap(left, right, max_words=None):
+    """Join two chunk transcripts, dropping words repeated at the seam.
+
+    Looks for the longest run of words that ends ``left`` and starts
+    ``right``. A single short word ("the", "and") is not trusted as overlap.
+    """
+    max_words = max_words or STREAMING_STT_CONFIG["max_overlap_words"]
+    a, b = left.split(), right.split()
+    if not a:
+        return right.strip()
+    if not b:
+        return left.strip()
+    na = [_normalize(w) for w in a[-max_words:]]
+    nb = [_normalize(w) for w in b[:max_words]]
+    for size in range(min(len(na), len(nb)), 0, -1):
+        if na[-size:] == nb[:size]:
+            if size == 1 and len(nb[0]) < 4:
+                break
+            return " ".join(a + b[size:])
+    return " ".join(a + b)
+
+
+def stitch(texts):
+    merged = ""
+    for text in texts:
+        merged = merge_overlap(merged, text)
+    return merged
+
+
+class ChunkedTranscriber:
+    """Overlapping chunks of one utterance, transcribed as they fill up.
+
+    ``transcribe(wav_bytes, filename)`` is an async callable (the real API or
+    a fake). ``feed`` and ``finish`` may be called from any thread; the work
+    runs on ``loop``.
+    """
+
+    def __init__(self, transcribe, loop, rate=None, on_partial=None):
+        import numpy as np
+
+        self.transcribe = transcribe
+        self.loop = loop
+        self.rate = rate or STREAMING_STT_CONFIG["rate"]
+        self.on_partial = on_partial
+        self.chunk = int(STREAMING_STT_CONFIG["chunk_seconds"] * self.rate)
+        self.overlap = int(STREAMING_STT_CONFIG["overlap_seconds"] * self.rate)
+        self.search = int(STREAMING_STT_CONFIG["cut_search_seconds"] * self.rate)
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.received = 0  # samples fed so far
+        self.tasks = []
+        self.texts = []
+        self.api_calls = 0
+        self.cancelled = False
+        self._finished = asyncio.Event()
+
+    # Thread-facing API
+
+    def feed(self, samples):
+        """Add float32 samples in [-1, 1] at ``rate``."""
+        self.loop.call_soon_threadsafe(self._feed, samples)
+
+    def feed_pcm16(self, data):
+        """Add raw 16-bit little-endian mono PCM."""
+        import numpy as np
+
+        self.feed(np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768)
+
+    def finish(self):
+        """Recording stopped; transcribe whatever is left."""
+        self.loop.call_soon_threadsafe(self._finish)
+
+    def cancel(self):
+        """Recording abandoned (client went away); ``result`` raises."""
+        self.loop.call_soon_threadsafe(self._cancel)
+
+    def partial(self):
+        """Transcript of the leading chunks that are already done."""
+        ready = []
+        for text in self.texts:
+            if text is None:
+                break
+            ready.append(text)
+        return stitch(ready)
+
+    async def result(self):
+        """Full stitched transcript; awaited on ``loop``."""
+        await self._finished.wait()
+        if self.cancelled:
+            raise asyncio.CancelledError("recording abandoned")
+        await asyncio.gather(*self.tasks)
+        return stitch(self.texts)
+
+    @property
+    def seconds(self):
+        return self.received / self.rate
+
+    # Loop side
+
+    def _feed(self, samples):
+        import numpy as np
+
+        self.received += len(samples)
+        self.buffer = np.concatenate([self.buffer, samples.astype(np.float32)])
+        while len(self.buffer) >= self.chunk + self.search:
+            cut = self._cut_point()
+            self._submit(self.buffer[:cut])
+            self.buffer = self.buffer[cut - self.overlap:]
+
+    def _cut_point(self):
+        """Quietest 20 ms window in the search region after the nominal chunk end."""
+        import numpy as np
+
+        window = max(1, int(0.02 * self.rate))
+        region = self.buffer[self.chunk:self.chunk + self.search]
+        count = len(region) // window
+        if not count:
+            return self.chunk
+        energy = (region[:count * window].reshape(count, window) ** 2).mean(axis=1)
+        return self.chunk + int(np.argmin(energy)) * window + window // 2
+
+    def _finish(self):
+        # The tail is only new audio if it extends past the last overlap
+        if len(self.buffer) > (self.overlap if self.tasks else 0):
+            self._submit(self.buffer)
+        self.buffer = self.buffer[:0]
+        self._finished.set()
+
+    def _cancel(self):
+        self.cancelled = True
+        for task in self.tasks:
+            task.cancel()
+        self._finished.set()
+
+    def _submit(self, samples):
+        index = len(self.texts)
+        self.texts.append(None)
+        self.tasks.append(self.loop.create_task(self._transcribe(index, samples.copy())))
+
+    async def _transcribe(self, index, samples):
+        voiced, _ = speech_mask(samples, self.rate)
+        if voiced.any():
+            data, filename = encode(samples, self.rate)
+            self.api_calls += 1
+            self.texts[index] = (await self.transcribe(data, filename)).strip()
+        else:
+            self.texts[index] = ""  # nothing said in this chunk: no API call
+        if self.on_partial is not None:
+            self.on_partial(self.partial())
+
@@ -9,6 +9,7 @@ APP_CONFIG = {
     "max_questions": 15,
     "question_timeout": 30,  # seconds
     "recording_timeout": 10,  # seconds after mic activation
+    "stream_responses": True,  # render LLM tokens as they arrive
 }
 
 # Role Templates
@@ -31,6 +32,17 @@ ROLE_TEMPLATES = {
     }
 }
 
+# Practice Domains (selectable in the sidebar) and the areas each one covers
+DOMAIN_CONTEXTS = {
+    "Computer Science & Technology": "software development, programming, system design, databases, algorithms, and technical problem-solving",
+    "Sales & Marketing": "sales strategies, customer relationship management, market analysis, lead generation, and revenue growth",
+    "Architecture & Design": "design principles, project management, client relations, building codes, and creative problem-solving",
+    "Finance & Banking": "financial analysis, risk management, investment strategies, regulatory compliance, and market knowledge",
+    "Healthcare & Medicine": "patient care, medical knowledge, ethical decisions, healthcare systems, and clinical experience",
+    "Education & Teaching": "curriculum development, classroom management, student engagement, educational technology, and learning assessment",
+    "Business & Management": "leadership, strategic planning, team management, business operations, and organizational development"
+}
+
 # Experience Level Mappings
 EXPERIENCE_LEVELS = {
     "Junior (0-2 years)": {
@@ -72,4 +84,223 @@ ASSESSMENT_CRITERIA = {
     "communication": 20,
     "experience_relevance": 15,
     "cultural_fit": 10
-}
\ No newline at end of file
+}
+
+# Text-to-Speech Settings
+TTS_CONFIG = {
+    "lang": "en",
+    "tld": "com",  # gTTS accent / voice
+    "workers": 4,  # process-wide synthesis threads
+    "min_chunk_chars": 40,  # merge short sentences into one TTS request
+    "cache_max_bytes": 32 * 1024 * 1024,  # in-memory audio cache budget
+    "cache_dir": None,  # set (or TTS_CACHE_DIR) to share audio on disk
+    "cache_ttl": 7 * 24 * 3600,  # seconds, in a shared backend
+}
+
+# Interview Feedback Settings
+FEEDBACK_CONFIG = {
+    "max_tokens": 300,  # synthesis over the scores, not the whole transcript
+    "temperature": 0.7,
+    "synthesis_max_words": 150,
+    "shared_cache": True,  # reuse feedback across sessions (and workers, see SHARED_STATE_CONFIG)
+    "shared_cache_size": 256,
+    "shared_cache_ttl": 7 * 24 * 3600,  # seconds, in a shared backend
+}
+
+# Speech-to-Text Settings
+TRANSCRIPTION_CONFIG = {
+    "model": "whisper-large-v3-turbo",
+    "use_tempfile": False,  # True: per-call temp file instead of in-memory
+}
+
+# Recorded Answer Preprocessing (before upload)
+AUDIO_PREPROCESS_CONFIG = {
+    "enabled": True,
+    "target_rate": 16000,  # Hz, mono; also asked of the browser recorder
+    "codec": "wav",  # "wav" or "flac" (needs soundfile)
+    "frame_ms": 30,
+    "silence_db": -50,  # frames quieter than this are never speech
+    "noise_margin_db": 10,  # speech must be this far above the noise floor...
+    "speech_range_db": 35,  # ...or within this much of the loudest frame
+    "padding_ms": 250,  # kept around speech; longer pauses are shortened
+    "min_speech_ms": 300,  # less speech than this is rejected without an API call
+}
+
+# Chunked Transcription (long answers and live audio over the websocket)
+STREAMING_STT_CONFIG = {
+    "enabled": True,
+    "min_seconds": 20,  # recorded clips at least this long are split up
+    "rate": 16000,  # Hz, mono
+    "chunk_seconds": 8,
+    "overlap_seconds": 1.5,
+    "cut_search_seconds": 1.0,  # look this far past the chunk end for a quiet cut
+    "max_overlap_words": 20,
+}
+
+# Conversation Context Settings
+CONTEXT_CONFIG = {
+    "keep_turns": 6,  # most recent user/assistant pairs sent verbatim
+    "fold_turns": 3,  # older turns folded into the summary per update
+    "summary_max_tokens": 250,
+    "summary_max_words": 150,
+    "default_token_budget": 4000,
+    "token_budgets": {  # prompt tokens per request, by model
+        "llama-3.3-70b-versatile": 6000,
+        "llama-3.1-8b-instant": 4000,
+    },
+}
+
+# LLM Client Settings
+LLM_CONFIG = {
+    "base_url": "https://api.groq.com/openai/v1",  # LLM_BASE_URL overrides
+    "timeout": 30,  # seconds, blocking completions
+    "stream_timeout": 60,  # seconds, streamed completions
+    "transcription_timeout": 60,
+    "max_retries": 3,  # on 429 / 5xx / connection errors
+    "backoff_base": 0.5,  # seconds; doubled per attempt, fully jittered
+    "backoff_max": 8.0,
+    "max_concurrency": 16,  # in-flight requests per process
+}
+
+# Model Tiering (a model per kind of reply; see model_router.py)
+MODEL_ROUTING_CONFIG = {
+    "enabled": True,  # False: every reply on the strong tier
+    "tiers": {
+        "fast": "llama-3.1-8b-instant",
+        "strong": "llama-3.3-70b-versatile",
+    },
+    "routes": {  # route -> tier
+        "chat": "fast",
+        "general": "fast",  # mock interviews, by interview type
+        "technical": "strong",
+        "system_design": "strong",
+        "feedback": "strong",
+        "scoring": "strong",  # per-answer scores
+        "validation": "fast",  # does a drafted question still fit
+        "summary": "fast",  # folding old turns into the context summary
+    },
+    "default_tier": "strong",  # routes not listed above
+    "escalate": {  # a fast-tier reply goes to the strong tier when the answer has at least...
+        "answer_words": 80,
+        "code_tokens": 3,  # identifiers, calls, operators, code fences
+        "questions": 2,  # questions the candidate asks
+    },
+    "prices": {  # USD per million tokens (input, output), for the cost estimates
+        "llama-3.1-8b-instant": (0.05, 0.08),
+        "llama-3.3-70b-versatile": (0.59, 0.79),
+    },
+    "window": 1000,  # recent calls per route kept for p50/p95
+}
+
+# Request Scheduling (one shared Groq quota; see scheduler.py)
+SCHEDULER_CONFIG = {
+    "requests_per_minute": 1000,  # whole process; None means unlimited
+    "request_burst": 100,
+    "tokens_per_minute": 300000,  # estimated prompt + reply tokens
+    "token_burst": 50000,
+    "session_requests_per_minute": 60,  # per practice session
+    "session_request_burst": 20,
+    "session_tokens_per_minute": 40000,
+    "session_token_burst": 20000,
+    "reserved_interactive_slots": 4,  # of LLM_CONFIG["max_concurrency"]; background never uses them
+    "max_queue": {"interactive": 200, "background": 100},  # waiting calls before refusing more
+    "max_wait": {"interactive": 15, "background": 60},  # seconds; longer expected waits are refused
+    "reply_tokens": 400,  # reply estimate when a call sets no max_tokens
+    "max_tracked_sessions": 10000,
+}
+
+# Audio Delivery Settings
+AUDIO_DELIVERY_CONFIG = {
+    "backend": "media",  # "media" (Streamlit media files) or "sidecar" (streamed)
+    "host": "0.0.0.0",  # sidecar bind address
+    "port": 8502,
+    "public_url": "http://localhost:8502",  # how browsers reach the sidecar
+    "max_clips": 512,  # published clips kept for replay / range requests
+}
+
+# Session Memory Settings
+SESSION_CONFIG = {
+    "memory_budget_bytes": 64 * 1024,  # transcript kept in memory per session
+    "spill_path": None,  # SQLite file for spilled data; None = system temp dir
+    "spill_max_age": 7 * 24 * 3600,  # seconds before abandoned spills are pruned
+}
+
+# Shared State Settings (several workers behind a load balancer; see shared_state.py)
+SHARED_STATE_CONFIG = {
+    "url": "memory://",  # or sqlite:///path/state.db, redis://host:6379/0; SHARED_STATE_URL overrides
+    "prefix": "ipp:",  # Redis key prefix
+    "session_ttl": 24 * 3600,  # seconds an idle session can be resumed on any worker
+    "lease_seconds": 30,  # how long other workers wait for one worker's render
+}
+
+# Interview History Settings
+HISTORY_CONFIG = {
+    "enabled": True,
+    "path": None,  # SQLite file; None = interview_history.db next to app.py
+    "default_user": "local",  # overridden by the ?user= query parameter
+}
+
+# Per-Answer Scoring Settings
+SCORING_CONFIG = {
+    "max_tokens": 200,
+    "temperature": 0.0,
+    "timeout": 60,  # seconds to wait for all answer scores at feedback time
+}
+
+# Speculative Next-Question Prefetch (mock interviews)
+PREFETCH_CONFIG = {
+    "enabled": {  # per interview type
+        "general": True,
+        "technical": False,  # follow-ups depend too much on the answer
+        "system_design": True,
+    },
+    "validator_max_tokens": 60,
+    "wait_timeout": 2.0,  # seconds to wait for an unfinished draft
+}
+
+# Local Question Bank (mock interviews; see question_bank.py)
+QUESTION_BANK_CONFIG = {
+    "enabled": {  # per interview type; replaces the prefetch where on
+        "general": True,
+        "technical": True,
+        "system_design": True,
+    },
+    "path": None,  # JSON bank; None = data/question_bank.json; QUESTION_BANK_PATH overrides
+    "follow_ups": {  # adaptive (LLM) follow-ups before the next bank question
+        "general": 1,
+        "technical": 1,
+        "system_design": 3,
+    },
+    "min_answer_words": 12,  # shorter answers get a canned probe, not an LLM call
+}
+
+# Cross-Session Response Cache (first turns only)
+RESPONSE_CACHE_CONFIG = {
+    "modes": {  # per practice mode; opt out by setting False
+        "chat": True,
+        "mock_interview": False,
+    },
+    "max_entries": 512,
+    "ttl": 6 * 60 * 60,  # seconds
+    "embedding": None,  # None (exact match only) or "sentence-transformers" (also paraphrases)
+    "embedding_model": "all-MiniLM-L6-v2",
+    "similarity": 0.95,  # cosine threshold for a paraphrase hit
+}
+
+# Per-Stage Tracing (see tracing.py)
+TRACING_CONFIG = {
+    "enabled": True,
+    "sample_rate": 1.0,  # share of turns traced; TRACE_SAMPLE_RATE overrides
+    "jsonl_path": None,  # append every span here for benchmarks/trace_report.py; TRACE_JSONL overrides
+    "window": 1000,  # recent spans per stage kept for p50/p95
+    "metrics_port": None,  # serve /metrics from the Streamlit process (the engine server always does)
+    "metrics_host": "0.0.0.0",
+}
+
+# Engine HTTP/Websocket Server (python -m engine.server)
+ENGINE_SERVER_CONFIG = {
+    "host": "0.0.0.0",
+    "port": 8600,
+    "max_sessions": 1000,
+    "idle_timeout": 30 * 60,  # seconds before an idle session is dropped
+}
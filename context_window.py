@@ -0,0 +1,139 @@
+"""Rolling conversation context for LLM requests.
+
+The last few turns are sent verbatim; anything older is folded into a running
+summary that is extended incrementally (never recomputed from scratch). The
+assembled request is also held under a per-model token budget, so prompt size
+stays flat however long a mock interview runs.
+"""
+import time
+from collections.abc import Sequence
+
+from config import CONTEXT_CONFIG
+from model_router import choose, route_stats
+
+SUMMARY_SYSTEM_PROMPT = "You maintain concise running notes of an interview practice conversation."
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English; good enough for budgeting
+    return len(text) // 4 + 1
+
+
+def count_tokens(messages):
+    # Small per-message overhead for role/formatting
+    return sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+
+def token_budget(model):
+    return CONTEXT_CONFIG["token_budgets"].get(model, CONTEXT_CONFIG["default_token_budget"])
+
+
+class HistoryTail(Sequence):
+    """A copy of ``messages[start:]`` that still indexes like the whole list.
+
+    Only what the summary does not cover yet is copied, so a spilled
+    transcript is not read back from disk on every turn.
+    """
+
+    def __init__(self, messages, start):
+        self.start = start
+        self.messages = list(messages[start:])
+
+    def __len__(self):
+        return self.start + len(self.messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if start < self.start and start < stop:
+                raise IndexError("messages before the tail were not copied")
+            return self.messages[max(0, start - self.start):max(0, stop - self.start):step]
+        if index < 0:
+            index += len(self)
+        if not self.start <= index < len(self):
+            raise IndexError("messages before the tail were not copied")
+        return self.messages[index - self.start]
+
+    def append(self, message):
+        self.messages.append(message)
+
+
+class ContextWindow:
+    """Per-session context state; keep one in ``st.session_state``."""
+
+    def __init__(self, keep_turns=None, fold_turns=None):
+        self.keep_messages = 2 * (keep_turns or CONTEXT_CONFIG["keep_turns"])
+        self.fold_messages = 2 * (fold_turns or CONTEXT_CONFIG["fold_turns"])
+        self.summary = ""
+        self.summarized = 0  # messages[:summarized] are folded into summary
+        self.last_request_tokens = 0
+
+    def _fold(self, client, messages, upto):
+        transcript = "\n".join(
+            f"{'Interviewer' if m['role'] == 'assistant' else 'Candidate'}: {m['content']}"
+            for m in messages[self.summarized:upto]
+        )
+        prompt = f"""
+Existing notes:
+{self.summary or "(none yet)"}
+
+New conversation turns:
+{transcript}
+
+Update the notes to include the new turns. Keep questions asked, key points of the candidate's answers and any feedback given. Reply with the notes only, under {CONTEXT_CONFIG["summary_max_words"]} words.
+"""
+        route = choose("summary")
+        messages = [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        started = time.perf_counter()
+        response = client.chat.completions.create(
+            model=route.model,
+            messages=messages,
+            max_tokens=CONTEXT_CONFIG["summary_max_tokens"],
+            temperature=0.2
+        )
+        self.summary = response.choices[0].message.content.strip()
+        route_stats.record(route, time.perf_counter() - started, None, count_tokens(messages),
+                           estimate_tokens(self.summary))
+        self.summarized = upto
+
+    def tail(self, messages):
+        """Snapshot of the ``messages`` the next request can still use."""
+        return HistoryTail(messages, self.summarized)
+
+    def prepare(self, client, messages, pending=0):
+        """Fold older turns into the summary if the window has overflowed.
+
+        ``pending`` counts messages about to be appended, so this can run on
+        the existing history while the next user turn is still transcribing.
+        """
+        # Fold in batches so summarization isn't an extra call on every turn
+        unsummarized = len(messages) + pending - self.summarized
+        if unsummarized > self.keep_messages + self.fold_messages:
+            try:
+                self._fold(client, messages, len(messages) + pending - self.keep_messages)
+            except Exception:
+                # Keep the old summary; the budget check in build() still bounds size
+                pass
+
+    def build(self, client, system_prompt, messages, model):
+        """Return the message list to send for the next completion."""
+        self.prepare(client, messages)
+        request = self.window(system_prompt, messages, model)
+        self.last_request_tokens = count_tokens(request)
+        return request
+
+    def window(self, system_prompt, messages, model):
+        """The request ``build`` would send with the current summary; no model calls."""
+        head = [{"role": "system", "content": system_prompt}]
+        if self.summary:
+            head.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        recent = list(messages[self.summarized:])
+
+        # Hard cap: drop the oldest verbatim turns, always keeping the latest
+        budget = token_budget(model)
+        while len(recent) > 1 and count_tokens(head + recent) > budget:
+            recent.pop(0)
+        return head + recent
@@ -0,0 +1,13 @@
+"""UI-free interview engine: sessions, turns and feedback.
+
+    from engine import get_engine
+
+    session = get_engine(api_key).new_session(role="Computer Science & Technology")
+    turn = session.turn(text="Give me a SQL question")
+    for delta in turn.deltas():
+        print(delta, end="")
+    turn.result()
+"""
+from engine.core import InterviewEngine, InterviewSession, SessionTurn, get_engine
+
+__all__ = ["InterviewEngine", "InterviewSession", "SessionTurn", "get_engine"]
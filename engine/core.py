@@ -0,0 +1,497 @@
+"""Interview sessions without a UI.
+
+``InterviewEngine`` holds the process-wide pieces (clients, orchestrator,
+history store). ``InterviewSession`` holds everything one practice session
+used to keep in ``st.session_state``: the transcript, context window, answer
+scores, pending prefetch and history bookkeeping. The Streamlit page, the
+HTTP/websocket server and the benchmark all drive the same calls.
+
+With a shared state backend (see shared_state.py) each session is saved
+after every change. Any worker can then resume it, so several workers can
+serve one pool of users without sticky sessions.
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+from functools import partial
+
+from audio_engine import SpeechPipeline
+from audio_preprocess import audio_stats
+from config import DOMAIN_CONTEXTS, EXPERIENCE_LEVELS, HISTORY_CONFIG, SHARED_STATE_CONFIG
+from context_window import ContextWindow
+from feedback import get_feedback
+from history_store import get_history_store
+from model_router import Route, route_name
+from orchestrator import get_orchestrator
+from prefetch import prefetch_enabled, prefetch_stats
+from prompts import INTERVIEW_TYPES, get_system_prompt
+from question_bank import QuestionPlan, bank_enabled, bank_stats
+from response_cache import cache_enabled, get_response_cache
+from scoring import AnswerScorer
+from session_store import SessionTranscript
+from shared_state import get_shared_backend
+
+MODES = ("chat", "mock_interview")
+
+
+def _check_setup(role, mode, interview_type, level):
+    if role not in DOMAIN_CONTEXTS:
+        raise ValueError(f"unknown domain: {role}")
+    if mode not in MODES:
+        raise ValueError(f"unknown practice mode: {mode}")
+    if interview_type not in INTERVIEW_TYPES:
+        raise ValueError(f"unknown interview type: {interview_type}")
+    if level is not None and level not in EXPERIENCE_LEVELS:
+        raise ValueError(f"unknown experience level: {level}")
+
+
+def _is_answer(text):
+    return isinstance(text, str) and bool(text.strip())
+
+
+class SessionTurn:
+    """One in-flight turn of a session.
+
+    Call ``user_text()`` (typed text or the transcript), iterate ``deltas()``,
+    then ``result()``; the session's transcript, scores and history are
+    updated along the way, so the caller only renders.
+    """
+
+    def __init__(self, session, turn, system_prompt, speech, transcriber=None):
+        self.session = session
+        self.turn = turn
+        self.system_prompt = system_prompt
+        self.speech = speech
+        self.transcriber = transcriber  # live audio only (see InterviewSession.listen)
+        self._user_text = None
+        self._reply = None
+
+    def user_text(self, timeout=None):
+        if self._user_text is None:
+            self._user_text = self.turn.user_text(timeout)
+            self.session._accept_answer(self._user_text)
+        return self._user_text
+
+    def deltas(self):
+        self.user_text()
+        return self.turn.deltas()
+
+    def result(self, timeout=None):
+        self.user_text(timeout)
+        if self._reply is None:
+            self._reply = self.turn.result(timeout)
+            self.session._accept_reply(self, self._reply)
+        return self._reply
+
+    # Async variants, for callers running their own event loop
+
+    async def auser_text(self):
+        if self._user_text is None:
+            text = await asyncio.wrap_future(self.turn.user_future)
+            if self._user_text is None:
+                self._user_text = text
+                # Spills and scoring touch SQLite; keep them off the caller's loop
+                await asyncio.to_thread(self.session._accept_answer, text)
+        return self._user_text
+
+    async def adeltas(self):
+        await self.auser_text()
+        async for delta in self.turn.adeltas():
+            yield delta
+
+    async def aresult(self):
+        await self.auser_text()
+        await asyncio.wrap_future(self.turn.done)
+        if self._reply is None:
+            self._reply = self.turn.text
+            # History and shared state writes
+            await asyncio.to_thread(self.session._accept_reply, self, self._reply)
+        return self._reply
+
+    # Live audio, for turns started with ``InterviewSession.listen``
+
+    def feed_audio(self, pcm):
+        """16-bit little-endian mono PCM at the rate given to ``listen``."""
+        self.transcriber.feed_pcm16(pcm)
+
+    def end_audio(self):
+        self.transcriber.finish()
+
+    def cancel_audio(self):
+        self.transcriber.cancel()
+
+    @property
+    def partial_text(self):
+        """Transcript of the chunks finished so far."""
+        return self.transcriber.partial() if self.transcriber is not None else None
+
+    @property
+    def ttft(self):
+        return self.turn.ttft
+
+    @property
+    def total_time(self):
+        return self.turn.total_time
+
+    @property
+    def audio(self):
+        """Upload report source for a recorded answer (PreparedAudio), else None."""
+        return self.turn.audio
+
+    @property
+    def trace(self):
+        """Stage timings of this turn (see tracing.py); the caller may add its own."""
+        return self.turn.trace
+
+
+class InterviewSession:
+    def __init__(self, engine, user_id=None, role=None, mode="chat", interview_type="general", level=None,
+                 session_id=None):
+        self.engine = engine
+        self.id = session_id or uuid.uuid4().hex
+        self.user_id = user_id or HISTORY_CONFIG["default_user"]
+        self.role = role or next(iter(DOMAIN_CONTEXTS))
+        self.mode = mode
+        self.interview_type = interview_type
+        self.level = level
+        _check_setup(self.role, self.mode, self.interview_type, self.level)
+        self.messages = SessionTranscript(self.id)
+        self.last_active = time.monotonic()
+        self.version = 0  # saves so far, across workers
+        self._reset()
+
+    def _reset(self):
+        self.context = ContextWindow()
+        self.scorer = AnswerScorer()
+        self.feedback_cache = {}
+        self.prefetch = None
+        self.questions = QuestionPlan(self.id)
+        self.answer_count = 0
+        self.last_ttft = None
+        self.last_route = None
+        self.history_session = None
+
+    def configure(self, role=None, mode=None, interview_type=None, level=None):
+        """Change the practice setup; takes effect from the next turn.
+
+        ``level`` is always applied; None means any experience level.
+        """
+        before = (self.role, self.mode, self.interview_type, self.level)
+        setup = (
+            self.role if role is None else role,
+            self.mode if mode is None else mode,
+            self.interview_type if interview_type is None else interview_type,
+            level
+        )
+        _check_setup(*setup)
+        self.role, self.mode, self.interview_type, self.level = setup
+        if setup != before:
+            self.engine.save_session(self)
+
+    @property
+    def system_prompt(self):
+        return get_system_prompt(self.role, self.mode, self.interview_type, self.level)
+
+    @property
+    def route(self):
+        """The model route of this session's replies (see model_router.py)."""
+        return route_name(self.mode, self.interview_type)
+
+    def turn(self, text=None, audio_bytes=None, speech=None, stream=True, transcriber=None):
+        """Start a turn for typed ``text`` or recorded ``audio_bytes``.
+
+        ``speech`` (a SpeechPipeline) is fed the reply as it streams.
+        """
+        if transcriber is None and audio_bytes is None and not _is_answer(text):
+            raise ValueError("send text or audio")
+        self.last_active = time.monotonic()
+        system_prompt = self.system_prompt
+        turn = self.engine.orchestrator.run_turn(
+            system_prompt,
+            self.messages,
+            self.context,
+            text=text,
+            audio_bytes=audio_bytes,
+            speech=speech,
+            stream=stream,
+            prefetch=self.take_prefetch(system_prompt),
+            cache_scope=(self.role, self.mode, self.level) if cache_enabled(self.mode) else None,
+            transcriber=transcriber,
+            session_id=self.id,
+            planner=partial(self.questions.decide, self.role, self.interview_type, self.level)
+            if bank_enabled(self.mode, self.interview_type) else None,
+            route=self.route
+        )
+        return SessionTurn(self, turn, system_prompt, speech, transcriber)
+
+    def listen(self, rate=None, on_partial=None, speech=None, stream=True):
+        """Start a turn whose answer is still being spoken.
+
+        Feed PCM with ``feed_audio`` as it is recorded and call ``end_audio``
+        when the candidate stops; chunks are transcribed meanwhile, so only
+        the last one is left to wait for. ``on_partial(text)`` is called (on
+        the orchestrator's loop) whenever the running transcript grows.
+        """
+        transcriber = self.engine.orchestrator.open_transcriber(
+            rate=rate, on_partial=on_partial, session_id=self.id
+        )
+        return self.turn(speech=speech, stream=stream, transcriber=transcriber)
+
+    def _accept_answer(self, text):
+        if not _is_answer(text):
+            # Never let a bad answer into the transcript; later turns would all fail
+            raise ValueError("empty answer")
+        if self.mode == "mock_interview":
+            # Score the answer in the background while the next question streams
+            last = self.messages[-1] if len(self.messages) else None
+            question = last["content"] if last and last["role"] == "assistant" else None
+            self.scorer.submit(
+                question,
+                text,
+                self.engine.orchestrator.score_answer(question, text, self.role, self.interview_type, self.id)
+            )
+        self.messages.append({"role": "user", "content": text})
+
+    def _accept_reply(self, session_turn, reply):
+        self.messages.append({"role": "assistant", "content": reply})
+        self.answer_count += 1
+        self.last_ttft = session_turn.ttft
+        self.last_route = session_turn.turn.route
+        if session_turn.turn.step is not None:
+            self.questions.commit(session_turn.turn.step)
+        self._record_history(session_turn.user_text(), reply, session_turn.total_time)
+        self.engine.save_session(self)
+        # Voiced sessions also get the drafted question's audio rendered ahead
+        speech = session_turn.speech
+        self.prefetch_next(
+            SpeechPipeline(speech.lang, speech.tld, speech.synthesize_fn, speech.executor)
+            if speech is not None else None
+        )
+
+    def _record_history(self, user_text, reply, latency):
+        history = self.engine.history
+        if history is None:
+            return
+        if self.history_session is None:
+            self.history_session = history.start_session(
+                self.user_id, self.role, self.mode,
+                self.interview_type if self.mode == "mock_interview" else None
+            )
+        seq = len(self.messages)
+        history.record_turn(self.user_id, self.history_session, seq - 2, "user", user_text)
+        history.record_turn(self.user_id, self.history_session, seq - 1, "assistant", reply, latency)
+
+    def prefetch_next(self, speech=None):
+        """Get the next question ready while the candidate answers.
+
+        With the question bank on, that means rendering the audio of the bank
+        question a complete answer would get. Otherwise an LLM drafts one, if
+        the prefetch is enabled.
+        """
+        if bank_enabled(self.mode, self.interview_type):
+            step = self.questions.upcoming(self.role, self.interview_type, self.level)
+            if step is not None and speech is not None:
+                speech.feed(step.lead_in)
+                speech.flush()
+                speech.feed(step.text)
+                speech.close()
+            return
+        if self.mode == "mock_interview" and prefetch_enabled(self.interview_type):
+            self.prefetch = self.engine.orchestrator.prefetch_question(
+                self.system_prompt, self.messages, self.context, speech=speech, session_id=self.id,
+                route=self.route
+            )
+
+    def take_prefetch(self, system_prompt=None):
+        # A draft is only valid for the settings it was made under
+        prefetch, self.prefetch = self.prefetch, None
+        if prefetch is not None and prefetch.system_prompt != system_prompt:
+            prefetch_stats.record_discard(prefetch)
+            return None
+        return prefetch
+
+    def end_interview(self):
+        """Stop drafting questions; feedback is next."""
+        self.take_prefetch()
+
+    def feedback(self, speech=None):
+        """Blocking: ``(feedback, fresh)`` for the interview so far."""
+        feedback, fresh = get_feedback(
+            self.messages,
+            self.role,
+            self.interview_type,
+            self.feedback_cache,
+            # On a miss, aggregate the answer scores and voice the synthesis as it streams
+            generate=lambda messages, role, interview_type: self.engine.orchestrator.generate_feedback(
+                messages, self.scorer, role, interview_type, speech=speech, session_id=self.id
+            )
+        )
+        history = self.engine.history
+        if fresh and history is not None and self.history_session is not None:
+            history.record_feedback(self.user_id, self.history_session, feedback)
+        return feedback, fresh
+
+    def reset(self):
+        """Start over (the "New Session" button)."""
+        self.take_prefetch()
+        if self.engine.history is not None and self.history_session is not None:
+            self.engine.history.end_session(self.history_session)
+        self.messages.clear()
+        self._reset()
+        self.engine.save_session(self)
+
+    def snapshot(self):
+        """Plain-data state for another worker to resume from.
+
+        Pending prefetches and background scores aren't included; a resumed
+        session scores its answers again when feedback is asked for.
+        """
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "role": self.role,
+            "mode": self.mode,
+            "interview_type": self.interview_type,
+            "level": self.level,
+            "messages": self.messages.to_dict(),
+            "summary": self.context.summary,
+            "summarized": self.context.summarized,
+            "answer_count": self.answer_count,
+            "last_ttft": self.last_ttft,
+            "last_route": self.last_route._asdict() if self.last_route is not None else None,
+            "history_session": self.history_session,
+            "questions": self.questions.to_dict(),
+            "version": self.version,
+        }
+
+    @classmethod
+    def restore(cls, engine, data):
+        session = cls(engine, data["user_id"], data["role"], data["mode"], data["interview_type"],
+                      data["level"], session_id=data["id"])
+        session.messages = SessionTranscript.from_dict(data["messages"], engine.backend)
+        session.context.summary = data["summary"]
+        session.context.summarized = data["summarized"]
+        session.answer_count = data["answer_count"]
+        session.last_ttft = data["last_ttft"]
+        session.last_route = Route(**data["last_route"]) if data["last_route"] is not None else None
+        session.history_session = data["history_session"]
+        session.questions = QuestionPlan.from_dict(session.id, data["questions"])
+        session.version = data["version"]
+        return session
+
+    def stats(self):
+        stats = {
+            "answer_count": self.answer_count,
+            "last_ttft": self.last_ttft,
+            "tokens_sent": self.context.last_request_tokens,
+        }
+        if self.last_route is not None:
+            stats["model"] = self.last_route._asdict()
+        if bank_enabled(self.mode, self.interview_type):
+            stats["question_bank"] = bank_stats.snapshot()
+        elif self.mode == "mock_interview" and prefetch_enabled(self.interview_type):
+            stats["prefetch"] = prefetch_stats.snapshot()
+        if cache_enabled(self.mode):
+            stats["response_cache"] = get_response_cache().stats()
+        if audio_stats.utterances:
+            stats["audio"] = audio_stats.snapshot()
+        scheduler = self.engine.scheduler_stats(self.id)
+        if scheduler is not None:
+            stats["scheduler"] = scheduler
+        return stats
+
+
+class InterviewEngine:
+    """Process-wide entry point; cheap to share across sessions and threads."""
+
+    def __init__(self, api_key, base_url=None, history=None, backend=None):
+        """``history`` is a HistoryStore, or False to record nothing; by
+        default the shared store is used when HISTORY_CONFIG enables it.
+        ``backend`` defaults to the process's shared state backend."""
+        self.api_key = api_key
+        self.base_url = base_url
+        self._orchestrator = None
+        if history is None and HISTORY_CONFIG["enabled"]:
+            history = get_history_store()
+        self.history = history or None
+        self.backend = backend or get_shared_backend()
+
+    @property
+    def orchestrator(self):
+        # Created on first use: building the clients imports ``openai``
+        if self._orchestrator is None:
+            self._orchestrator = get_orchestrator(self.api_key, self.base_url)
+        return self._orchestrator
+
+    def warm_up(self):
+        """Build the clients in the background so the first turn doesn't wait."""
+        threading.Thread(target=lambda: self.orchestrator, name="engine-warm-up", daemon=True).start()
+
+    def scheduler_stats(self, session_id=None):
+        """Queue and refusal counts, for one session or the whole process;
+        None before the first API call."""
+        if self._orchestrator is None:
+            return None
+        scheduler = self._orchestrator.scheduler
+        return scheduler.session_snapshot(session_id) if session_id else scheduler.snapshot()
+
+    def new_session(self, save=True, **kwargs):
+        """A new session; ValueError for an unknown setup. With ``save`` False the
+        caller saves it once it is accepted."""
+        session = InterviewSession(self, **kwargs)
+        if save:
+            self.save_session(session)
+        return session
+
+    def save_session(self, session):
+        # Only worth the copy when another worker could pick the session up
+        if self.backend.shared:
+            session.version += 1
+            ttl = SHARED_STATE_CONFIG["session_ttl"]
+            session.messages.publish(self.backend, ttl)
+            self.backend.set("session:" + session.id, json.dumps(session.snapshot()).encode("utf-8"), ttl)
+            self.backend.set("session-version:" + session.id, str(session.version).encode(), ttl)
+
+    def load_session(self, session_id, current=None):
+        """The latest saved state of a session, from whichever worker saved it.
+
+        Returns ``current`` when it is already up to date (one small read),
+        and None for a session that was deleted or never saved.
+        """
+        if not self.backend.shared:
+            return current
+        if current is not None:
+            version = self.backend.get("session-version:" + session_id)
+            if version is None:
+                return None
+            if int(version) <= current.version:
+                return current
+        data = self.backend.get("session:" + session_id)
+        if data is None:
+            return None
+        try:
+            return InterviewSession.restore(self, json.loads(data))
+        except LookupError:
+            return None  # its spilled messages expired; as good as deleted
+
+    def drop_session(self, session_id):
+        if self.backend.shared:
+            self.backend.delete("session:" + session_id)
+            self.backend.delete("session-version:" + session_id)
+
+    def user_stats(self, user_id):
+        return self.history.user_stats(user_id) if self.history is not None else None
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(api_key, base_url=None):
+    with _engines_lock:
+        engine = _engines.get((api_key, base_url))
+        if engine is None:
+            engine = _engines[(api_key, base_url)] = InterviewEngine(api_key, base_url)
+        return engine
@@ -0,0 +1,360 @@
+"""HTTP and websocket front end for the interview engine.
+
+Serves the same sessions as the Streamlit page without any script reruns,
+for clients that want many concurrent sessions:
+
+    python -m engine.server --port 8600
+
+    POST   /sessions                 {"role", "mode", "interview_type", "level", "user_id"}
+    PATCH  /sessions/{id}            change the practice setup
+    POST   /sessions/{id}/turns      {"text": ...} or a raw audio body (audio/*)
+    POST   /sessions/{id}/feedback   end-of-interview feedback
+    DELETE /sessions/{id}
+    GET    /sessions/{id}/stats
+    GET    /stats
+    GET    /metrics                  per-stage timings and per-route model use,
+                                     Prometheus text format
+    WS     /sessions/{id}/ws         send {"type": "turn", "text": ...} or
+                                     {"type": "turn", "audio": <base64>};
+                                     receive "user", then "delta"s, then "done"
+
+Live audio over the websocket: send {"type": "audio_start", "rate": 16000},
+then {"type": "audio", "pcm": <base64 16-bit mono>} messages while the
+candidate talks, then {"type": "audio_end"}. "partial" messages carry the
+transcript so far; the reply follows as for a turn.
+
+When the shared rate limit is exhausted, turns and feedback are refused with
+503 and Retry-After (or a websocket "busy" message) instead of queueing
+without bound.
+
+Replies stream from the orchestrator's event loop without holding a thread
+per connection. With a shared state backend (SHARED_STATE_URL), several
+server processes can sit behind one load balancer and any of them can serve
+any session. Starlette and uvicorn ship with current Streamlit releases.
+"""
+import argparse
+import asyncio
+import base64
+import threading
+import time
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+from audio_preprocess import NoSpeechError, audio_stats
+from config import ENGINE_SERVER_CONFIG
+from engine.core import get_engine
+from environment import load_environment
+from model_router import route_stats
+from prefetch import prefetch_stats
+from question_bank import bank_stats
+from response_cache import get_response_cache
+from scheduler import OverloadedError
+from session_store import memory_stats
+from tracing import get_recorder
+
+
+class SessionRegistry:
+    """Live sessions by id, with idle expiry and a size cap.
+
+    With a ``loader`` (a shared state backend), a session this worker doesn't
+    hold is resumed from the backend. Idle sessions are then only unloaded,
+    since another worker may still resume them.
+    """
+
+    def __init__(self, max_sessions, idle_timeout, loader=None):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.loader = loader
+        self.sessions = {}
+        self.locks = {}  # one turn at a time per session
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        for session_id, session in list(self.sessions.items()):
+            if session.last_active < cutoff and not self.locks[session_id].locked():
+                self._drop(session_id, end=self.loader is None)
+
+    def _drop(self, session_id, end=True):
+        session = self.sessions.pop(session_id, None)
+        self.locks.pop(session_id, None)
+        if session is not None:
+            if end:
+                session.reset()
+            else:
+                session.take_prefetch()  # the saved copy stays in the backend
+
+    def _add(self, session):
+        self._expire()
+        if len(self.sessions) >= self.max_sessions:
+            return False
+        self.sessions[session.id] = session
+        self.locks[session.id] = asyncio.Lock()
+        return True
+
+    def add(self, session):
+        with self._lock:
+            return self._add(session)
+
+    def get(self, session_id):
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if self.loader is not None and (session is None or not self.locks[session_id].locked()):
+                # Started on, or since used by, another worker
+                latest = self.loader(session_id, session)
+                if latest is not session:
+                    if session is not None:
+                        self._drop(session_id, end=False)
+                    if latest is None or not self._add(latest):
+                        return None, None
+                    session = latest
+            return (session, self.locks[session_id]) if session is not None else (None, None)
+
+    def remove(self, session_id):
+        with self._lock:
+            self._drop(session_id)
+
+    def __len__(self):
+        return len(self.sessions)
+
+
+def _error(status, message):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+def _busy(error):
+    # Load shed by the scheduler: tell the client when to come back
+    return JSONResponse(
+        {"error": str(error), "retry_after": error.retry_after}, status_code=503,
+        headers={"retry-after": str(max(1, round(error.retry_after)))}
+    )
+
+
+def create_app(engine, registry=None):
+    if registry is None:  # an empty registry is falsy
+        registry = SessionRegistry(
+            ENGINE_SERVER_CONFIG["max_sessions"], ENGINE_SERVER_CONFIG["idle_timeout"],
+            engine.load_session if engine.backend.shared else None
+        )
+
+    # Sessions, history and the shared backend are SQLite or network I/O, so
+    # anything that may touch them runs in the thread pool, not on the loop
+    async def lookup(request):
+        return await run_in_threadpool(registry.get, request.path_params["session_id"])
+
+    async def create_session(request):
+        body = await request.json() if await request.body() else {}
+        setup = {key: body[key] for key in ("role", "mode", "interview_type", "level") if body.get(key) is not None}
+        try:
+            session = engine.new_session(save=False, user_id=body.get("user_id"), **setup)
+        except ValueError as e:
+            return _error(400, str(e))
+        if not await run_in_threadpool(registry.add, session):
+            return _error(503, "too many sessions")
+        await run_in_threadpool(engine.save_session, session)
+        return JSONResponse({"session_id": session.id, "system_prompt": session.system_prompt}, status_code=201)
+
+    async def configure_session(request):
+        session, _ = await lookup(request)
+        if session is None:
+            return _error(404, "no such session")
+        body = await request.json()
+        try:
+            await run_in_threadpool(session.configure, body.get("role"), body.get("mode"), body.get("interview_type"),
+                                    body.get("level", session.level))
+        except ValueError as e:
+            return _error(400, str(e))
+        return JSONResponse({"session_id": session.id})
+
+    async def delete_session(request):
+        await run_in_threadpool(registry.remove, request.path_params["session_id"])
+        await run_in_threadpool(engine.drop_session, request.path_params["session_id"])
+        return Response(status_code=204)
+
+    async def post_turn(request):
+        session, lock = await lookup(request)
+        if session is None:
+            return _error(404, "no such session")
+        if request.headers.get("content-type", "").startswith("audio/"):
+            text, audio_bytes = None, await request.body()
+        else:
+            text, audio_bytes = (await request.json()).get("text"), None
+        if not text and not audio_bytes:
+            return _error(400, "send text or audio")
+        async with lock:
+            try:
+                # Starting a turn copies the unsummarized transcript, which may be spilled to disk
+                turn = await run_in_threadpool(session.turn, text=text, audio_bytes=audio_bytes)
+            except ValueError as e:
+                return _error(400, str(e))
+            try:
+                user_text = await turn.auser_text()
+                reply = await turn.aresult()
+            except NoSpeechError as e:
+                return _error(422, str(e))
+            except OverloadedError as e:
+                return _busy(e)
+            except Exception as e:
+                return _error(502, f"turn failed: {e}")
+        return JSONResponse({"user_text": user_text, "reply": reply, "ttft": turn.ttft,
+                             "total_time": turn.total_time,
+                             "audio": turn.audio.report() if turn.audio is not None else None})
+
+    async def post_feedback(request):
+        session, lock = await lookup(request)
+        if session is None:
+            return _error(404, "no such session")
+        if session.mode != "mock_interview" or not session.answer_count:
+            return _error(409, "feedback needs a mock interview with at least one answer")
+        async with lock:
+            session.end_interview()
+            try:
+                feedback, _ = await asyncio.to_thread(session.feedback)
+            except OverloadedError as e:
+                return _busy(e)
+        return JSONResponse({"feedback": feedback})
+
+    async def session_stats(request):
+        session, _ = await lookup(request)
+        if session is None:
+            return _error(404, "no such session")
+        return JSONResponse(session.stats())
+
+    async def server_stats(request):
+        return JSONResponse({
+            "sessions": len(registry),
+            "memory": memory_stats(),
+            "prefetch": prefetch_stats.snapshot(),
+            "question_bank": bank_stats.snapshot(),
+            "response_cache": get_response_cache().stats(),
+            "audio": audio_stats.snapshot(),
+            "scheduler": engine.scheduler_stats(),
+            "models": route_stats.snapshot(),
+            "stages": get_recorder().snapshot(),
+        })
+
+    async def metrics(request):
+        return Response(get_recorder().prometheus() + route_stats.prometheus(),
+                        media_type="text/plain; version=0.0.4")
+
+    async def session_socket(websocket):
+        session, lock = await run_in_threadpool(registry.get, websocket.path_params["session_id"])
+        if session is None:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        try:
+            while True:
+                message = await websocket.receive_json()
+                if message.get("type") == "feedback":
+                    async with lock:
+                        session.end_interview()
+                        try:
+                            feedback, _ = await asyncio.to_thread(session.feedback)
+                        except OverloadedError as e:
+                            await websocket.send_json(busy_message(e))
+                            continue
+                    await websocket.send_json({"type": "feedback", "text": feedback})
+                    continue
+                if message.get("type") == "audio_start":
+                    async with lock:
+                        turn = await run_in_threadpool(
+                            session.listen, rate=message.get("rate"), on_partial=send_partial(websocket)
+                        )
+                        try:
+                            await receive_audio(websocket, turn)
+                        except WebSocketDisconnect:
+                            turn.cancel_audio()
+                            raise
+                        await stream_reply(websocket, turn)
+                    continue
+                if message.get("type") != "turn":
+                    await websocket.send_json({"type": "error", "error": "unknown message type"})
+                    continue
+                text, audio = message.get("text"), message.get("audio")
+                if not text and not audio:
+                    await websocket.send_json({"type": "error", "error": "send text or audio"})
+                    continue
+                async with lock:
+                    try:
+                        turn = await run_in_threadpool(
+                            session.turn, text=text, audio_bytes=base64.b64decode(audio) if audio else None
+                        )
+                    except ValueError as e:
+                        await websocket.send_json({"type": "error", "error": str(e)})
+                        continue
+                    await stream_reply(websocket, turn)
+        except WebSocketDisconnect:
+            pass
+
+    def send_partial(websocket):
+        # Called on the orchestrator's loop; the socket belongs to this one
+        loop = asyncio.get_running_loop()
+
+        def on_partial(text):
+            asyncio.run_coroutine_threadsafe(websocket.send_json({"type": "partial", "text": text}), loop)
+        return on_partial
+
+    async def receive_audio(websocket, turn):
+        while True:
+            message = await websocket.receive_json()
+            if message.get("type") == "audio":
+                turn.feed_audio(base64.b64decode(message["pcm"]))
+            elif message.get("type") == "audio_end":
+                turn.end_audio()
+                return
+            else:
+                await websocket.send_json({"type": "error", "error": "expected audio or audio_end"})
+
+    def busy_message(error):
+        return {"type": "busy", "error": str(error), "retry_after": error.retry_after}
+
+    async def stream_reply(websocket, turn):
+        try:
+            await websocket.send_json({"type": "user", "text": await turn.auser_text()})
+            async for delta in turn.adeltas():
+                await websocket.send_json({"type": "delta", "text": delta})
+            reply = await turn.aresult()
+        except WebSocketDisconnect:
+            raise
+        except OverloadedError as e:
+            await websocket.send_json(busy_message(e))
+            return
+        except Exception as e:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            return
+        await websocket.send_json({"type": "done", "text": reply, "ttft": turn.ttft})
+
+    return Starlette(routes=[
+        Route("/sessions", create_session, methods=["POST"]),
+        Route("/sessions/{session_id}", configure_session, methods=["PATCH"]),
+        Route("/sessions/{session_id}", delete_session, methods=["DELETE"]),
+        Route("/sessions/{session_id}/turns", post_turn, methods=["POST"]),
+        Route("/sessions/{session_id}/feedback", post_feedback, methods=["POST"]),
+        Route("/sessions/{session_id}/stats", session_stats),
+        Route("/stats", server_stats),
+        Route("/metrics", metrics),
+        WebSocketRoute("/sessions/{session_id}/ws", session_socket),
+    ])
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Interview engine HTTP/websocket server")
+    parser.add_argument("--host", default=ENGINE_SERVER_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=ENGINE_SERVER_CONFIG["port"])
+    args = parser.parse_args(argv)
+
+    api_key = load_environment().api_key
+    if not api_key:
+        parser.error("GROQ_API_KEY is not set")
+    uvicorn.run(create_app(get_engine(api_key)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""One-time discovery of the .env file and API key.
+
+Streamlit re-executes ``app.py`` on every interaction, and the page used to
+probe five candidate ``.env`` paths and reload the file each time. Imported
+modules survive reruns, so resolving here happens once per process; the page
+just reads the cached result.
+"""
+import os
+import threading
+
+from dotenv import load_dotenv
+
+
+class Environment:
+    def __init__(self, api_key, env_file, checked_paths, script_dir):
+        self.api_key = api_key
+        self.env_file = env_file  # the .env that supplied the key, if any
+        self.checked_paths = checked_paths
+        self.script_dir = script_dir
+
+
+def candidate_paths(script_dir):
+    cwd = os.getcwd()
+    paths = [os.path.join(script_dir, ".env")] if script_dir else []
+    paths.extend([
+        os.path.join(cwd, ".env"),
+        ".env",
+        os.path.join(os.path.dirname(cwd), ".env"),
+        os.path.join(os.path.dirname(cwd), "Interview-practice-partner-main", ".env"),
+    ])
+    return paths
+
+
+def discover(script_dir=None):
+    script_dir = script_dir or os.path.dirname(os.path.abspath(__file__))
+    paths = candidate_paths(script_dir)
+    api_key = None
+    env_file = None
+    for path in paths:
+        abs_path = os.path.abspath(path)
+        if os.path.isfile(abs_path):
+            load_dotenv(dotenv_path=abs_path, override=True)
+            api_key = os.getenv("GROQ_API_KEY")
+            if api_key:
+                env_file = abs_path
+                break
+
+    # If still not found, try default load_dotenv()
+    if not api_key:
+        load_dotenv(override=True)
+        api_key = os.getenv("GROQ_API_KEY")
+    return Environment(api_key, env_file, paths, script_dir)
+
+
+_environment = None
+_environment_lock = threading.Lock()
+
+
+def load_environment(reload=False):
+    """The resolved environment, discovered on first call.
+
+    Without a key the lookup is repeated on every call, so creating the
+    .env file doesn't need a restart.
+    """
+    global _environment
+    with _environment_lock:
+        if _environment is None or reload or not _environment.api_key:
+            _environment = discover()
+        return _environment
@@ -0,0 +1,164 @@
+"""Interview feedback, memoized per conversation.
+
+Feedback is built from the per-answer scores in scoring.py: the rating and
+breakdown are a local weighted aggregate, and the LLM only writes a short
+synthesis over the scores. Results are keyed by a fingerprint of the
+transcript, role and interview type, so Streamlit reruns after "End
+Interview" reuse the stored result instead of calling the LLM again. Only a
+change to the transcript triggers regeneration. With a shared state
+backend, results are shared by all workers.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from config import ASSESSMENT_CRITERIA, FEEDBACK_CONFIG
+from scoring import criterion_label
+from shared_state import get_shared_backend
+
+FEEDBACK_SYSTEM_PROMPT = "You are an experienced, honest interviewer providing realistic feedback based on actual interview performance."
+
+NO_SCORE = "**Overall Performance Rating:** no score (none of the answers could be scored)"
+
+
+def conversation_fingerprint(messages, role, interview_type):
+    payload = json.dumps(
+        {
+            "messages": [[m["role"], m["content"]] for m in messages],
+            "role": role,
+            "interview_type": interview_type,
+        },
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def synthesis_messages(summary, role, interview_type):
+    criteria = "\n".join(
+        f"- {criterion_label(c)}: {v:.1f}/10" for c, v in summary["criteria"].items()
+    )
+    strengths = "\n".join(f"- {s}" for s in summary["strengths"]) or "- None noted"
+    improvements = "\n".join(f"- {s}" for s in summary["improvements"]) or "- None noted"
+    prompt = f"""
+You are giving honest, constructive feedback on a {interview_type} interview for a {role} position.
+The candidate gave {summary["answers"]} answer(s). Each answer was scored per criterion; averages:
+{criteria}
+
+Strengths noted while scoring:
+{strengths}
+
+Gaps noted while scoring:
+{improvements}
+
+Write the feedback in this format, based ONLY on the scores and notes above:
+
+**Strengths (only if actually demonstrated):**
+- [If none were noted, say "No clear strengths were demonstrated in this interview."]
+
+**Areas for Improvement:**
+- [Specific, based on the gaps and the lowest-scoring criteria]
+
+**Recommendations:**
+- [Specific, actionable advice]
+
+Do not give an overall rating. Keep it under {FEEDBACK_CONFIG["synthesis_max_words"]} words.
+"""
+    return [
+        {"role": "system", "content": FEEDBACK_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def rating_header(summary):
+    """Rating and score breakdown, computed locally from the scores."""
+    if summary["rating"] is None:
+        return NO_SCORE + "\n\n"
+    lines = [f"**Overall Performance Rating:** {summary['rating']}/10", "", "**Score Breakdown:**"]
+    for criterion, value in summary["criteria"].items():
+        lines.append(f"- {criterion_label(criterion)}: {value:.1f}/10 (weight {ASSESSMENT_CRITERIA[criterion]}%)")
+    return "\n".join(lines) + "\n\n"
+
+
+def compose_feedback(summary, synthesis):
+    return rating_header(summary) + synthesis.strip()
+
+
+class SharedFeedbackCache:
+    """Bounded, thread-safe cache shared by every session in the process."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class BackendFeedbackCache:
+    """The same interface over the shared state backend, for several workers."""
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.backend.get("feedback:" + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key, value):
+        self.backend.set("feedback:" + key, value.encode("utf-8"), self.ttl)
+
+
+_shared_cache = None
+
+
+def get_shared_cache():
+    global _shared_cache
+    if _shared_cache is None and FEEDBACK_CONFIG["shared_cache"]:
+        backend = get_shared_backend()
+        if backend.shared:
+            _shared_cache = BackendFeedbackCache(backend, FEEDBACK_CONFIG["shared_cache_ttl"])
+        else:
+            _shared_cache = SharedFeedbackCache(FEEDBACK_CONFIG["shared_cache_size"])
+    return _shared_cache
+
+
+def get_feedback(messages, role, interview_type, session_cache, generate, backend=None):
+    """Return (feedback, fresh); ``fresh`` is False when served from cache.
+
+    ``session_cache`` is a plain dict kept in ``st.session_state``; ``backend``
+    is any object with ``get``/``set`` and defaults to the process-wide cache.
+    ``generate(messages, role, interview_type)`` produces feedback on a miss.
+    """
+    backend = backend if backend is not None else get_shared_cache()
+    key = conversation_fingerprint(messages, role, interview_type)
+
+    feedback = session_cache.get(key)
+    if feedback is None and backend is not None:
+        feedback = backend.get(key)
+        if feedback is not None:
+            session_cache[key] = feedback
+    if feedback is not None:
+        return feedback, False
+
+    feedback = generate(messages, role, interview_type)
+    if feedback.startswith(NO_SCORE):
+        return feedback, True  # scoring failed; asking again should retry it
+    session_cache[key] = feedback
+    if backend is not None:
+        backend.set(key, feedback)
+    return feedback, True
@@ -0,0 +1,223 @@
+"""Durable interview history with precomputed per-user stats.
+
+Sessions, turns and feedback ratings are recorded in an indexed SQLite file
+that outlives "New Session" and server restarts. Every write also updates
+small aggregate rows in the same transaction (totals per user, sessions per
+domain, rating trend, answer length), so the sidebar reads a handful of
+precomputed numbers instead of rescanning transcripts on every rerun.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from config import HISTORY_CONFIG
+
+RATING = re.compile(r"(\d+(?:\.\d+)?)\s*/\s*10")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    interview_type TEXT,
+    started REAL NOT NULL,
+    ended REAL,
+    answers INTEGER NOT NULL DEFAULT 0,
+    rating REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_user ON sessions (user_id, started);
+CREATE INDEX IF NOT EXISTS sessions_by_domain ON sessions (user_id, domain);
+
+CREATE TABLE IF NOT EXISTS turns (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    latency REAL,
+    created REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    rating REAL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL
+);
+-- One row per session; older files may hold several, keep the latest
+DROP INDEX IF EXISTS feedback_by_session;
+DELETE FROM feedback WHERE rowid NOT IN (SELECT MAX(rowid) FROM feedback GROUP BY session_id);
+CREATE UNIQUE INDEX IF NOT EXISTS feedback_per_session ON feedback (session_id);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    answers INTEGER NOT NULL DEFAULT 0,
+    answer_chars INTEGER NOT NULL DEFAULT 0,
+    reply_latency_sum REAL NOT NULL DEFAULT 0,
+    replies INTEGER NOT NULL DEFAULT 0,
+    ratings INTEGER NOT NULL DEFAULT 0,
+    rating_sum REAL NOT NULL DEFAULT 0,
+    last_rating REAL,
+    rating_trend REAL
+);
+
+CREATE TABLE IF NOT EXISTS domain_stats (
+    user_id TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, domain)
+);
+"""
+
+
+def parse_rating(feedback):
+    match = RATING.search(feedback)
+    return float(match.group(1)) if match else None
+
+
+class HistoryStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+
+    def _write(self, statements):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                result = None
+                for sql, params in statements:
+                    cursor = self.db.execute(sql, params)
+                    if result is None:
+                        result = cursor.lastrowid
+                self.db.execute("COMMIT")
+                return result
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def start_session(self, user_id, domain, mode, interview_type=None):
+        return self._write([
+            ("INSERT INTO sessions (user_id, domain, mode, interview_type, started) VALUES (?, ?, ?, ?, ?)",
+             (user_id, domain, mode, interview_type, time.time())),
+            ("INSERT INTO user_stats (user_id, sessions) VALUES (?, 1) "
+             "ON CONFLICT (user_id) DO UPDATE SET sessions = sessions + 1", (user_id,)),
+            ("INSERT INTO domain_stats (user_id, domain, sessions) VALUES (?, ?, 1) "
+             "ON CONFLICT (user_id, domain) DO UPDATE SET sessions = sessions + 1", (user_id, domain)),
+        ])
+
+    def record_turn(self, user_id, session_id, seq, role, content, latency=None):
+        statements = [
+            ("INSERT OR REPLACE INTO turns VALUES (?, ?, ?, ?, ?, ?)",
+             (session_id, seq, role, content, latency, time.time())),
+        ]
+        if role == "user":
+            statements += [
+                ("UPDATE sessions SET answers = answers + 1 WHERE id = ?", (session_id,)),
+                ("UPDATE user_stats SET answers = answers + 1, answer_chars = answer_chars + ? "
+                 "WHERE user_id = ?", (len(content), user_id)),
+            ]
+        elif latency is not None:
+            statements.append(
+                ("UPDATE user_stats SET replies = replies + 1, reply_latency_sum = reply_latency_sum + ? "
+                 "WHERE user_id = ?", (latency, user_id))
+            )
+        self._write(statements)
+
+    def record_feedback(self, user_id, session_id, feedback, rating=None):
+        """Feedback for a session, replacing any earlier feedback (and its
+        rating) for the same session; unrated feedback never replaces rated."""
+        rating = parse_rating(feedback) if rating is None else rating
+        statements = []
+        if rating is not None:
+            previous = "(SELECT rating FROM feedback WHERE session_id = ?)"
+            statements += [
+                # Trend: change versus the latest rating of another session
+                ("UPDATE user_stats SET ratings = ratings + (" + previous + " IS NULL), "
+                 "rating_sum = rating_sum + ? - COALESCE(" + previous + ", 0), "
+                 "rating_trend = ? - (SELECT rating FROM sessions WHERE user_id = ? AND id != ? "
+                 "AND rating IS NOT NULL ORDER BY started DESC LIMIT 1), "
+                 "last_rating = ? WHERE user_id = ?",
+                 (session_id, rating, session_id, rating, user_id, session_id, rating, user_id)),
+                ("UPDATE sessions SET rating = ? WHERE id = ?", (rating, session_id)),
+            ]
+        statements.append(
+            ("INSERT INTO feedback VALUES (?, ?, ?, ?) ON CONFLICT (session_id) DO UPDATE SET "
+             "rating = excluded.rating, content = excluded.content, created = excluded.created "
+             "WHERE excluded.rating IS NOT NULL OR rating IS NULL",
+             (session_id, rating, feedback, time.time()))
+        )
+        self._write(statements)
+
+    def end_session(self, session_id):
+        self._write([("UPDATE sessions SET ended = ? WHERE id = ? AND ended IS NULL",
+                      (time.time(), session_id))])
+
+    def transcripts(self, limit=None):
+        """Recorded sessions, newest first, shaped like ``InterviewSession.snapshot()``
+        (role, mode, interview_type, level) with the messages as a plain list;
+        for offline replays."""
+        with self._lock:
+            sessions = self.db.execute(
+                "SELECT id, domain, mode, interview_type FROM sessions WHERE answers > 0 "
+                "ORDER BY started DESC LIMIT ?", (-1 if limit is None else limit,)
+            ).fetchall()
+            transcripts = []
+            for session_id, domain, mode, interview_type in sessions:
+                turns = self.db.execute(
+                    "SELECT role, content FROM turns WHERE session_id = ? ORDER BY seq", (session_id,)
+                ).fetchall()
+                transcripts.append({
+                    "role": domain, "mode": mode, "interview_type": interview_type, "level": None,
+                    "messages": [{"role": role, "content": content} for role, content in turns],
+                })
+        return transcripts
+
+    def user_stats(self, user_id):
+        """Precomputed stats for one user; a single-row read."""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT sessions, answers, answer_chars, replies, reply_latency_sum, ratings, "
+                "rating_sum, last_rating, rating_trend FROM user_stats WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+            domains = self.db.execute(
+                "SELECT domain, sessions FROM domain_stats WHERE user_id = ? ORDER BY sessions DESC",
+                (user_id,)
+            ).fetchall()
+        if row is None:
+            row = (0, 0, 0, 0, 0.0, 0, 0.0, None, None)
+        sessions, answers, chars, replies, latency_sum, ratings, rating_sum, last_rating, trend = row
+        return {
+            "sessions": sessions,
+            "answers": answers,
+            "avg_answer_chars": chars / answers if answers else 0,
+            "avg_reply_latency": latency_sum / replies if replies else None,
+            "ratings": ratings,
+            "avg_rating": rating_sum / ratings if ratings else None,
+            "last_rating": last_rating,
+            "rating_trend": trend,
+            "sessions_per_domain": dict(domains),
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = HISTORY_CONFIG["path"] or os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), "interview_history.db"
+            )
+            _store = HistoryStore(path)
+        return _store
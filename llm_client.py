@@ -0,0 +1,227 @@
+"""Process-wide LLM client.
+
+Streamlit re-executes app.py on every interaction, so the OpenAI-compatible
+client (and its keep-alive HTTP connection pool) is created once per process
+here and shared by every session. Calls go through a thin wrapper that adds
+per-call timeouts, jittered exponential backoff on 429/5xx and a concurrency
+limiter that keeps us under the provider's rate limits at peak load. The
+orchestrator's ``AsyncOpenAI`` client is wrapped the same way.
+
+``LLM_BASE_URL`` points the client at another OpenAI-compatible server, e.g.
+a local stub for tests and benchmarks.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from config import LLM_CONFIG
+
+# ``openai`` takes most of a second to import, so it is imported on first
+# client creation rather than when the page loads.
+
+
+def is_retryable(error):
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def retry_delay(error, attempt):
+    from openai import APIStatusError
+
+    # Respect the server's Retry-After when it sends one
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), LLM_CONFIG["backoff_max"])
+        except ValueError:
+            pass
+    # Full jitter: uniform over [0, min(cap, base * 2^attempt)]
+    ceiling = min(LLM_CONFIG["backoff_max"], LLM_CONFIG["backoff_base"] * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+class _GuardedStream:
+    """Holds a concurrency slot until the streamed response is finished."""
+
+    def __init__(self, stream, release):
+        self.stream = stream
+        self._release = release
+
+    def __iter__(self):
+        try:
+            yield from self.stream
+        finally:
+            self.close()
+
+    def close(self):
+        if self._release is not None:
+            self._release()
+            self._release = None
+            close = getattr(self.stream, "close", None)
+            if close:
+                close()
+
+
+class ResilientClient:
+    """Drop-in for the parts of ``OpenAI`` the app uses.
+
+    Exposes ``chat.completions.create`` and ``audio.transcriptions.create``
+    with the SDK's signatures, so callers don't change.
+    """
+
+    def __init__(self, client, max_concurrency=None, max_retries=None, sleep=time.sleep):
+        self.client = client
+        self.max_retries = LLM_CONFIG["max_retries"] if max_retries is None else max_retries
+        self.slots = threading.BoundedSemaphore(max_concurrency or LLM_CONFIG["max_concurrency"])
+        self.sleep = sleep
+        self.retries = 0
+        self.failures = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._create_transcription))
+
+    def _call(self, fn, kwargs, timeout, streaming=False):
+        kwargs.setdefault("timeout", timeout)
+        attempt = 0
+        while True:
+            self.slots.acquire()
+            try:
+                result = fn(**kwargs)
+            except Exception as e:
+                self.slots.release()
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.failures += 1
+                    raise
+                # Back off without holding a slot
+                self.retries += 1
+                self.sleep(retry_delay(e, attempt))
+                attempt += 1
+                continue
+            if streaming:
+                return _GuardedStream(result, self.slots.release)
+            self.slots.release()
+            return result
+
+    def _create_completion(self, **kwargs):
+        streaming = bool(kwargs.get("stream"))
+        timeout = LLM_CONFIG["stream_timeout"] if streaming else LLM_CONFIG["timeout"]
+        return self._call(self.client.chat.completions.create, kwargs, timeout, streaming)
+
+    def _create_transcription(self, **kwargs):
+        return self._call(
+            self.client.audio.transcriptions.create, kwargs, LLM_CONFIG["transcription_timeout"]
+        )
+
+
+class _GuardedAsyncStream:
+    """``_GuardedStream`` for an ``AsyncOpenAI`` stream."""
+
+    def __init__(self, stream, release):
+        self.stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self.stream:
+                yield chunk
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._release is not None:
+            self._release()
+            self._release = None
+            close = getattr(self.stream, "close", None)
+            if close:
+                await close()
+
+
+class AsyncResilientClient:
+    """``ResilientClient`` for an ``AsyncOpenAI`` client: the same timeouts,
+    jittered backoff (honouring Retry-After) and concurrency limit."""
+
+    def __init__(self, client, max_concurrency=None, max_retries=None, sleep=asyncio.sleep):
+        self.client = client
+        self.max_retries = LLM_CONFIG["max_retries"] if max_retries is None else max_retries
+        self.slots = asyncio.BoundedSemaphore(max_concurrency or LLM_CONFIG["max_concurrency"])
+        self.sleep = sleep
+        self.retries = 0
+        self.failures = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._create_transcription))
+
+    async def _call(self, fn, kwargs, timeout, streaming=False):
+        kwargs.setdefault("timeout", timeout)
+        attempt = 0
+        while True:
+            await self.slots.acquire()
+            try:
+                result = await fn(**kwargs)
+            except Exception as e:
+                self.slots.release()
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                await self.sleep(retry_delay(e, attempt))
+                attempt += 1
+                continue
+            if streaming:
+                return _GuardedAsyncStream(result, self.slots.release)
+            self.slots.release()
+            return result
+
+    async def _create_completion(self, **kwargs):
+        streaming = bool(kwargs.get("stream"))
+        timeout = LLM_CONFIG["stream_timeout"] if streaming else LLM_CONFIG["timeout"]
+        return await self._call(self.client.chat.completions.create, kwargs, timeout, streaming)
+
+    async def _create_transcription(self, **kwargs):
+        return await self._call(
+            self.client.audio.transcriptions.create, kwargs, LLM_CONFIG["transcription_timeout"]
+        )
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, base_url=None):
+    """Return the shared client for this key/endpoint, creating it once."""
+    base_url = base_url or os.getenv("LLM_BASE_URL") or LLM_CONFIG["base_url"]
+    key = (api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            from openai import OpenAI
+
+            # Retries are handled by ResilientClient, not the SDK
+            client = ResilientClient(OpenAI(base_url=base_url, api_key=api_key, max_retries=0))
+            _clients[key] = client
+        return client
+
+
+_async_clients = {}
+
+
+def get_async_client(api_key, base_url=None):
+    """Shared ``AsyncOpenAI`` client for the orchestrator's event loop,
+    wrapped like ``get_client``'s."""
+    base_url = base_url or os.getenv("LLM_BASE_URL") or LLM_CONFIG["base_url"]
+    key = (api_key, base_url)
+    with _clients_lock:
+        client = _async_clients.get(key)
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = AsyncResilientClient(AsyncOpenAI(base_url=base_url, api_key=api_key, max_retries=0))
+            _async_clients[key] = client
+        return client
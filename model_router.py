@@ -0,0 +1,168 @@
+"""Model tiering: a model per kind of reply.
+
+Every reply used to come from llama-3.3-70b-versatile, including chat
+replies and interviewer turns that the prompts hold to 30 words. Each reply
+now has a route: ``chat``, the mock interview type (``general``,
+``technical``, ``system_design``) or ``feedback``; so do the calls around
+them (``scoring``, ``validation``, ``summary``). MODEL_ROUTING_CONFIG maps
+each route to a tier:
+
+- ``fast`` (llama-3.1-8b-instant) for chat and general interview turns,
+  prefetch validation and context summaries;
+- ``strong`` (llama-3.3-70b-versatile) for technical and system design
+  interviews, answer scoring and the feedback synthesis.
+
+A fast-tier reply is escalated to the strong tier when the answer it
+responds to is long or looks technical (code, several questions of its
+own). Calls, escalations, latency, tokens and estimated cost are counted
+per route and tier. ``python -m benchmarks.model_ab`` replays recorded
+transcripts through both tiers, to check a route before moving it.
+"""
+import re
+import threading
+from collections import deque, namedtuple
+
+from config import MODEL_ROUTING_CONFIG
+from tracing import percentile
+
+TIERS = ("fast", "strong")
+
+# Identifiers, calls, operators and code fences; plain prose has next to none
+CODE_TOKEN = re.compile(
+    r"```|`[^`\n]+`|\b\w+\(|\b[a-z]+_[a-z0-9_]+\b|\b[a-z]+[A-Z]\w*\b|[=!<>]=|->|=>|[{};]"
+)
+
+Route = namedtuple("Route", "name tier model reason")
+
+
+def route_name(mode, interview_type):
+    """The route of a session's replies."""
+    return "chat" if mode == "chat" else interview_type
+
+
+def escalation_reason(answer):
+    """Why ``answer`` needs the strong tier, or None."""
+    limits = MODEL_ROUTING_CONFIG["escalate"]
+    if len(answer.split()) >= limits["answer_words"]:
+        return "long_answer"
+    if len(CODE_TOKEN.findall(answer)) >= limits["code_tokens"]:
+        return "code"
+    if answer.count("?") >= limits["questions"]:
+        return "questions"
+    return None
+
+
+def choose(name, answer=None):
+    """The ``Route`` for a call on route ``name``, replying to ``answer`` if given."""
+    config = MODEL_ROUTING_CONFIG
+    tier = config["routes"].get(name, config["default_tier"]) if config["enabled"] else "strong"
+    reason = None
+    if tier == "fast" and answer:
+        reason = escalation_reason(answer)
+        if reason is not None:
+            tier = "strong"
+    return Route(name, tier, config["tiers"][tier], reason)
+
+
+def cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD for one call; 0 for a model without a price."""
+    prompt_price, completion_price = MODEL_ROUTING_CONFIG["prices"].get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+class _RouteSeries:
+    __slots__ = ("model", "calls", "escalated", "prompt_tokens", "completion_tokens", "cost",
+                 "seconds", "ttfts")
+
+    def __init__(self, model, window):
+        self.model = model
+        self.calls = 0
+        self.escalated = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.seconds = deque(maxlen=window)
+        self.ttfts = deque(maxlen=window)
+
+    def snapshot(self):
+        seconds, ttfts = sorted(self.seconds), sorted(self.ttfts)
+        return {
+            "model": self.model,
+            "calls": self.calls,
+            "escalated": self.escalated,
+            "latency_p50": percentile(seconds, 50),
+            "latency_p95": percentile(seconds, 95),
+            "ttft_p50": percentile(ttfts, 50),
+            "ttft_p95": percentile(ttfts, 95),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": self.cost,
+        }
+
+
+class RouteStats:
+    """Calls, latency, (estimated) tokens and cost by route and tier."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.series = {}  # (route, tier) -> _RouteSeries
+        self.reasons = {}  # escalation reason -> count
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, ttft, prompt_tokens, completion_tokens):
+        with self._lock:
+            series = self.series.get((route.name, route.tier))
+            if series is None:
+                series = self.series[(route.name, route.tier)] = _RouteSeries(route.model, self.window)
+            series.calls += 1
+            series.prompt_tokens += prompt_tokens
+            series.completion_tokens += completion_tokens
+            series.cost += cost(route.model, prompt_tokens, completion_tokens)
+            series.seconds.append(seconds)
+            if ttft is not None:
+                series.ttfts.append(ttft)
+            if route.reason is not None:
+                series.escalated += 1
+                self.reasons[route.reason] = self.reasons.get(route.reason, 0) + 1
+
+    def snapshot(self):
+        """``{"routes": {route: {tier: {...}}}, "escalations": {reason: n}, "cost_usd": total}``"""
+        with self._lock:
+            routes = {}
+            for (name, tier), series in sorted(self.series.items()):
+                routes.setdefault(name, {})[tier] = series.snapshot()
+            return {
+                "routes": routes,
+                "escalations": dict(self.reasons),
+                "cost_usd": sum(series.cost for series in self.series.values()),
+            }
+
+    def prometheus(self):
+        """Per-route counters and latency quantiles in the Prometheus text format."""
+        snapshot = self.snapshot()["routes"]
+        families = (
+            ("interview_route_calls_total", "counter", "Completions by route and tier.", "calls"),
+            ("interview_route_escalations_total", "counter", "Fast-tier calls sent to the strong tier.",
+             "escalated"),
+            ("interview_route_prompt_tokens_total", "counter", "Estimated prompt tokens.", "prompt_tokens"),
+            ("interview_route_completion_tokens_total", "counter", "Estimated completion tokens.",
+             "completion_tokens"),
+            ("interview_route_cost_usd_total", "counter", "Estimated cost in USD.", "cost_usd"),
+        )
+        lines = []
+        for family, kind, help_text, key in families:
+            lines += [f"# HELP {family} {help_text}", f"# TYPE {family} {kind}"]
+            for name, tiers in snapshot.items():
+                for tier, stats in tiers.items():
+                    lines.append(f'{family}{{route="{name}",tier="{tier}",model="{stats["model"]}"}} {stats[key]}')
+        lines += ["# HELP interview_route_seconds Completion seconds (quantiles over recent calls).",
+                  "# TYPE interview_route_seconds summary"]
+        for name, tiers in snapshot.items():
+            for tier, stats in tiers.items():
+                for quantile, key in ((0.5, "latency_p50"), (0.95, "latency_p95")):
+                    lines.append(f'interview_route_seconds{{route="{name}",tier="{tier}",quantile="{quantile}"}} '
+                                 f'{stats[key]}')
+        return "\n".join(lines) + "\n"
+
+
+route_stats = RouteStats(MODEL_ROUTING_CONFIG["window"])
@@ -0,0 +1,534 @@
+"""Async turn orchestration.
+
+A turn used to run transcription, completion and TTS strictly one after the
+other on the Streamlit script thread. Here each turn is a coroutine on one
+process-wide event loop (running in a background thread) using
+``AsyncOpenAI``, so independent work overlaps:
+
+- older turns are folded into the context summary while the new answer is
+  still being transcribed;
+- long answers are transcribed in overlapping chunks concurrently, and live
+  audio is transcribed chunk by chunk while the candidate is still talking;
+- each streamed sentence is handed to the TTS pipeline while the rest of the
+  reply is generating;
+- in mock interviews, questions that don't depend on the answer come from
+  the local question bank without an LLM call;
+- each reply goes to the model its route calls for (see model_router.py):
+  short turns to a small fast model, technical interviews and feedback to
+  the 70B;
+- each answer is scored in the background while the next question streams;
+- feedback is streamed and voiced sentence by sentence in the same way.
+
+Every API call is admitted by the shared ``RequestScheduler`` (per-session
+and global rate limits, interactive before background work). Each stage of
+a turn records a span on the turn's trace (see tracing.py).
+
+The script thread gets a ``Turn`` handle back immediately and consumes the
+user text and reply deltas from it with ordinary blocking calls.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from audio_preprocess import NoSpeechError, audio_stats, prepare_audio
+from chunked_transcription import ChunkedTranscriber
+from config import (
+    AUDIO_PREPROCESS_CONFIG, FEEDBACK_CONFIG, PREFETCH_CONFIG, SCORING_CONFIG, STREAMING_STT_CONFIG
+)
+from context_window import count_tokens, estimate_tokens as text_tokens
+from feedback import compose_feedback, synthesis_messages
+from llm_client import get_async_client, get_client
+from model_router import choose, route_stats
+from prefetch import (
+    SPECULATE_INSTRUCTION, Prefetch, parse_validation, prefetch_stats, validation_messages
+)
+from response_cache import get_response_cache
+from scheduler import BACKGROUND, INTERACTIVE, ScheduledClient, estimate_tokens, get_scheduler
+from scoring import aggregate, answer_pairs, parse_score, scoring_messages
+from streaming import AsyncStreamingResponse
+from tracing import NULL_TRACE, start_trace
+from transcription import transcribe_async
+
+_DONE = object()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """The shared event loop, started on first use in a daemon thread."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="turn-loop", daemon=True).start()
+        return _loop
+
+
+class Turn:
+    """Handle on an in-flight turn, read from the Streamlit script thread."""
+
+    def __init__(self):
+        self.user_future = Future()
+        self.done = None
+        self.parts = []
+        self.ttft = None
+        self.total_time = None
+        self.audio = None  # PreparedAudio for a recorded answer
+        self.session_id = None  # charged by the scheduler
+        self.trace = NULL_TRACE
+        self.step = None  # question bank Step, when the session has a planner
+        self.route = None  # model_router.Route of the completion, if there was one
+        self._deltas = queue.Queue()
+        self._listeners = []  # (loop, asyncio.Queue) for async readers
+        self._lock = threading.Lock()
+
+    def _put(self, item):
+        with self._lock:
+            if not self._listeners:
+                self._deltas.put(item)
+            for loop, listener in self._listeners:
+                loop.call_soon_threadsafe(listener.put_nowait, item)
+
+    def user_text(self, timeout=None):
+        """Typed text, or the transcript once transcription finishes."""
+        return self.user_future.result(timeout)
+
+    def deltas(self):
+        """Blocking iterator over reply text as it streams in."""
+        while True:
+            item = self._deltas.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    async def adeltas(self):
+        """Async version of ``deltas`` for readers on another event loop.
+
+        Nothing blocks a thread while waiting, so many turns can be streamed
+        at once (see engine/server.py).
+        """
+        listener = asyncio.Queue()
+        with self._lock:
+            # Pick up whatever arrived before we started listening
+            while not self._deltas.empty():
+                listener.put_nowait(self._deltas.get_nowait())
+            self._listeners.append((asyncio.get_running_loop(), listener))
+        while True:
+            item = await listener.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def result(self, timeout=None):
+        self.done.result(timeout)
+        return self.text
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+class TurnOrchestrator:
+    def __init__(self, async_client, client):
+        self.async_client = async_client
+        self.client = client  # sync client, used for context folding
+        self.loop = get_loop()
+        self.scheduler = get_scheduler(self.loop)
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def _sync_client(self, priority, session_id):
+        return ScheduledClient(self.client, self.scheduler, priority, session_id)
+
+    def open_transcriber(self, rate=None, on_partial=None, session_id=None):
+        """A ``ChunkedTranscriber`` for live audio; pass it to ``run_turn``."""
+        return ChunkedTranscriber(
+            lambda data, filename: self._transcribe_clip(data, filename, session_id),
+            self.loop, rate=rate, on_partial=on_partial
+        )
+
+    async def _transcribe_clip(self, data, filename, session_id=None):
+        async with self.scheduler.slot(INTERACTIVE, session_id, kind="transcription"):
+            return await transcribe_async(self.async_client, data, filename)
+
+    def run_turn(self, system_prompt, history, context, text=None, audio_bytes=None,
+                 speech=None, stream=True, prefetch=None, cache_scope=None, transcriber=None,
+                 session_id=None, planner=None, route="reply"):
+        """Start one turn for typed ``text``, recorded ``audio_bytes`` or live audio.
+
+        For live audio, ``transcriber`` comes from ``open_transcriber``; the
+        reply starts as soon as its last chunk is transcribed.
+
+        ``history`` is the transcript so far (not modified; only the part the
+        context window still sends is copied); the caller appends the user
+        and assistant messages once they are available.
+        ``prefetch`` is a speculative next question to try before generating.
+        With ``cache_scope`` set, a first turn is served from / stored in the
+        cross-session response cache. ``session_id`` is who the scheduler
+        charges the calls to. ``planner(answer)`` returns the question bank's
+        ``Step`` for this turn; a served step replaces the completion.
+        ``route`` names the model route of the reply (see model_router.py).
+        """
+        turn = Turn()
+        turn.session_id = session_id
+        turn.trace = start_trace("turn", session_id)
+        turn.done = self._submit(self._turn(
+            turn, system_prompt, context.tail(history), context, text, audio_bytes, speech, stream, prefetch,
+            cache_scope, transcriber, planner, route
+        ))
+        return turn
+
+    async def _turn(self, turn, system_prompt, history, context, text, audio_bytes, speech, stream,
+                    prefetch=None, cache_scope=None, transcriber=None, planner=None, route="reply"):
+        start = time.perf_counter()
+        session_id = turn.session_id
+        trace = turn.trace
+        if speech is not None:
+            speech.trace = trace
+        outcome = "generated"
+        client = self._sync_client(INTERACTIVE, session_id)
+        fold = None
+        try:
+            # Refuse now rather than after the answer has been accepted; priced
+            # like the slot in _reply, from the windowed request
+            request = context.window(system_prompt, history, choose(route).model)
+            self.scheduler.check(INTERACTIVE, session_id, estimate_tokens(request))
+            # Summarize old turns while the new one is transcribed
+            fold = asyncio.create_task(
+                asyncio.to_thread(context.prepare, client, history, 1)
+            )
+            if transcriber is not None:
+                # Only what is left after the candidate stops talking
+                with trace.span("transcription", source="live"):
+                    text = await transcriber.result()
+                if not text:
+                    raise NoSpeechError("No speech detected in the recording")
+            elif audio_bytes is not None:
+                # Trim silence and downsample off the loop; silent clips stop here
+                with trace.span("audio_prep"):
+                    turn.audio = await asyncio.to_thread(prepare_audio, audio_bytes)
+                if turn.audio.silent:
+                    raise NoSpeechError("No speech detected in the recording")
+                with trace.span("transcription", source="recorded", audio_seconds=round(turn.audio.seconds, 2)):
+                    started = time.perf_counter()
+                    text = await self._transcribe_audio(turn.audio, session_id)
+                    audio_stats.record_transcription(turn.audio, time.perf_counter() - started)
+                if not text or not text.strip():
+                    raise NoSpeechError("No speech detected in the recording")
+            turn.user_future.set_result(text)
+            with trace.span("context_fold"):
+                await fold
+
+            history.append({"role": "user", "content": text})
+            if planner is not None:
+                started = time.perf_counter()
+                with trace.span("question_bank") as span:
+                    turn.step = planner(text)
+                    span.set(step=turn.step.kind)
+                if turn.step.served:
+                    self._use_bank(turn, turn.step, speech, started)
+                    outcome = "bank"
+                    return
+            if prefetch is not None:
+                with trace.span("prefetch_check") as span:
+                    used = await self._use_prefetch(turn, prefetch, text, speech)
+                    span.set(used=used)
+                if used:
+                    outcome = "prefetch"
+                    return
+            # Only a first turn is independent of the conversation so far
+            cacheable = cache_scope is not None and len(history) == 1
+            if cacheable and self._use_cached(turn, cache_scope, text, speech):
+                outcome = "cache"
+                return
+            generating = time.perf_counter()
+            routed = choose(route, text)
+            with trace.span("prompt_build") as span:
+                request = await asyncio.to_thread(
+                    context.build, client, system_prompt, history, routed.model
+                )
+                span.set(tokens=context.last_request_tokens)
+            if turn.step is not None and turn.step.instruction:
+                request.append({"role": "system", "content": turn.step.instruction})
+            await self._reply(turn, routed, request, speech, stream)
+            if cacheable:
+                get_response_cache().put(cache_scope, text, turn.text, time.perf_counter() - generating)
+        except BaseException as e:
+            outcome = type(e).__name__
+            if not turn.user_future.done():
+                turn.user_future.set_exception(e)
+            turn._put(e)
+            raise
+        finally:
+            if fold is not None and not fold.done():
+                # Its thread can't be stopped; don't let it change the context after the turn
+                await asyncio.wait([fold])
+            turn.total_time = time.perf_counter() - start
+            trace.record("turn", turn.total_time, outcome=outcome)
+            turn._put(_DONE)
+
+    async def _transcribe_audio(self, audio, session_id=None):
+        """One request, or overlapping chunks in parallel for a long answer."""
+        if (STREAMING_STT_CONFIG["enabled"] and audio.samples is not None
+                and audio.seconds >= STREAMING_STT_CONFIG["min_seconds"]):
+            transcriber = self.open_transcriber(rate=AUDIO_PREPROCESS_CONFIG["target_rate"], session_id=session_id)
+            transcriber._feed(audio.samples)
+            transcriber._finish()
+            return await transcriber.result()
+        return await self._transcribe_clip(audio.data, audio.filename, session_id)
+
+    async def _reply(self, turn, route, messages, speech, stream, kind="reply", **kwargs):
+        tokens = estimate_tokens(messages, kwargs.get("max_tokens"))
+        trace = turn.trace
+        turn.route = route
+        queued = time.perf_counter()
+        async with self.scheduler.slot(INTERACTIVE, turn.session_id, tokens, kind):
+            trace.record("queue", time.perf_counter() - queued, call=kind)
+            with trace.span("completion", call=kind, model=route.model, route=route.name, tier=route.tier,
+                            stream=stream) as span:
+                started = time.perf_counter()
+                if stream:
+                    reply = AsyncStreamingResponse(self.async_client, route.model, messages, **kwargs)
+                    async for delta in reply:
+                        turn.parts.append(delta)
+                        turn._put(delta)
+                        if speech is not None:
+                            speech.feed(delta)
+                    turn.ttft = reply.ttft
+                else:
+                    response = await self.async_client.chat.completions.create(
+                        model=route.model, messages=messages, **kwargs
+                    )
+                    content = response.choices[0].message.content
+                    turn.ttft = time.perf_counter() - started
+                    turn.parts.append(content)
+                    turn._put(content)
+                    if speech is not None:
+                        speech.feed(content)
+                seconds = time.perf_counter() - started
+                route_stats.record(route, seconds, turn.ttft, count_tokens(messages), text_tokens(turn.text))
+                if route.reason is not None:
+                    span.set(escalated=route.reason)
+                if trace.sampled:
+                    _trace_completion(trace, span, turn.text, turn.ttft, seconds)
+
+    def _use_bank(self, turn, step, speech, started):
+        reply = step.reply
+        turn.ttft = time.perf_counter() - started
+        turn.parts.append(reply)
+        turn._put(reply)
+        if speech is not None:
+            # Segmented like the audio rendered ahead (InterviewSession.prefetch_next)
+            speech.feed(step.lead_in)
+            speech.flush()
+            speech.feed(step.text)
+
+    def _use_cached(self, turn, scope, text, speech):
+        started = time.perf_counter()
+        reply = get_response_cache().get(scope, text)
+        if reply is None:
+            return False
+        turn.ttft = time.perf_counter() - started
+        turn.parts.append(reply)
+        turn._put(reply)
+        if speech is not None:
+            speech.feed(reply)
+        return True
+
+    def prefetch_question(self, system_prompt, history, context, speech=None, session_id=None, route="reply"):
+        """Draft the next interview question while the candidate answers.
+
+        ``speech`` (a fresh SpeechPipeline) renders the draft's audio ahead
+        of time so a hit is served from the TTS cache. The draft is written
+        by ``route``'s model, as the reply would be.
+        """
+        last = history[-1] if len(history) else None
+        prefetch = Prefetch(system_prompt, last["content"] if last and last["role"] == "assistant" else None)
+        prefetch.speech = speech
+        prefetch.future = self._submit(
+            self._speculate(prefetch, system_prompt, context.tail(history), context, session_id, choose(route))
+        )
+        prefetch_stats.record_attempt()
+        return prefetch
+
+    async def _speculate(self, prefetch, system_prompt, history, context, session_id, route):
+        start = time.perf_counter()
+        trace = start_trace("prefetch", session_id)
+        if prefetch.speech is not None:
+            prefetch.speech.trace = trace
+        with trace.span("prompt_build"):
+            # No folding here: only the turn itself updates the summary
+            request = context.window(system_prompt, history, route.model)
+        request.append({"role": "user", "content": SPECULATE_INSTRUCTION})
+        queued = time.perf_counter()
+        async with self.scheduler.slot(BACKGROUND, session_id, estimate_tokens(request), "prefetch"):
+            trace.record("queue", time.perf_counter() - queued, call="prefetch")
+            with trace.span("completion", call="prefetch", model=route.model, route=route.name, tier=route.tier,
+                            stream=False):
+                started = time.perf_counter()
+                response = await self.async_client.chat.completions.create(
+                    model=route.model, messages=request
+                )
+        draft = response.choices[0].message.content.strip()
+        route_stats.record(route, time.perf_counter() - started, None, count_tokens(request), text_tokens(draft))
+        prefetch.draft_seconds = time.perf_counter() - start
+        if prefetch.speech is not None:
+            prefetch.speech.feed(draft)
+            prefetch.speech.close()
+        return draft
+
+    async def _use_prefetch(self, turn, prefetch, answer, speech):
+        """Serve the drafted question if it still fits; False to generate."""
+        started = time.perf_counter()
+        try:
+            draft = await asyncio.wait_for(
+                asyncio.wrap_future(prefetch.future), PREFETCH_CONFIG["wait_timeout"]
+            )
+            messages = validation_messages(prefetch.question, answer, draft)
+            tokens = estimate_tokens(messages, PREFETCH_CONFIG["validator_max_tokens"])
+            routed = choose("validation")
+            async with self.scheduler.slot(INTERACTIVE, turn.session_id, tokens, "validation"):
+                called = time.perf_counter()
+                response = await self.async_client.chat.completions.create(
+                    model=routed.model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    max_tokens=PREFETCH_CONFIG["validator_max_tokens"],
+                    temperature=0
+                )
+            content = response.choices[0].message.content
+            route_stats.record(routed, time.perf_counter() - called, None, count_tokens(messages), text_tokens(content))
+            use, lead_in = parse_validation(content)
+        except Exception:
+            use = False
+        if not use:
+            prefetch_stats.record_miss(prefetch)
+            return False
+
+        if prefetch.speech is not None:
+            # Make sure the draft's audio is in the TTS cache before reuse
+            await asyncio.to_thread(prefetch.speech.audio)
+        reply = f"{lead_in} {draft}".strip()
+        turn.ttft = time.perf_counter() - started
+        turn.parts.append(reply)
+        turn._put(reply)
+        if speech is not None:
+            # Segment the draft exactly as the prefetch did, so every chunk hits the cache
+            speech.feed(lead_in)
+            speech.flush()
+            speech.feed(draft)
+        prefetch_stats.record_hit(prefetch)
+        return True
+
+    async def _score(self, question, answer, role, interview_type, session_id=None):
+        messages = scoring_messages(question, answer, role, interview_type)
+        tokens = estimate_tokens(messages, SCORING_CONFIG["max_tokens"])
+        trace = start_trace("scoring", session_id)
+        route = choose("scoring")
+        queued = time.perf_counter()
+        async with self.scheduler.slot(BACKGROUND, session_id, tokens, "scoring"):
+            trace.record("queue", time.perf_counter() - queued, call="scoring")
+            with trace.span("completion", call="scoring", model=route.model, route=route.name, tier=route.tier,
+                            stream=False):
+                started = time.perf_counter()
+                response = await self.async_client.chat.completions.create(
+                    model=route.model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    max_tokens=SCORING_CONFIG["max_tokens"],
+                    temperature=SCORING_CONFIG["temperature"]
+                )
+        content = response.choices[0].message.content
+        route_stats.record(route, time.perf_counter() - started, None, count_tokens(messages), text_tokens(content))
+        return parse_score(content)
+
+    def score_answer(self, question, answer, role, interview_type, session_id=None):
+        """Score one answer in the background; returns a Future."""
+        return self._submit(self._score(question, answer, role, interview_type, session_id))
+
+    def generate_feedback(self, messages, scorer, role, interview_type, speech=None, session_id=None):
+        """Blocking: aggregate the answer scores and stream a short synthesis.
+
+        Answers given before scoring was on (e.g. in chat mode) are scored
+        now, concurrently.
+        """
+        trace = start_trace("feedback", session_id)
+        if speech is not None:
+            speech.trace = trace
+        with trace.span("feedback"):
+            return self._feedback(trace, messages, scorer, role, interview_type, speech, session_id)
+
+    def _feedback(self, trace, messages, scorer, role, interview_type, speech, session_id):
+        for question, answer in scorer.unscored(answer_pairs(messages)):
+            scorer.submit(question, answer, self.score_answer(
+                question, answer, role, interview_type, session_id
+            ))
+
+        def rescore(question, answer):
+            return self.score_answer(question, answer, role, interview_type, session_id)
+
+        with trace.span("scoring_wait", answers=len(scorer)):
+            summary = aggregate(scorer.results(rescore))
+        if summary["rating"] is None:
+            # Nothing to synthesize over; a 1/10 would blame the candidate for our failure
+            return compose_feedback(summary, "Please try again in a moment.")
+        if speech is not None:
+            speech.feed(f"Overall performance rating: {summary['rating']} out of 10. ")
+        turn = Turn()
+        turn.session_id = session_id
+        turn.trace = trace
+
+        async def run():
+            try:
+                await self._reply(
+                    turn,
+                    choose("feedback"),
+                    synthesis_messages(summary, role, interview_type),
+                    speech,
+                    True,
+                    kind="feedback",
+                    max_tokens=FEEDBACK_CONFIG["max_tokens"],
+                    temperature=FEEDBACK_CONFIG["temperature"]
+                )
+            finally:
+                turn._put(_DONE)
+
+        self._submit(run()).result()
+        return compose_feedback(summary, turn.text)
+
+
+def _trace_completion(trace, span, text, ttft, seconds):
+    """TTFT and generation speed, from the (estimated) reply tokens."""
+    tokens = text_tokens(text)
+    generating = seconds - (ttft or 0)
+    span.set(tokens=tokens, ttft=round(ttft, 6) if ttft is not None else None)
+    if ttft is not None:
+        trace.record("completion_ttft", ttft)
+    if tokens > 1 and generating > 0:
+        tokens_per_second = (tokens - 1) / generating
+        span.set(tokens_per_second=round(tokens_per_second, 1))
+        trace.observe("completion_tokens_per_second", tokens_per_second)
+
+
+_orchestrators = {}
+
+
+def get_orchestrator(api_key, base_url=None):
+    key = (api_key, base_url)
+    with _loop_lock:
+        orchestrator = _orchestrators.get(key)
+    if orchestrator is None:
+        orchestrator = TurnOrchestrator(
+            get_async_client(api_key, base_url), get_client(api_key, base_url)
+        )
+        with _loop_lock:
+            orchestrator = _orchestrators.setdefault(key, orchestrator)
+    return orchestrator
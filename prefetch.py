@@ -0,0 +1,119 @@
+"""Speculative next-question prefetch for mock interviews.
+
+In a mock interview the next question depends only loosely on the answer.
+So while the candidate is still answering, we draft the next question from
+the current context and render its audio into the TTS cache. When the answer
+arrives, a small fast model checks whether the draft still fits and writes a
+one-line acknowledgement to go before it. On a hit the reply is ready almost
+at once; on a miss the turn falls back to normal generation. Hits, misses and
+the tokens spent on discarded drafts are counted so the toggles in
+PREFETCH_CONFIG can be tuned per interview type.
+"""
+import json
+import threading
+import time
+
+from config import PREFETCH_CONFIG
+from context_window import estimate_tokens
+
+SPECULATE_INSTRUCTION = (
+    "(The candidate is answering your last question right now. Without knowing their answer, "
+    "write the next question you would ask. It must make sense whatever they say, so do not "
+    "refer to details of their answer. Reply with the question only.)"
+)
+
+VALIDATOR_SYSTEM_PROMPT = "You check whether a pre-written interview question still fits. You reply with JSON only."
+
+
+def prefetch_enabled(interview_type):
+    return PREFETCH_CONFIG["enabled"].get(interview_type, False)
+
+
+def validation_messages(question, answer, draft):
+    prompt = f"""
+Previous interviewer question: {question or "(none)"}
+Candidate's answer: {answer}
+Drafted next question: {draft}
+
+Is the drafted question still a natural next question after this answer? It is NOT if the candidate already covered it, asked for clarification, asked a question of their own, or clearly needs a follow-up first.
+
+Reply with JSON: {{"use": true or false, "lead_in": "<brief, specific acknowledgement of the answer, at most 12 words>"}}
+"""
+    return [
+        {"role": "system", "content": VALIDATOR_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_validation(content):
+    data = json.loads(content)
+    return bool(data.get("use")), (data.get("lead_in") or "").strip()
+
+
+class Prefetch:
+    """A speculative next question for one session."""
+
+    def __init__(self, system_prompt, question):
+        self.system_prompt = system_prompt
+        self.question = question  # the question the candidate is answering
+        self.future = None  # resolves to the drafted next question
+        self.speech = None  # SpeechPipeline warming the TTS cache
+        self.draft_seconds = None
+        self.created = time.perf_counter()
+
+
+class PrefetchStats:
+    def __init__(self):
+        self.attempts = 0
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self.wasted_tokens = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _draft_tokens(self, prefetch):
+        try:
+            if prefetch.future.done():
+                return estimate_tokens(prefetch.future.result())
+        except Exception:
+            pass
+        return 0
+
+    def record_attempt(self):
+        with self._lock:
+            self.attempts += 1
+
+    def record_hit(self, prefetch):
+        with self._lock:
+            self.hits += 1
+            self.saved_seconds += prefetch.draft_seconds or 0.0
+
+    def record_miss(self, prefetch):
+        tokens = self._draft_tokens(prefetch)
+        with self._lock:
+            self.misses += 1
+            self.wasted_tokens += tokens
+
+    def record_discard(self, prefetch):
+        """Draft never offered (session ended or settings changed)."""
+        tokens = self._draft_tokens(prefetch)
+        with self._lock:
+            self.discarded += 1
+            self.wasted_tokens += tokens
+
+    def snapshot(self):
+        with self._lock:
+            offered = self.hits + self.misses
+            return {
+                "attempts": self.attempts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "discarded": self.discarded,
+                "hit_rate": self.hits / offered if offered else 0.0,
+                "wasted_tokens": self.wasted_tokens,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+prefetch_stats = PrefetchStats()
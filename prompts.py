@@ -0,0 +1,100 @@
+"""Prompt registry.
+
+Every system prompt for (domain, mode, interview_type, experience level) is
+built once at import and kept as an immutable string, shared by the text and
+voice input paths. Identical prompts per configuration also make a stable
+prefix for provider-side prompt caching.
+"""
+from itertools import chain
+from textwrap import dedent
+from types import MappingProxyType
+
+from config import DOMAIN_CONTEXTS, EXPERIENCE_LEVELS, ROLE_TEMPLATES
+
+PRACTICE_MODES = ("chat", "mock_interview")
+INTERVIEW_TYPES = ("general", "technical", "system_design")
+
+# Technical topics from the role catalog, used for the technology domain
+TECH_TOPICS = tuple(dict.fromkeys(
+    chain.from_iterable(t["topics"] for t in ROLE_TEMPLATES.values())
+))
+
+
+def _chat_prompt(domain, context):
+    return f"""
+    You are a helpful interview practice partner for {domain} domain.
+    Focus on {context}.
+    Help the user practice by:
+    - Providing realistic interview questions specific to {domain}
+    - Giving constructive feedback on answers
+    - Explaining domain-specific concepts and best practices
+    - Offering tips for success in {domain} interviews
+    Be encouraging, specific, and helpful.
+    IMPORTANT: Keep responses under 50 words. Be concise and direct.
+    """
+
+
+def _interview_prompt(domain, context, interview_type):
+    if interview_type == "general":
+        return f"""
+        You are conducting a general interview for {domain} domain.
+        Ask basic questions about background, experience, and behavioral situations.
+        Focus on: "Tell me about yourself", "Why this role?", "Describe a challenge", "Strengths/weaknesses".
+        IMPORTANT: Keep responses under 30 words. Be concise.
+        """
+    if interview_type == "technical":
+        topics = ""
+        if domain == "Computer Science & Technology":
+            topics = f"\n        Draw on topics such as: {', '.join(TECH_TOPICS)}."
+        return f"""
+        You are conducting an advanced technical interview for {domain} domain.
+        Ask complex technical questions about {context}.
+        Focus on advanced concepts, problem-solving, coding challenges, architecture decisions.{topics}
+        IMPORTANT: Keep responses under 30 words. Be concise.
+        """
+    return f"""
+    You are conducting a system design interview for {domain} domain.
+    Ask ONLY system design questions: "Design a messaging app", "Design a URL shortener", "Design a social media feed".
+    Focus on scalability, architecture, databases, load balancing.
+    IMPORTANT: Keep responses under 30 words. Be concise.
+    """
+
+
+def _level_note(level):
+    if level is None:
+        return ""
+    info = EXPERIENCE_LEVELS[level]
+    return f"\nThe candidate is {info['code']} level. Pitch questions at {info['difficulty']} difficulty, focusing on {info['focus'].lower()}."
+
+
+def build_prompt(domain, mode, interview_type=None, level=None):
+    context = DOMAIN_CONTEXTS.get(domain, "general professional skills")
+    if mode == "chat":
+        text = _chat_prompt(domain, context)
+    else:
+        text = _interview_prompt(domain, context, interview_type)
+    return dedent(text).strip() + _level_note(level)
+
+
+def _build_registry():
+    prompts = {}
+    for domain in DOMAIN_CONTEXTS:
+        for level in chain([None], EXPERIENCE_LEVELS):
+            prompts[(domain, "chat", None, level)] = build_prompt(domain, "chat", level=level)
+            for interview_type in INTERVIEW_TYPES:
+                key = (domain, "mock_interview", interview_type, level)
+                prompts[key] = build_prompt(domain, "mock_interview", interview_type, level)
+    return MappingProxyType(prompts)
+
+
+PROMPTS = _build_registry()
+
+
+def get_system_prompt(domain, mode, interview_type=None, level=None):
+    if mode == "chat":
+        interview_type = None
+    prompt = PROMPTS.get((domain, mode, interview_type, level))
+    if prompt is None:
+        # Unknown combination (e.g. a custom domain): build on demand
+        prompt = build_prompt(domain, mode, interview_type, level)
+    return prompt
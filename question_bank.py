@@ -0,0 +1,250 @@
+"""Local question bank for mock interviews.
+
+Every interviewer question used to be a full 70B completion, although most
+of them don't depend on the answer before them. The bank
+(data/question_bank.json) holds openers, canned probes and questions
+indexed by domain, interview type, topic and difficulty. So:
+
+- the first question is an opener from the bank;
+- a too-short answer gets a canned probe ("Could you walk me through a
+  specific example?");
+- after the configured number of follow-ups, the next question is a lookup.
+  It is an unseen question at the candidate's difficulty, from the topic
+  asked least so far.
+
+The LLM is only asked for follow-ups, which depend on the answer, and when
+the bank has nothing left for a setup. Each session's ``QuestionPlan``
+records which questions it has been asked.
+
+File format: ``questions[domain][interview_type][topic][difficulty]`` is a
+list of question texts. Domain ``"*"`` applies to every domain and
+difficulty ``"Any"`` to every level. Question ids are hashes of the text, so
+editing the bank doesn't change what a session has already seen.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+from collections import Counter, namedtuple
+
+from config import EXPERIENCE_LEVELS, QUESTION_BANK_CONFIG
+from prompts import INTERVIEW_TYPES
+
+DIFFICULTIES = tuple(dict.fromkeys(level["difficulty"] for level in EXPERIENCE_LEVELS.values()))
+ANY_DIFFICULTY = "Any"
+ANY_DOMAIN = "*"
+SERVED = ("opener", "probe", "question")
+
+FOLLOW_UP_INSTRUCTION = (
+    "(Ask one short follow-up question that digs into the candidate's last answer. "
+    "Stay on the same topic and don't move on to a new question. Reply with the question only.)"
+)
+
+Question = namedtuple("Question", "id domain interview_type topic difficulty text")
+
+
+def question_id(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def bank_enabled(mode, interview_type):
+    return mode == "mock_interview" and QUESTION_BANK_CONFIG["enabled"].get(interview_type, False)
+
+
+def difficulty_for(level):
+    """The bank difficulty for an EXPERIENCE_LEVELS key; None (any level) stays None."""
+    return EXPERIENCE_LEVELS[level]["difficulty"] if level is not None else None
+
+
+class QuestionBank:
+    def __init__(self, data):
+        self.openers = {t: tuple(texts) for t, texts in data.get("openers", {}).items()}
+        self.probes = {t: tuple(texts) for t, texts in data.get("probes", {}).items()}
+        self.transitions = tuple(data.get("transitions", ()))
+        self.questions = {}  # id -> Question
+        self.index = {}  # (domain, interview_type) -> {difficulty: (Question, ...)}
+        for domain, types in data["questions"].items():
+            for interview_type, topics in types.items():
+                if interview_type not in INTERVIEW_TYPES:
+                    raise ValueError(f"question bank: unknown interview type {interview_type!r}")
+                levels = self.index.setdefault((domain, interview_type), {})
+                for topic, by_difficulty in topics.items():
+                    for difficulty, texts in by_difficulty.items():
+                        if difficulty != ANY_DIFFICULTY and difficulty not in DIFFICULTIES:
+                            raise ValueError(f"question bank: unknown difficulty {difficulty!r}")
+                        for text in texts:
+                            question = Question(question_id(text), domain, interview_type, topic, difficulty, text)
+                            self.questions[question.id] = question
+                            levels.setdefault(difficulty, []).append(question)
+        for levels in self.index.values():
+            for difficulty, questions in levels.items():
+                levels[difficulty] = tuple(questions)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def candidates(self, domain, interview_type, difficulty=None):
+        """Questions for a setup; ``difficulty`` None means every level."""
+        found = []
+        for key in ((domain, interview_type), (ANY_DOMAIN, interview_type)):
+            levels = self.index.get(key, {})
+            if difficulty is None:
+                for questions in levels.values():
+                    found.extend(questions)
+            else:
+                found.extend(levels.get(difficulty, ()))
+                found.extend(levels.get(ANY_DIFFICULTY, ()))
+        return found
+
+    def pick(self, domain, interview_type, difficulty, seen, rng):
+        """An unseen question from the least-asked topic; None when none are left."""
+        seen_ids = set(seen)
+        pool = [q for q in self.candidates(domain, interview_type, difficulty) if q.id not in seen_ids]
+        if not pool and difficulty is not None:
+            # Out of questions at this level: try the nearest levels
+            rank = DIFFICULTIES.index(difficulty)
+            for other in sorted(DIFFICULTIES, key=lambda d: abs(DIFFICULTIES.index(d) - rank)):
+                pool = [q for q in self.candidates(domain, interview_type, other) if q.id not in seen_ids]
+                if pool:
+                    break
+        if not pool:
+            return None
+        asked = Counter(self.questions[i].topic for i in seen if i in self.questions)
+        fewest = min(asked[q.topic] for q in pool)
+        return rng.choice([q for q in pool if asked[q.topic] == fewest])
+
+
+class Step:
+    """What the interviewer says next.
+
+    ``opener``, ``probe`` and ``question`` steps are served from the bank
+    (``reply``). ``follow_up`` and ``generated`` steps go to the LLM, with
+    ``instruction`` appended to the request if set.
+    """
+
+    __slots__ = ("kind", "text", "lead_in", "question", "instruction")
+
+    def __init__(self, kind, text=None, lead_in="", question=None, instruction=None):
+        self.kind = kind
+        self.text = text
+        self.lead_in = lead_in
+        self.question = question
+        self.instruction = instruction
+
+    @property
+    def served(self):
+        return self.text is not None
+
+    @property
+    def reply(self):
+        return f"{self.lead_in} {self.text}".strip()
+
+
+class QuestionPlan:
+    """What one session has been asked so far, and what comes next.
+
+    ``decide`` doesn't change anything, so a turn that fails asks the same
+    thing again; ``commit`` records a step once its turn has finished.
+    Choices are seeded by the session and its progress, so every worker
+    makes the same one.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.seen = []  # bank question ids, oldest first
+        self.follow_ups = 0  # asked about the current question
+        self.last_kind = None
+
+    def _rng(self, salt):
+        return random.Random(f"{self.seed}:{len(self.seen)}:{self.follow_ups}:{self.last_kind}:{salt}")
+
+    def decide(self, domain, interview_type, level, answer=None, bank=None):
+        """The next step after ``answer``; None means a complete answer."""
+        bank = bank or get_question_bank()
+        if self.last_kind is None:
+            openers = bank.openers.get(interview_type)
+            if openers:
+                return Step("opener", self._rng("opener").choice(openers).format(domain=domain))
+        else:
+            limit = QUESTION_BANK_CONFIG["follow_ups"].get(interview_type, 0)
+            probes = bank.probes.get(interview_type)
+            if self.follow_ups < limit:
+                thin = answer is not None and len(answer.split()) < QUESTION_BANK_CONFIG["min_answer_words"]
+                if thin and probes and self.last_kind in ("opener", "question"):
+                    return Step("probe", self._rng("probe").choice(probes))
+                return Step("follow_up", instruction=FOLLOW_UP_INSTRUCTION)
+        question = bank.pick(domain, interview_type, difficulty_for(level), self.seen, self._rng("question"))
+        if question is None:
+            return Step("generated")
+        lead_in = self._rng("lead_in").choice(bank.transitions) if self.last_kind and bank.transitions else ""
+        return Step("question", question.text, lead_in, question)
+
+    def upcoming(self, domain, interview_type, level, bank=None):
+        """The bank question a complete answer would get next, if any."""
+        step = self.decide(domain, interview_type, level, bank=bank)
+        return step if step.kind == "question" else None
+
+    def commit(self, step):
+        if step.kind == "question":
+            self.seen.append(step.question.id)
+        if step.kind in ("probe", "follow_up"):
+            self.follow_ups += 1
+        else:
+            self.follow_ups = 0
+        self.last_kind = step.kind
+        bank_stats.record(step.kind)
+
+    def to_dict(self):
+        return {"seen": list(self.seen), "follow_ups": self.follow_ups, "last_kind": self.last_kind}
+
+    @classmethod
+    def from_dict(cls, seed, data):
+        plan = cls(seed)
+        plan.seen = list(data["seen"])
+        plan.follow_ups = data["follow_ups"]
+        plan.last_kind = data["last_kind"]
+        return plan
+
+
+class QuestionBankStats:
+    """Interviewer turns served from the bank vs. written by the LLM."""
+
+    def __init__(self):
+        self.by_kind = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind):
+        with self._lock:
+            self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            served = sum(n for kind, n in self.by_kind.items() if kind in SERVED)
+            total = sum(self.by_kind.values())
+            return {
+                "by_kind": dict(self.by_kind),
+                "served": served,
+                "llm": total - served,
+                "served_rate": served / total if total else 0.0,
+            }
+
+
+bank_stats = QuestionBankStats()
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """The process's bank, loaded on first use."""
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            path = os.getenv("QUESTION_BANK_PATH") or QUESTION_BANK_CONFIG["path"] or os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), "data", "question_bank.json"
+            )
+            _bank = QuestionBank.load(path)
+        return _bank
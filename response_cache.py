@@ -0,0 +1,204 @@
+"""Cross-session response cache for chat practice mode.
+
+Opening requests in chat mode repeat a lot across users ("give me a system
+design question" for the same domain), and each one used to cost a fresh 70B
+completion. Replies to a *first* turn depend only on the system prompt and
+the user's text, so they can be shared safely. Entries are keyed by (role,
+mode, level) plus the normalized prompt.
+
+By default only the same normalized prompt is a hit. With sentence-transformers
+installed and configured, a local vector index also matches paraphrases.
+Lexical similarity is not enough for that. "A process and a thread" and "a
+process and a program" share most of their characters, but they need
+different answers.
+
+Entries expire after a TTL and are evicted least-recently-used beyond a size
+cap. Hits and the generation time they save are counted. With a shared state backend, exact matches are also shared by
+all workers; the near-duplicate index stays per process.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import RESPONSE_CACHE_CONFIG
+from shared_state import get_shared_backend
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_prompt(text):
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _SPACES.sub(" ", text).strip()
+
+
+def cache_enabled(mode):
+    return RESPONSE_CACHE_CONFIG["modes"].get(mode, False)
+
+
+class SentenceTransformerEmbedder:
+    """Optional: semantic embeddings via sentence-transformers, if installed."""
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def __call__(self, text):
+        import numpy as np
+
+        return np.asarray(self.model.encode(text, normalize_embeddings=True), dtype=np.float32)
+
+
+def make_embedder(kind):
+    """The paraphrase matcher for RESPONSE_CACHE_CONFIG["embedding"], or None."""
+    if kind is None:
+        return None
+    if kind == "sentence-transformers":
+        return SentenceTransformerEmbedder(RESPONSE_CACHE_CONFIG["embedding_model"])
+    raise ValueError(f"response cache: unknown embedding {kind!r}; use None or \"sentence-transformers\"")
+
+
+class _Entry:
+    __slots__ = ("scope", "prompt", "reply", "latency", "created", "vector")
+
+    def __init__(self, scope, prompt, reply, latency, vector):
+        self.scope = scope
+        self.prompt = prompt
+        self.reply = reply
+        self.latency = latency  # what generating the reply cost
+        self.created = time.time()
+        self.vector = vector
+
+
+class ResponseCache:
+    def __init__(self, max_entries, ttl, embedder=None, similarity=0.95, backend=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embedder = embedder
+        self.similarity = similarity
+        self.backend = backend  # shared across workers, or None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _expired(self, entry, now):
+        return now - entry.created > self.ttl
+
+    @staticmethod
+    def _shared_key(scope, prompt):
+        return "response:" + hashlib.sha256(json.dumps([list(scope), prompt]).encode("utf-8")).hexdigest()
+
+    def _from_backend(self, scope, prompt):
+        """An entry another worker stored, remembered locally too."""
+        data = self.backend.get(self._shared_key(scope, prompt))
+        if data is None:
+            return None
+        data = json.loads(data)
+        if time.time() - data["created"] > self.ttl:
+            return None  # stored by a worker configured with a longer ttl
+        vector = self.embedder(prompt) if self.embedder is not None and prompt else None
+        entry = _Entry(scope, prompt, data["reply"], data["latency"], vector)
+        entry.created = data["created"]
+        with self._lock:
+            self.entries[(scope, prompt)] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def _nearest(self, scope, vector, now):
+        # Brute force over one scope is plenty at this cache size
+        candidates = [
+            (key, entry) for key, entry in self.entries.items()
+            if entry.scope == scope and entry.vector is not None and not self._expired(entry, now)
+        ]
+        if not candidates:
+            return None
+        import numpy as np
+
+        scores = np.stack([entry.vector for _, entry in candidates]) @ vector
+        best = int(np.argmax(scores))
+        return candidates[best][0] if scores[best] >= self.similarity else None
+
+    def get(self, scope, text):
+        """The cached reply for ``text`` in ``scope``, or None."""
+        prompt = normalize_prompt(text)
+        key = (scope, prompt)
+        near = False
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self.entries[key]
+                entry = None
+        if entry is None and self.backend is not None:
+            entry = self._from_backend(scope, prompt)
+        if entry is None and self.embedder is not None and prompt:
+            vector = self.embedder(prompt)  # outside the lock; may be slow
+            with self._lock:
+                key = self._nearest(scope, vector, now)
+                entry = self.entries.get(key) if key is not None else None
+                near = True
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            self.hits += 1
+            self.near_hits += near
+            self.saved_seconds += entry.latency
+            return entry.reply
+
+    def put(self, scope, text, reply, latency):
+        prompt = normalize_prompt(text)
+        vector = self.embedder(prompt) if self.embedder is not None and prompt else None
+        entry = _Entry(scope, prompt, reply, latency, vector)
+        with self._lock:
+            self.entries[(scope, prompt)] = entry
+            self.entries.move_to_end((scope, prompt))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        if self.backend is not None:
+            self.backend.set(
+                self._shared_key(scope, prompt),
+                json.dumps({"reply": reply, "latency": latency, "created": entry.created}).encode("utf-8"),
+                self.ttl
+            )
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            backend = get_shared_backend()
+            _cache = ResponseCache(
+                RESPONSE_CACHE_CONFIG["max_entries"],
+                RESPONSE_CACHE_CONFIG["ttl"],
+                make_embedder(RESPONSE_CACHE_CONFIG["embedding"]),
+                RESPONSE_CACHE_CONFIG["similarity"],
+                backend if backend.shared else None
+            )
+        return _cache
@@ -0,0 +1,348 @@
+"""Admission control and fair scheduling for the shared Groq quota.
+
+Every session used to call the API directly, so one chatty user could use up
+the account's rate limit for everyone. All completions and transcriptions now
+go through one ``RequestScheduler`` on the orchestrator's event loop:
+
+- token buckets cap requests and (estimated) tokens per minute, for the whole
+  process and for each session;
+- waiting calls are admitted in priority order. Interactive work (replies,
+  transcription, feedback) goes before background work (answer scoring,
+  question drafts). Background work never takes the last few concurrency
+  slots;
+- a session over its own budget waits without holding up other sessions;
+- a call whose expected wait is too long is refused at once with
+  ``OverloadedError``. The page shows that as a "busy" notice and the server
+  as 503, instead of a stack trace;
+- queue depth, wait times and refusals are counted for the stats views.
+"""
+import asyncio
+import bisect
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from types import SimpleNamespace
+
+from config import LLM_CONFIG, SCHEDULER_CONFIG
+from context_window import count_tokens
+from tracing import percentile
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITIES = ("interactive", "background")
+
+
+class OverloadedError(RuntimeError):
+    """A call was refused to protect the shared rate limit."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst, clock=time.monotonic):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = burst
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, backlog=0):
+        """Seconds until ``amount`` can be taken after ``backlog`` queued
+        ahead of it; 0 if it can be now."""
+        self._refill()
+        # A call bigger than the bucket waits for a full bucket instead of forever
+        needed = min(amount, self.capacity) + backlog
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+def _bucket(per_minute, burst):
+    return TokenBucket(per_minute, burst) if per_minute else None
+
+
+def estimate_tokens(messages=None, max_tokens=None):
+    """Prompt tokens plus the most the reply can use."""
+    return count_tokens(messages or []) + (max_tokens or SCHEDULER_CONFIG["reply_tokens"])
+
+
+class _Waiter:
+    __slots__ = ("priority", "session", "tokens", "kind", "future", "enqueued")
+
+    def __init__(self, priority, session, tokens, kind, future):
+        self.priority = priority
+        self.session = session
+        self.tokens = tokens
+        self.kind = kind
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class _SessionQuota:
+    def __init__(self, config):
+        self.requests = _bucket(config["session_requests_per_minute"], config["session_request_burst"])
+        self.tokens = _bucket(config["session_tokens_per_minute"], config["session_token_burst"])
+        self.shed = 0
+
+
+class RequestScheduler:
+    """Process-wide gate for API calls; all state lives on ``loop``.
+
+    ``slot(...)`` (async, on the loop) and ``slot_blocking(...)`` (any other
+    thread) hold one admitted call for the duration of a ``with`` block.
+    """
+
+    def __init__(self, loop, config=None, max_active=None):
+        self.loop = loop
+        self.config = config or SCHEDULER_CONFIG
+        self.max_active = max_active or LLM_CONFIG["max_concurrency"]
+        self.background_slots = max(1, self.max_active - self.config["reserved_interactive_slots"])
+        self.active = [0, 0]  # by priority
+        self.requests = _bucket(self.config["requests_per_minute"], self.config["request_burst"])
+        self.tokens = _bucket(self.config["tokens_per_minute"], self.config["token_burst"])
+        self.sessions = OrderedDict()  # session id -> _SessionQuota, least recently used first
+        self.queue = []  # (priority, seq, waiter), kept sorted
+        self._seq = itertools.count()
+        self._timer = None
+        self.stats = SchedulerStats()
+
+    def _quota(self, session_id):
+        if session_id is None:
+            return None
+        quota = self.sessions.get(session_id)
+        if quota is None:
+            quota = self.sessions[session_id] = _SessionQuota(self.config)
+            while len(self.sessions) > self.config["max_tracked_sessions"]:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(session_id)
+        return quota
+
+    @staticmethod
+    def _wait(limits):
+        """Longest wait over (bucket, amount[, backlog]); missing buckets are unlimited."""
+        return max(
+            (limit[0].wait_time(*limit[1:]) for limit in limits if limit[0] is not None),
+            default=0.0
+        )
+
+    # Admission
+
+    def check(self, priority, session_id=None, tokens=0):
+        """Raise ``OverloadedError`` if a call like this would be refused now.
+
+        Lets a turn be turned away before the answer is accepted.
+        """
+        name = PRIORITIES[priority]
+        ahead = [w for _, _, w in self.queue if w.priority <= priority and not w.future.done()]
+        if len(ahead) >= self.config["max_queue"][name]:
+            self._shed(priority, session_id, "queue full", self.config["max_wait"][name])
+        mine = [w for w in ahead if w.session == session_id] if session_id is not None else []
+        quota = self._quota(session_id)
+        session_limits = [
+            (quota and quota.requests, 1, len(mine)),
+            (quota and quota.tokens, tokens, sum(w.tokens for w in mine)),
+        ]
+        session_wait = self._wait(session_limits)
+        wait = max(session_wait, self._wait([
+            (self.requests, 1, len(ahead)),
+            (self.tokens, tokens, sum(w.tokens for w in ahead)),
+        ]))
+        if wait > self.config["max_wait"][name]:
+            reason = "session rate limit" if session_wait >= wait else "rate limit"
+            self._shed(priority, session_id, reason, wait)
+
+    def _shed(self, priority, session_id, reason, retry_after):
+        quota = self._quota(session_id)
+        if quota is not None:
+            quota.shed += 1
+        self.stats.record_shed(priority, reason)
+        raise OverloadedError(f"Too many requests right now ({reason})", retry_after)
+
+    async def acquire(self, priority, session_id=None, tokens=0, kind="chat"):
+        self.check(priority, session_id, tokens)
+        waiter = _Waiter(priority, session_id, tokens, kind, self.loop.create_future())
+        bisect.insort(self.queue, (priority, next(self._seq), waiter))
+        self.stats.record_depth(self.depth())
+        self._dispatch()
+        max_wait = self.config["max_wait"][PRIORITIES[priority]]
+        try:
+            await asyncio.wait_for(waiter.future, max_wait)
+        except asyncio.TimeoutError:
+            self._dispatch()  # drop the expired waiter
+            self._shed(priority, session_id, "timed out waiting", max_wait)
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(waiter)  # admitted just as the caller gave up
+            raise
+        return waiter
+
+    def release(self, waiter):
+        self.active[waiter.priority] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Admit waiting calls in priority order while quota and slots allow."""
+        retry = None
+        blocked = False  # the shared quota is used up: nobody jumps ahead
+        waiting = []
+        for entry in self.queue:
+            waiter = entry[2]
+            if waiter.future.done():
+                continue  # timed out or cancelled
+            if blocked or sum(self.active) >= self.max_active or (
+                    waiter.priority == BACKGROUND and self.active[BACKGROUND] >= self.background_slots):
+                waiting.append(entry)
+                continue
+            quota = self._quota(waiter.session)
+            wait = self._wait([(self.requests, 1), (self.tokens, waiter.tokens)])
+            blocked = bool(wait)
+            if not wait and quota is not None:
+                # A session over its share waits; other sessions may go first
+                wait = self._wait([(quota.requests, 1), (quota.tokens, waiter.tokens)])
+            if wait:
+                retry = wait if retry is None else min(retry, wait)
+                waiting.append(entry)
+                continue
+            for bucket, amount in ((self.requests, 1), (self.tokens, waiter.tokens),
+                                   (quota and quota.requests, 1), (quota and quota.tokens, waiter.tokens)):
+                if bucket is not None:
+                    bucket.take(amount)
+            self.active[waiter.priority] += 1
+            waiter.future.set_result(None)
+            self.stats.record_admit(waiter, time.monotonic() - waiter.enqueued)
+        self.queue = waiting
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if retry is not None:
+            self._timer = self.loop.call_later(retry, self._dispatch)
+
+    def depth(self):
+        depth = [0, 0]
+        for priority, _, waiter in self.queue:
+            if not waiter.future.done():
+                depth[priority] += 1
+        return depth
+
+    @asynccontextmanager
+    async def slot(self, priority, session_id=None, tokens=0, kind="chat"):
+        waiter = await self.acquire(priority, session_id, tokens, kind)
+        try:
+            yield
+        finally:
+            self.release(waiter)
+
+    @contextmanager
+    def slot_blocking(self, priority, session_id=None, tokens=0, kind="chat"):
+        """``slot`` for code running in a worker thread (never on the loop)."""
+        waiter = asyncio.run_coroutine_threadsafe(
+            self.acquire(priority, session_id, tokens, kind), self.loop
+        ).result()
+        try:
+            yield
+        finally:
+            self.loop.call_soon_threadsafe(self.release, waiter)
+
+    def snapshot(self):
+        depth = self.depth()
+        stats = self.stats.snapshot()
+        stats["active"] = sum(self.active)
+        for priority, name in enumerate(PRIORITIES):
+            stats[name]["queued"] = depth[priority]
+        return stats
+
+    def session_snapshot(self, session_id):
+        quota = self.sessions.get(session_id)
+        return {
+            "queued": sum(1 for _, _, w in self.queue if w.session == session_id and not w.future.done()),
+            "shed": quota.shed if quota is not None else 0,
+        }
+
+
+class SchedulerStats:
+    """Admissions, refusals and queue waits, by priority."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.admitted = [0, 0]
+        self.shed = [0, 0]
+        self.shed_reasons = {}
+        self.max_depth = [0, 0]
+        self.waits = [deque(maxlen=window), deque(maxlen=window)]
+        self.by_kind = {}
+
+    def record_admit(self, waiter, waited):
+        with self._lock:
+            self.admitted[waiter.priority] += 1
+            self.waits[waiter.priority].append(waited)
+            self.by_kind[waiter.kind] = self.by_kind.get(waiter.kind, 0) + 1
+
+    def record_shed(self, priority, reason):
+        with self._lock:
+            self.shed[priority] += 1
+            self.shed_reasons[reason] = self.shed_reasons.get(reason, 0) + 1
+
+    def record_depth(self, depth):
+        with self._lock:
+            self.max_depth = [max(a, b) for a, b in zip(self.max_depth, depth)]
+
+    def snapshot(self):
+        with self._lock:
+            stats = {"by_kind": dict(self.by_kind), "shed_reasons": dict(self.shed_reasons)}
+            for priority, name in enumerate(PRIORITIES):
+                waits = sorted(self.waits[priority])
+                stats[name] = {
+                    "admitted": self.admitted[priority],
+                    "shed": self.shed[priority],
+                    "max_queued": self.max_depth[priority],
+                    "wait_p50": percentile(waits, 50),
+                    "wait_p95": percentile(waits, 95),
+                }
+            return stats
+
+
+class ScheduledClient:
+    """The sync client with each completion admitted by the scheduler.
+
+    Used for context summaries, which run in worker threads.
+    """
+
+    def __init__(self, client, scheduler, priority, session_id=None, kind="summary"):
+        self.client = client
+        self.scheduler = scheduler
+        self.priority = priority
+        self.session_id = session_id
+        self.kind = kind
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def _create_completion(self, **kwargs):
+        tokens = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+        with self.scheduler.slot_blocking(self.priority, self.session_id, tokens, self.kind):
+            return self.client.chat.completions.create(**kwargs)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(loop):
+    """The scheduler for ``loop`` (the orchestrator's shared loop)."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(loop)
+        if scheduler is None:
+            scheduler = _schedulers[loop] = RequestScheduler(loop)
+        return scheduler
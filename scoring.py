@@ -0,0 +1,133 @@
+"""Per-answer scoring against ASSESSMENT_CRITERIA.
+
+Each candidate answer is scored in the background right after it is given,
+as structured JSON with one 0-10 score per criterion plus a short strength /
+improvement note. End-of-interview feedback then only needs a weighted
+aggregate of those scores and one short synthesis call, so its latency no
+longer grows with the length of the transcript.
+"""
+import json
+import time
+from collections import Counter
+
+from config import ASSESSMENT_CRITERIA, SCORING_CONFIG
+
+SCORING_SYSTEM_PROMPT = "You are a strict, fair interview assessor. You reply with JSON only."
+
+
+def criterion_label(criterion):
+    return criterion.replace("_", " ").title()
+
+
+def scoring_messages(question, answer, role, interview_type):
+    criteria = ", ".join(ASSESSMENT_CRITERIA)
+    prompt = f"""
+Score one candidate answer from a {interview_type} interview for a {role} position.
+
+Question: {question or "(none - the candidate spoke first)"}
+Answer: {answer}
+
+Rate each criterion from 0 to 10 using ONLY this answer: {criteria}.
+Give 0 when the answer shows no evidence for a criterion. Short, vague or evasive answers score low.
+
+Reply with JSON in exactly this shape:
+{{"scores": {{"<criterion>": <0-10>}}, "strength": "<short phrase, or empty if none shown>", "improvement": "<short phrase>"}}
+"""
+    return [
+        {"role": "system", "content": SCORING_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_score(content):
+    """Parse the scorer's JSON; unknown criteria are dropped, scores clamped."""
+    data = json.loads(content)
+    scores = {}
+    for criterion, value in (data.get("scores") or {}).items():
+        if criterion in ASSESSMENT_CRITERIA:
+            try:
+                scores[criterion] = min(10.0, max(0.0, float(value)))
+            except (TypeError, ValueError):
+                continue
+    return {
+        "scores": scores,
+        "strength": (data.get("strength") or "").strip(),
+        "improvement": (data.get("improvement") or "").strip(),
+    }
+
+
+def answer_pairs(messages):
+    """(question, answer) for every candidate message in a transcript."""
+    question = None
+    for message in messages:
+        if message["role"] == "assistant":
+            question = message["content"]
+        else:
+            yield question, message["content"]
+
+
+def aggregate(results):
+    """Weighted summary of per-answer scores; the rating is None when no
+    answer could be scored."""
+    totals = {}
+    counts = {}
+    for result in results:
+        for criterion, value in result["scores"].items():
+            totals[criterion] = totals.get(criterion, 0.0) + value
+            counts[criterion] = counts.get(criterion, 0) + 1
+    criteria = {c: totals[c] / counts[c] for c in ASSESSMENT_CRITERIA if c in counts}
+    weight = sum(ASSESSMENT_CRITERIA[c] for c in criteria)
+    overall = sum(ASSESSMENT_CRITERIA[c] * v for c, v in criteria.items()) / weight if weight else None
+    return {
+        "answers": len(results),
+        "criteria": criteria,
+        "overall": overall,
+        "rating": max(1, round(overall)) if overall is not None else None,
+        "strengths": [r["strength"] for r in results if r["strength"]],
+        "improvements": [r["improvement"] for r in results if r["improvement"]],
+    }
+
+
+class AnswerScorer:
+    """Collects background scoring futures for one interview session."""
+
+    def __init__(self):
+        self.entries = []  # (question, answer, future)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def submit(self, question, answer, future):
+        self.entries.append((question, answer, future))
+
+    def unscored(self, pairs):
+        """The (question, answer) pairs nothing was submitted for yet."""
+        submitted = Counter((question, answer) for question, answer, _ in self.entries)
+        for pair in pairs:
+            if submitted[pair]:
+                submitted[pair] -= 1
+            else:
+                yield pair
+
+    def results(self, rescore=None):
+        """Wait for every score, all within one SCORING_CONFIG["timeout"].
+
+        Answers whose scoring failed are scored again, concurrently, through
+        ``rescore(question, answer)`` (a Future) while time is left, and
+        skipped if that fails too.
+        """
+        deadline = time.monotonic() + SCORING_CONFIG["timeout"]
+        results, failed = _wait(self.entries, deadline)
+        if rescore is not None and failed and time.monotonic() < deadline:
+            results += _wait([(q, a, rescore(q, a)) for q, a in failed], deadline)[0]
+        return results
+
+
+def _wait(entries, deadline):
+    results, failed = [], []
+    for question, answer, future in entries:
+        try:
+            results.append(future.result(max(0.0, deadline - time.monotonic())))
+        except Exception:
+            failed.append((question, answer))
+    return results, failed
@@ -0,0 +1,258 @@
+"""Bounded per-session memory with spill-to-disk.
+
+``SessionTranscript`` stands in for the ``st.session_state.messages`` list.
+It keeps the most recent messages in memory up to a per-session byte budget.
+Older messages spill to a process-wide SQLite file and are read back only when
+something actually walks that far back, such as drawing the full chat
+history or building the feedback transcript. A session snapshot carries the
+tail; the spilled rows are published to the shared backend once each, so a
+worker on another host can restore them. Played-out TTS audio is spilled
+the same way. Live transcripts register themselves so the process can report
+how much memory all sessions hold together.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from collections.abc import Sequence
+
+from config import SESSION_CONFIG
+
+MESSAGE_OVERHEAD = 120  # rough per-dict cost on top of the text itself
+
+
+def message_size(message):
+    return len(message["content"].encode("utf-8")) + MESSAGE_OVERHEAD
+
+
+class SpillStore:
+    """SQLite-backed overflow for transcripts and audio, shared by sessions."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            );
+            CREATE TABLE IF NOT EXISTS audio (
+                session_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                data BLOB NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (session_id, name)
+            );
+        """)
+        self.prune(SESSION_CONFIG["spill_max_age"])
+
+    def spill_messages(self, session_id, start_seq, messages):
+        now = time.time()
+        rows = [
+            (session_id, start_seq + i, m["role"], m["content"], now)
+            for i, m in enumerate(messages)
+        ]
+        with self._lock:
+            self.db.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)", rows)
+
+    def load_messages(self, session_id, start, stop):
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (session_id, start, stop)
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def put_audio(self, session_id, name, data):
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO audio VALUES (?, ?, ?, ?)",
+                (session_id, name, data, time.time())
+            )
+
+    def get_audio(self, session_id, name):
+        with self._lock:
+            row = self.db.execute(
+                "SELECT data FROM audio WHERE session_id = ? AND name = ?", (session_id, name)
+            ).fetchone()
+        return row[0] if row else None
+
+    def drop_session(self, session_id):
+        with self._lock:
+            self.db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self.db.execute("DELETE FROM audio WHERE session_id = ?", (session_id,))
+
+    def prune(self, max_age):
+        # Sessions that ended without "New Session" leave rows behind
+        cutoff = time.time() - max_age
+        with self._lock:
+            self.db.execute("DELETE FROM messages WHERE created < ?", (cutoff,))
+            self.db.execute("DELETE FROM audio WHERE created < ?", (cutoff,))
+
+
+_store = None
+_store_lock = threading.Lock()
+_live = weakref.WeakSet()
+
+
+def get_spill_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = SESSION_CONFIG["spill_path"] or os.path.join(
+                tempfile.gettempdir(), "interview_practice_sessions.db"
+            )
+            _store = SpillStore(path)
+        return _store
+
+
+class SessionTranscript(Sequence):
+    """List-like transcript with a bounded in-memory tail."""
+
+    def __init__(self, session_id=None, budget_bytes=None, store=None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.budget_bytes = budget_bytes or SESSION_CONFIG["memory_budget_bytes"]
+        self._store = store
+        self.tail = []
+        self.spilled = 0  # messages[:spilled] live on disk
+        self.tail_bytes = 0
+        self.spilled_bytes = 0
+        self.shared = []  # [start, stop) ranges of spilled messages published by ``publish``
+        _live.add(self)
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = get_spill_store()
+        return self._store
+
+    def __len__(self):
+        return self.spilled + len(self.tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            if start >= stop:
+                return []
+            disk = []
+            if start < self.spilled:
+                disk = self.store.load_messages(self.session_id, start, min(stop, self.spilled))
+            return disk + self.tail[max(0, start - self.spilled):max(0, stop - self.spilled)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        if index >= self.spilled:
+            return self.tail[index - self.spilled]
+        return self.store.load_messages(self.session_id, index, index + 1)[0]
+
+    def __iter__(self):
+        # One query for the spilled part instead of one per message
+        if self.spilled:
+            yield from self.store.load_messages(self.session_id, 0, self.spilled)
+        yield from list(self.tail)
+
+    def append(self, message):
+        self.tail.append(message)
+        self.tail_bytes += message_size(message)
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        if self.tail_bytes <= self.budget_bytes:
+            return
+        # Spill down to half the budget so we don't write on every append;
+        # the newest message always stays in memory
+        keep_bytes = self.budget_bytes // 2
+        cut = 0
+        remaining = self.tail_bytes
+        while cut < len(self.tail) - 1 and remaining > keep_bytes:
+            remaining -= message_size(self.tail[cut])
+            cut += 1
+        moved = self.tail[:cut]
+        self.store.spill_messages(self.session_id, self.spilled, moved)
+        self.tail = self.tail[cut:]
+        self.spilled += cut
+        self.spilled_bytes += self.tail_bytes - remaining
+        self.tail_bytes = remaining
+
+    def publish(self, backend, ttl=None):
+        """Copy messages spilled since the last call to a shared ``backend``,
+        so a worker on another host can restore them (see ``from_dict``)."""
+        start = self.shared[-1][1] if self.shared else 0
+        if start < self.spilled:
+            messages = self.store.load_messages(self.session_id, start, self.spilled)
+            backend.set(self._shared_key(start), json.dumps(messages).encode("utf-8"), ttl)
+            self.shared.append([start, self.spilled])
+
+    def _shared_key(self, start):
+        return f"transcript:{self.session_id}:{start}"
+
+    def to_dict(self):
+        """The in-memory tail plus the published ranges of the spilled messages."""
+        if (self.shared[-1][1] if self.shared else 0) != self.spilled:
+            raise ValueError("publish() the spilled messages before the snapshot")
+        return {
+            "session_id": self.session_id,
+            "spilled": self.spilled,
+            "spilled_bytes": self.spilled_bytes,
+            "shared": [list(r) for r in self.shared],
+            "tail": list(self.tail),
+        }
+
+    @classmethod
+    def from_dict(cls, data, backend, budget_bytes=None):
+        """Rebuild a transcript from ``to_dict``; the spilled messages are read
+        from ``backend`` into this process's spill store. LookupError if they
+        have expired there."""
+        transcript = cls(data["session_id"], budget_bytes)
+        for start, stop in data["shared"]:
+            raw = backend.get(transcript._shared_key(start))
+            if raw is None:
+                raise LookupError(f"spilled messages {start}-{stop} of {transcript.session_id} have expired")
+            transcript.store.spill_messages(transcript.session_id, start, json.loads(raw))
+        transcript.shared = [list(r) for r in data["shared"]]
+        transcript.spilled = data["spilled"]
+        transcript.spilled_bytes = data["spilled_bytes"]
+        for message in data["tail"]:
+            transcript.append(message)
+        return transcript
+
+    def spill_audio(self, name, data):
+        """Move audio bytes out of memory; read back with ``load_audio``."""
+        self.store.put_audio(self.session_id, name, data)
+
+    def load_audio(self, name):
+        return self.store.get_audio(self.session_id, name)
+
+    def clear(self):
+        if self.spilled or self._store is not None:
+            self.store.drop_session(self.session_id)
+        self.tail = []
+        self.spilled = 0
+        self.tail_bytes = 0
+        self.spilled_bytes = 0
+        self.shared = []
+
+
+def memory_stats():
+    """Process-wide accounting across live session transcripts."""
+    sessions = list(_live)
+    return {
+        "sessions": len(sessions),
+        "memory_bytes": sum(s.tail_bytes for s in sessions),
+        "spilled_bytes": sum(s.spilled_bytes for s in sessions),
+        "spilled_messages": sum(s.spilled for s in sessions),
+    }
@@ -0,0 +1,290 @@
+"""Shared state for running several worker processes behind a load balancer.
+
+Session snapshots, feedback results and the TTS / response caches used to
+live only in the memory of the process that made them. A second worker
+couldn't pick up a session, and every worker rendered the same audio again.
+They now also go through a small key-value backend chosen by
+``SHARED_STATE_CONFIG["url"]`` (or ``SHARED_STATE_URL``):
+
+- ``memory://``: this process only. The default, and what a single
+  Streamlit process needs.
+- ``sqlite:///path/to/state.db``: every worker on one machine, through one
+  WAL-mode SQLite file.
+- ``redis://host:port/db``: any Redis-compatible server, for workers on
+  several machines. This speaks the Redis protocol directly, so no client
+  library is needed. ``benchmarks/fake_redis.py`` is a local stand-in for
+  tests.
+
+Values are bytes, keys are strings, and entries can carry a TTL. ``add``
+(set if absent) doubles as a short lease, so only one worker renders a clip
+that several need at once.
+"""
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from config import SHARED_STATE_CONFIG
+
+WORKER_ID = uuid.uuid4().hex[:12]
+
+
+class MemoryBackend:
+    """In-process dict with expiry; nothing is shared with other workers."""
+
+    shared = False
+
+    def __init__(self):
+        self.entries = {}  # key -> (value, expires or None)
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self.entries[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.time())
+            return entry[0] if entry is not None else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self.entries[key] = (value, time.time() + ttl if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self.entries[key] = (value, now + ttl if ttl else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self.entries.pop(key, None)
+
+
+class SQLiteBackend:
+    """One SQLite file shared by the worker processes on a machine."""
+
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires REAL
+            )
+        """)
+        self.db.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+
+    def get(self, key):
+        with self._lock:
+            row = self.db.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time())
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO kv VALUES (?, ?, ?)", (key, value, now + ttl if ttl else None)
+            )
+
+    def add(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            # One statement, so two workers can't both win
+            cursor = self.db.execute(
+                """INSERT INTO kv VALUES (?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires
+                   WHERE kv.expires IS NOT NULL AND kv.expires <= ?""",
+                (key, value, now + ttl if ttl else None, now)
+            )
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        with self._lock:
+            self.db.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+
+class RedisError(Exception):
+    """Error reply from the Redis server."""
+
+
+class RedisBackend:
+    """Minimal Redis (RESP2) client: GET, SET with PX/NX, DEL.
+
+    One connection per thread, so Streamlit script threads and the TTS pool
+    don't serialize on a single socket.
+    """
+
+    shared = True
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, prefix="", timeout=5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url, prefix=""):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(parsed.hostname or "127.0.0.1", parsed.port or 6379, db, parsed.password, prefix)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self.password:
+            self._command("AUTH", self.password)
+        if self.db:
+            self._command("SELECT", self.db)
+
+    def _command(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._local.sock.sendall(b"".join(parts))
+        return self._read()
+
+    def _read(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            data = self._local.reader.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(rest)
+            return None if size < 0 else [self._read() for _ in range(size)]
+        raise RedisError(f"unexpected reply: {line!r}")
+
+    def execute(self, *args):
+        # Reconnect once if the server dropped an idle connection
+        for attempt in range(2):
+            try:
+                if getattr(self._local, "sock", None) is None:
+                    self._connect()
+                return self._command(*args)
+            except (ConnectionError, OSError):
+                self._close()
+                if attempt:
+                    raise
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def get(self, key):
+        return self.execute("GET", self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self.execute("SET", self.prefix + key, value, "PX", int(ttl * 1000))
+        else:
+            self.execute("SET", self.prefix + key, value)
+
+    def add(self, key, value, ttl=None):
+        args = ["SET", self.prefix + key, value, "NX"]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        return self.execute(*args) is not None
+
+    def delete(self, key):
+        self.execute("DEL", self.prefix + key)
+
+
+def make_backend(url=None):
+    url = url or "memory://"
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return MemoryBackend()
+    if scheme == "sqlite":
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else ""
+        return SQLiteBackend(path or os.path.join(tempfile.gettempdir(), "interview_practice_state.db"))
+    if scheme in ("redis", "rediss"):
+        if scheme == "rediss":
+            raise ValueError("TLS Redis URLs are not supported; use a local TLS proxy")
+        return RedisBackend.from_url(url, SHARED_STATE_CONFIG["prefix"])
+    raise ValueError(f"unknown shared state backend: {url}")
+
+
+def wait_for(backend, key, timeout, poll=0.05):
+    """Poll ``key`` until another worker has written it; None on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = backend.get(key)
+        if value is not None:
+            return value
+        time.sleep(poll)
+    return None
+
+
+def single_flight(backend, key, create, ttl=None):
+    """``backend[key]``, created by exactly one worker when several miss at once.
+
+    The first worker takes a lease and runs ``create()``; the others wait for
+    its result (up to the lease time) instead of repeating the work.
+    """
+    value = backend.get(key)
+    if value is not None:
+        return value
+    lease = "lease:" + key
+    if backend.add(lease, WORKER_ID, SHARED_STATE_CONFIG["lease_seconds"]):
+        try:
+            value = create()
+            backend.set(key, value, ttl)
+        finally:
+            backend.delete(lease)
+        return value
+    value = wait_for(backend, key, SHARED_STATE_CONFIG["lease_seconds"])
+    return value if value is not None else create()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_shared_backend():
+    """The process's backend, from SHARED_STATE_URL or the config."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = make_backend(os.getenv("SHARED_STATE_URL") or SHARED_STATE_CONFIG["url"])
+        return _backend
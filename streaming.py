@@ -0,0 +1,90 @@
+"""Token streaming for chat completions.
+
+Wraps a streamed ``chat.completions.create`` call so the UI can render text
+as it arrives while we keep timing for time-to-first-token reporting.
+"""
+import time
+
+
+class StreamingResponse:
+    """Iterable over the text deltas of one streamed completion."""
+
+    def __init__(self, client, model, messages, **kwargs):
+        self.client = client
+        self.model = model
+        self.messages = messages
+        self.kwargs = kwargs
+        self.parts = []
+        self.ttft = None        # seconds until the first non-empty delta
+        self.total_time = None  # seconds until the stream finished
+
+    def __iter__(self):
+        start = time.perf_counter()
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=self.messages,
+            stream=True,
+            **self.kwargs
+        )
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - start
+                self.parts.append(delta)
+                yield delta
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            self.total_time = time.perf_counter() - start
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+class AsyncStreamingResponse:
+    """Async counterpart of StreamingResponse for ``AsyncOpenAI`` clients."""
+
+    def __init__(self, client, model, messages, **kwargs):
+        self.client = client
+        self.model = model
+        self.messages = messages
+        self.kwargs = kwargs
+        self.parts = []
+        self.ttft = None
+        self.total_time = None
+
+    async def __aiter__(self):
+        start = time.perf_counter()
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self.messages,
+            stream=True,
+            **self.kwargs
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - start
+                self.parts.append(delta)
+                yield delta
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                await close()
+            self.total_time = time.perf_counter() - start
+
+    @property
+    def text(self):
+        return "".join(self.parts)
@@ -19,7 +19,7 @@ print("------------------------------------------------")
 # 2. Setup the Client (Connect to Groq)
 try:
     client = OpenAI(
-        base_url="https://api.groq.com/openai/v1",
+        base_url=os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1"),
         api_key=api_key
     )
     print("📡 Connecting to Groq Server...")
@@ -37,7 +37,7 @@ print("🧠 Sending message to AI...")
 
 try:
     completion = client.chat.completions.create(
-        model="llama3-8b-8192",
+        model="llama-3.1-8b-instant",
         messages=messages
     )
     
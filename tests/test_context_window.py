@@ -0,0 +1,149 @@
+from types import SimpleNamespace
+
+import pytest
+
+from config import CONTEXT_CONFIG
+from context_window import ContextWindow, HistoryTail, count_tokens
+
+
+class FakeClient:
+    """Answers every summary request with ``notes N``."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        if self.fail:
+            raise RuntimeError("summary failed")
+        self.prompts.append(messages[-1]["content"])
+        message = SimpleNamespace(content=f" notes {len(self.prompts)} ")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def conversation(turns):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "assistant", "content": f"question {i}"})
+        messages.append({"role": "user", "content": f"answer {i}"})
+    return messages
+
+
+def test_short_history_is_sent_verbatim():
+    window = ContextWindow(keep_turns=2, fold_turns=1)
+    client = FakeClient()
+    messages = conversation(3)
+    request = window.build(client, "system", messages, "model")
+    assert client.prompts == []
+    assert request == [{"role": "system", "content": "system"}] + messages
+    assert window.last_request_tokens == count_tokens(request)
+
+
+def test_overflow_folds_older_turns_into_the_summary():
+    window = ContextWindow(keep_turns=2, fold_turns=1)
+    client = FakeClient()
+    messages = conversation(4)  # 8 messages > 4 kept + 2 per fold
+    request = window.build(client, "system", messages, "model")
+    assert window.summary == "notes 1"
+    assert window.summarized == 4
+    assert "question 1" in client.prompts[0] and "question 2" not in client.prompts[0]
+    assert request[1]["content"].endswith("notes 1")
+    assert request[2:] == messages[4:]
+
+
+def test_fold_extends_the_existing_summary():
+    window = ContextWindow(keep_turns=2, fold_turns=1)
+    client = FakeClient()
+    messages = conversation(4)
+    window.prepare(client, messages)
+    messages += conversation(6)[8:]
+    window.prepare(client, messages)
+    assert window.summarized == 8
+    assert "notes 1" in client.prompts[1]
+    assert "question 1" not in client.prompts[1]  # only the new turns are sent
+
+
+def test_prepare_counts_pending_messages():
+    window = ContextWindow(keep_turns=2, fold_turns=1)
+    client = FakeClient()
+    messages = conversation(3) + [{"role": "assistant", "content": "question 3"}]
+    window.prepare(client, messages, pending=1)
+    assert window.summarized == 4
+
+
+def test_failed_fold_keeps_the_old_summary():
+    window = ContextWindow(keep_turns=2, fold_turns=1)
+    window.summary = "old notes"
+    window.prepare(FakeClient(fail=True), conversation(4))
+    assert window.summary == "old notes"
+    assert window.summarized == 0
+
+
+def test_window_drops_oldest_turns_over_budget(monkeypatch):
+    monkeypatch.setitem(CONTEXT_CONFIG, "default_token_budget", 40)
+    window = ContextWindow()
+    messages = conversation(10)
+    request = window.window("system", messages, "unbudgeted-model")
+    assert count_tokens(request) <= 40
+    assert request[-1] == messages[-1]
+    assert request[1:] == messages[-len(request) + 1:]
+
+
+def test_window_keeps_the_latest_message_even_over_budget(monkeypatch):
+    monkeypatch.setitem(CONTEXT_CONFIG, "default_token_budget", 10)
+    long_answer = {"role": "user", "content": "x" * 400}
+    request = ContextWindow().window("system", conversation(2) + [long_answer], "unbudgeted-model")
+    assert request[1:] == [long_answer]
+    assert count_tokens(request) > 10
+
+
+def test_window_makes_no_model_calls():
+    window = ContextWindow(keep_turns=1, fold_turns=1)
+    messages = conversation(10)
+    assert window.window("system", messages, "model")[1:] == messages
+    assert window.summarized == 0
+
+
+# HistoryTail
+
+def test_tail_indexes_like_the_whole_history():
+    messages = conversation(5)
+    window = ContextWindow()
+    window.summarized = 6
+    tail = window.tail(messages)
+    assert len(tail) == len(messages)
+    assert tail[6] == messages[6]
+    assert tail[-1] == messages[-1]
+    assert tail[6:] == messages[6:]
+    assert tail[-2:] == messages[-2:]
+    assert list(tail[8:20]) == messages[8:]
+
+
+def test_tail_refuses_messages_before_the_summary():
+    tail = HistoryTail(conversation(5), 6)
+    with pytest.raises(IndexError):
+        tail[5]
+    with pytest.raises(IndexError):
+        tail[-5]
+    with pytest.raises(IndexError):
+        tail[0:8]
+    assert tail[3:3] == []
+
+
+def test_tail_is_a_copy_that_can_be_appended_to():
+    messages = conversation(2)
+    tail = HistoryTail(messages, 2)
+    tail.append({"role": "assistant", "content": "next"})
+    assert len(messages) == 4
+    assert len(tail) == 5
+    assert tail[-1]["content"] == "next"
+
+
+def test_window_accepts_its_own_tail():
+    messages = conversation(5)
+    window = ContextWindow()
+    window.summary = "notes"
+    window.summarized = 6
+    request = window.window("system", window.tail(messages), "model")
+    assert request[2:] == messages[6:]
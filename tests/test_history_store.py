@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from history_store import HistoryStore, parse_rating
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.db"))
+
+
+def feedback_rows(store, session_id):
+    return store.db.execute("SELECT rating, content FROM feedback WHERE session_id = ?",
+                            (session_id,)).fetchall()
+
+
+def test_parse_rating():
+    assert parse_rating("**Overall Performance Rating:** 7.5 / 10") == 7.5
+    assert parse_rating("no score") is None
+
+
+def test_turns_update_user_stats(store):
+    session = store.start_session("u", "Software Engineer", "chat")
+    store.record_turn("u", session, 0, "assistant", "question", latency=2.0)
+    store.record_turn("u", session, 1, "user", "abcd")
+    store.record_turn("u", session, 2, "assistant", "next", latency=4.0)
+    stats = store.user_stats("u")
+    assert (stats["sessions"], stats["answers"], stats["avg_answer_chars"]) == (1, 1, 4)
+    assert stats["avg_reply_latency"] == 3.0
+    assert stats["sessions_per_domain"] == {"Software Engineer": 1}
+    assert store.transcripts()[0]["messages"][1] == {"role": "user", "content": "abcd"}
+
+
+def test_feedback_again_replaces_the_rating(store):
+    session = store.start_session("u", "d", "chat")
+    store.record_feedback("u", session, "Rating: 4/10")
+    store.record_feedback("u", session, "Rating: 6/10")
+    assert feedback_rows(store, session) == [(6.0, "Rating: 6/10")]
+    stats = store.user_stats("u")
+    assert (stats["ratings"], stats["avg_rating"], stats["last_rating"]) == (1, 6.0, 6.0)
+
+
+def test_unrated_feedback_never_replaces_rated(store):
+    session = store.start_session("u", "d", "chat")
+    store.record_feedback("u", session, "no score")
+    assert feedback_rows(store, session) == [(None, "no score")]
+    store.record_feedback("u", session, "Rating: 5/10")
+    store.record_feedback("u", session, "no score")
+    assert feedback_rows(store, session) == [(5.0, "Rating: 5/10")]
+    assert store.user_stats("u")["ratings"] == 1
+
+
+def test_trend_compares_with_the_previous_session(store):
+    first = store.start_session("u", "d", "chat")
+    store.record_feedback("u", first, "Rating: 4/10")
+    assert store.user_stats("u")["rating_trend"] is None
+    second = store.start_session("u", "d", "chat")
+    store.record_feedback("u", second, "Rating: 7/10")
+    store.record_feedback("u", second, "Rating: 8/10")
+    stats = store.user_stats("u")
+    assert stats["rating_trend"] == 4.0
+    assert stats["avg_rating"] == 6.0
+
+
+def test_opening_an_old_file_keeps_the_latest_feedback_per_session(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE feedback (session_id INTEGER NOT NULL, rating REAL, content TEXT NOT NULL, created REAL NOT NULL);
+        CREATE INDEX feedback_by_session ON feedback (session_id);
+        INSERT INTO feedback VALUES (1, 3, 'first', 0), (1, 5, 'second', 1), (2, 9, 'only', 0);
+    """)
+    db.commit()
+    db.close()
+    store = HistoryStore(path)
+    assert feedback_rows(store, 1) == [(5.0, "second")]
+    assert feedback_rows(store, 2) == [(9.0, "only")]
+    assert store.db.execute("SELECT name FROM sqlite_master WHERE name = 'feedback_by_session'").fetchone() is None
+
+
+def test_unknown_user_has_empty_stats(store):
+    stats = store.user_stats("nobody")
+    assert stats["sessions"] == 0
+    assert stats["avg_rating"] is None
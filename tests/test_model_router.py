@@ -0,0 +1,64 @@
+import pytest
+
+from config import MODEL_ROUTING_CONFIG
+from model_router import RouteStats, choose, cost, escalation_reason, route_name
+
+FAST = MODEL_ROUTING_CONFIG["tiers"]["fast"]
+STRONG = MODEL_ROUTING_CONFIG["tiers"]["strong"]
+
+
+def test_route_name():
+    assert route_name("chat", "technical") == "chat"
+    assert route_name("mock_interview", "system_design") == "system_design"
+
+
+@pytest.mark.parametrize("answer, reason", [
+    ("I led a small team and shipped the release on time.", None),
+    ("word " * 80, "long_answer"),
+    ("I'd call `fetch_user()` then check user_id != None; done", "code"),
+    ("Is it remote? What is the team size?", "questions"),
+    ("Why?", None),
+])
+def test_escalation_reason(answer, reason):
+    assert escalation_reason(answer) == reason
+
+
+def test_fast_route_escalates_on_a_hard_answer():
+    assert choose("chat") == ("chat", "fast", FAST, None)
+    assert choose("chat", "Sure, sounds good.").tier == "fast"
+    route = choose("general", "word " * 100)
+    assert (route.tier, route.model, route.reason) == ("strong", STRONG, "long_answer")
+
+
+def test_strong_and_unlisted_routes_never_escalate():
+    assert choose("technical", "word " * 100) == ("technical", "strong", STRONG, None)
+    assert choose("unlisted").tier == MODEL_ROUTING_CONFIG["default_tier"]
+
+
+def test_disabled_routing_uses_the_strong_tier(monkeypatch):
+    monkeypatch.setitem(MODEL_ROUTING_CONFIG, "enabled", False)
+    assert choose("chat").model == STRONG
+
+
+def test_cost():
+    prompt_price, completion_price = MODEL_ROUTING_CONFIG["prices"][FAST]
+    assert cost(FAST, 1_000_000, 2_000_000) == pytest.approx(prompt_price + 2 * completion_price)
+    assert cost("unpriced-model", 1000, 1000) == 0
+
+
+def test_route_stats_count_escalations_per_tier():
+    stats = RouteStats()
+    stats.record(choose("chat", "fine"), 0.2, 0.1, 100, 20)
+    stats.record(choose("chat", "word " * 100), 1.0, None, 300, 50)
+    stats.record(choose("chat", "word " * 100), 3.0, 0.5, 300, 50)
+    stats.record(choose("chat", "word " * 100), 2.0, 0.4, 300, 50)
+    snapshot = stats.snapshot()
+    fast, strong = snapshot["routes"]["chat"]["fast"], snapshot["routes"]["chat"]["strong"]
+    assert (fast["calls"], fast["escalated"]) == (1, 0)
+    assert (strong["calls"], strong["escalated"], strong["prompt_tokens"]) == (3, 3, 900)
+    assert strong["latency_p50"] == 2.0
+    assert strong["ttft_p50"] == 0.5  # calls without a first token are left out
+    assert snapshot["escalations"] == {"long_answer": 3}
+    assert snapshot["cost_usd"] == pytest.approx(fast["cost_usd"] + strong["cost_usd"])
+    assert 'interview_route_escalations_total{route="chat",tier="strong",model="%s"} 3' % STRONG \
+        in stats.prometheus()
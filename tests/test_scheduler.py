@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+
+from scheduler import BACKGROUND, INTERACTIVE, OverloadedError, RequestScheduler, TokenBucket
+
+
+def make_config(**overrides):
+    config = {
+        "requests_per_minute": None,
+        "request_burst": 0,
+        "tokens_per_minute": None,
+        "token_burst": 0,
+        "session_requests_per_minute": None,
+        "session_request_burst": 0,
+        "session_tokens_per_minute": None,
+        "session_token_burst": 0,
+        "reserved_interactive_slots": 0,
+        "max_queue": {"interactive": 10, "background": 10},
+        "max_wait": {"interactive": 5, "background": 5},
+        "reply_tokens": 100,
+        "max_tracked_sessions": 100,
+    }
+    config.update(overrides)
+    return config
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# TokenBucket
+
+def test_bucket_starts_full_and_refills_at_rate():
+    clock = Clock()
+    bucket = TokenBucket(60, 2, clock=clock)  # one per second
+    assert bucket.wait_time(2) == 0
+    bucket.take(2)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now = 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    clock.now = 10
+    bucket._refill()
+    assert bucket.tokens == 2  # never above the burst
+
+
+def test_bucket_counts_backlog_ahead():
+    bucket = TokenBucket(60, 5, clock=Clock())
+    assert bucket.wait_time(1, backlog=4) == 0
+    assert bucket.wait_time(1, backlog=6) == pytest.approx(2.0)
+
+
+def test_oversized_call_waits_for_a_full_bucket_not_forever():
+    clock = Clock()
+    bucket = TokenBucket(60, 3, clock=clock)
+    bucket.take(3)
+    assert bucket.wait_time(100) == pytest.approx(3.0)
+    clock.now = 3
+    bucket.take(100)
+    assert bucket.tokens == 0
+
+
+# RequestScheduler
+
+def test_interactive_is_admitted_before_earlier_background():
+    async def scenario():
+        scheduler = RequestScheduler(asyncio.get_running_loop(), make_config(), max_active=1)
+        order = []
+        holder = await scheduler.acquire(INTERACTIVE, kind="hold")
+
+        async def call(priority, name):
+            async with scheduler.slot(priority, kind=name):
+                order.append(name)
+
+        tasks = [asyncio.create_task(call(BACKGROUND, "background"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call(INTERACTIVE, "interactive")))
+        await asyncio.sleep(0)
+        assert scheduler.depth() == [1, 1]
+        scheduler.release(holder)
+        await asyncio.gather(*tasks)
+        return order, scheduler.snapshot()
+
+    order, stats = run(scenario())
+    assert order == ["interactive", "background"]
+    assert stats["interactive"]["admitted"] == 2
+    assert stats["background"]["admitted"] == 1
+    assert stats["active"] == 0
+
+
+def test_background_never_takes_reserved_slots():
+    async def scenario():
+        config = make_config(reserved_interactive_slots=1)
+        scheduler = RequestScheduler(asyncio.get_running_loop(), config, max_active=2)
+        first = await scheduler.acquire(BACKGROUND)
+        second = asyncio.create_task(scheduler.acquire(BACKGROUND))
+        await asyncio.sleep(0)
+        assert not second.done()
+        interactive = await asyncio.wait_for(scheduler.acquire(INTERACTIVE), 1)
+        scheduler.release(first)
+        waiter = await asyncio.wait_for(second, 1)
+        scheduler.release(waiter)
+        scheduler.release(interactive)
+        return scheduler.active
+
+    assert run(scenario()) == [0, 0]
+
+
+def test_session_over_its_budget_does_not_hold_up_others():
+    async def scenario():
+        config = make_config(session_requests_per_minute=1, session_request_burst=1,
+                             max_wait={"interactive": 120, "background": 120})
+        scheduler = RequestScheduler(asyncio.get_running_loop(), config, max_active=4)
+        scheduler.release(await scheduler.acquire(INTERACTIVE, session_id="a"))
+        again = asyncio.create_task(scheduler.acquire(INTERACTIVE, session_id="a"))
+        await asyncio.sleep(0)
+        other = await asyncio.wait_for(scheduler.acquire(INTERACTIVE, session_id="b"), 1)
+        assert not again.done()
+        assert scheduler.session_snapshot("a")["queued"] == 1
+        scheduler.release(other)
+        again.cancel()
+
+    run(scenario())
+
+
+def test_check_refuses_when_the_queue_is_full():
+    async def scenario():
+        config = make_config(max_queue={"interactive": 1, "background": 1})
+        scheduler = RequestScheduler(asyncio.get_running_loop(), config, max_active=1)
+        holder = await scheduler.acquire(INTERACTIVE)
+        queued = asyncio.create_task(scheduler.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError):
+            scheduler.check(INTERACTIVE)
+        scheduler.release(holder)
+        scheduler.release(await queued)
+        return scheduler.snapshot()
+
+    stats = run(scenario())
+    assert stats["interactive"]["shed"] == 1
+    assert stats["shed_reasons"] == {"queue full": 1}
+
+
+def test_check_refuses_a_wait_longer_than_max_wait():
+    config = make_config(requests_per_minute=60, request_burst=1,
+                         max_wait={"interactive": 0.5, "background": 0.5})
+    scheduler = RequestScheduler(None, config, max_active=1)
+    scheduler.check(INTERACTIVE)
+    scheduler.requests.take(1)
+    with pytest.raises(OverloadedError) as refused:
+        scheduler.check(INTERACTIVE, session_id="s")
+    assert refused.value.retry_after == pytest.approx(1.0, abs=0.1)
+    assert scheduler.session_snapshot("s")["shed"] == 1
+    assert scheduler.snapshot()["shed_reasons"] == {"rate limit": 1}
+
+
+def test_refusal_names_the_session_limit():
+    config = make_config(session_requests_per_minute=60, session_request_burst=1,
+                         max_wait={"interactive": 0.5, "background": 0.5})
+    scheduler = RequestScheduler(None, config, max_active=1)
+    scheduler._quota("s").requests.take(1)
+    with pytest.raises(OverloadedError):
+        scheduler.check(INTERACTIVE, session_id="s")
+    scheduler.check(INTERACTIVE, session_id="other")
+    assert scheduler.snapshot()["shed_reasons"] == {"session rate limit": 1}
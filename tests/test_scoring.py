@@ -0,0 +1,124 @@
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from config import ASSESSMENT_CRITERIA, SCORING_CONFIG
+from feedback import NO_SCORE, get_feedback, rating_header
+from scoring import AnswerScorer, aggregate, answer_pairs, parse_score
+from shared_state import MemoryBackend
+
+
+def score(value, strength="", improvement=""):
+    return {"scores": dict.fromkeys(ASSESSMENT_CRITERIA, value),
+            "strength": strength, "improvement": improvement}
+
+
+def done(result=None, error=None):
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+def test_parse_score_clamps_and_drops_unknown_criteria():
+    parsed = parse_score(json.dumps({
+        "scores": {"communication": 14, "problem_solving": -2, "charisma": 9, "cultural_fit": "n/a"},
+        "strength": " clear ",
+        "improvement": None,
+    }))
+    assert parsed == {"scores": {"communication": 10.0, "problem_solving": 0.0},
+                      "strength": "clear", "improvement": ""}
+
+
+def test_answer_pairs_follow_the_last_question():
+    messages = [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "q1"},
+        {"role": "user", "content": "a1"},
+        {"role": "user", "content": "a1 more"},
+    ]
+    assert list(answer_pairs(messages)) == [(None, "hi"), ("q1", "a1"), ("q1", "a1 more")]
+
+
+def test_aggregate_weights_criteria():
+    results = [score(4, strength="depth"), score(8, improvement="pace")]
+    results[1]["scores"] = {"technical_knowledge": 10.0}
+    summary = aggregate(results)
+    assert summary["criteria"]["technical_knowledge"] == 7.0
+    assert summary["criteria"]["communication"] == 4.0
+    expected = sum(w * summary["criteria"][c] for c, w in ASSESSMENT_CRITERIA.items()) / 100
+    assert summary["overall"] == pytest.approx(expected)
+    assert summary["rating"] == round(expected)
+    assert (summary["strengths"], summary["improvements"]) == (["depth"], ["pace"])
+
+
+def test_aggregate_rating_is_at_least_one():
+    assert aggregate([score(0)])["rating"] == 1
+
+
+def test_aggregate_without_scores_has_no_rating():
+    for results in ([], [{"scores": {}, "strength": "", "improvement": ""}]):
+        summary = aggregate(results)
+        assert summary["overall"] is None
+        assert summary["rating"] is None
+        assert rating_header(summary).startswith(NO_SCORE)
+
+
+def test_unscored_counts_repeated_answers():
+    scorer = AnswerScorer()
+    scorer.submit("q", "yes", done(score(5)))
+    pairs = [("q", "yes"), ("q", "yes"), ("q2", "no")]
+    assert list(scorer.unscored(pairs)) == [("q", "yes"), ("q2", "no")]
+
+
+def test_results_rescore_failures_and_skip_repeat_failures():
+    scorer = AnswerScorer()
+    scorer.submit("q1", "a1", done(score(5)))
+    scorer.submit("q2", "a2", done(error=RuntimeError("bad json")))
+    scorer.submit("q3", "a3", done(error=RuntimeError("timeout")))
+    rescored = []
+
+    def rescore(question, answer):
+        rescored.append(question)
+        return done(score(7)) if question == "q2" else done(error=RuntimeError("again"))
+
+    results = scorer.results(rescore)
+    assert rescored == ["q2", "q3"]
+    assert [r["scores"]["communication"] for r in results] == [5, 7]
+    assert len(scorer.results()) == 1  # no rescore: failures are skipped
+
+
+def test_results_share_one_deadline(monkeypatch):
+    monkeypatch.setitem(SCORING_CONFIG, "timeout", 0.2)
+    scorer = AnswerScorer()
+    for i in range(5):
+        scorer.submit("q", f"a{i}", Future())  # never finishes
+    rescored = []
+
+    def rescore(question, answer):
+        rescored.append(answer)
+        return done(score(5))
+
+    assert scorer.results(rescore) == []
+    assert rescored == []  # the deadline had passed; no time left to retry in
+
+
+def test_no_score_feedback_is_not_cached():
+    backend = MemoryBackend()
+    cache = {}
+    calls = []
+
+    def generate(messages, role, interview_type):
+        calls.append(1)
+        return NO_SCORE + "\n\nKeep practising." if len(calls) == 1 else "**Overall Performance Rating:** 6/10"
+
+    messages = [{"role": "assistant", "content": "q"}, {"role": "user", "content": "a"}]
+    assert get_feedback(messages, "role", "general", cache, generate, backend) == (NO_SCORE + "\n\nKeep practising.", True)
+    assert cache == {}
+    feedback, fresh = get_feedback(messages, "role", "general", cache, generate, backend)
+    assert fresh and feedback.endswith("6/10")
+    assert get_feedback(messages, "role", "general", cache, generate, backend) == (feedback, False)
+    assert len(calls) == 2
@@ -0,0 +1,175 @@
+import json
+
+import pytest
+
+import session_store
+from engine import InterviewEngine
+from session_store import SessionTranscript, SpillStore, memory_stats, message_size
+from shared_state import MemoryBackend, SQLiteBackend
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SpillStore(str(tmp_path / "spill.db"))
+
+
+def message(i):
+    return {"role": "user" if i % 2 else "assistant", "content": f"message {i:03d}"}
+
+
+def filled(store, count, messages=20):
+    # Room for about ``messages`` messages before spilling
+    transcript = SessionTranscript("s1", budget_bytes=messages * message_size(message(0)), store=store)
+    for i in range(count):
+        transcript.append(message(i))
+    return transcript
+
+
+def test_small_transcript_stays_in_memory(store):
+    transcript = filled(store, 10)
+    assert transcript.spilled == 0
+    assert list(transcript) == [message(i) for i in range(10)]
+
+
+def test_over_budget_spills_down_to_half(store):
+    transcript = filled(store, 21)
+    assert transcript.spilled == 11
+    assert len(transcript.tail) == 10
+    assert transcript.tail_bytes <= transcript.budget_bytes // 2
+    assert len(transcript) == 21
+    assert store.load_messages("s1", 0, 100) == [message(i) for i in range(11)]
+
+
+def test_newest_message_always_stays_in_memory(store):
+    transcript = SessionTranscript("s1", budget_bytes=1, store=store)
+    for i in range(3):
+        transcript.append(message(i))
+    assert transcript.tail == [message(2)]
+    assert transcript[-1] == message(2)
+
+
+def test_indexing_reads_across_disk_and_memory(store):
+    transcript = filled(store, 50)
+    expected = [message(i) for i in range(50)]
+    assert transcript.spilled > 0
+    assert list(transcript) == expected
+    assert transcript[0] == expected[0]
+    assert transcript[-1] == expected[-1]
+    assert transcript[transcript.spilled] == expected[transcript.spilled]
+    assert transcript[5:45] == expected[5:45]
+    assert transcript[-3:] == expected[-3:]
+    assert transcript[::7] == expected[::7]
+    assert transcript[30:10] == []
+    with pytest.raises(IndexError):
+        transcript[50]
+
+
+def test_audio_round_trip(store):
+    transcript = SessionTranscript("s1", store=store)
+    transcript.spill_audio("reply-1", b"\x00\x01")
+    assert transcript.load_audio("reply-1") == b"\x00\x01"
+    assert transcript.load_audio("missing") is None
+
+
+def test_clear_drops_spilled_rows(store):
+    transcript = filled(store, 50)
+    transcript.spill_audio("reply-1", b"audio")
+    transcript.clear()
+    assert len(transcript) == 0
+    assert transcript.spilled_bytes == 0
+    assert store.load_messages("s1", 0, 100) == []
+    assert store.get_audio("s1", "reply-1") is None
+
+
+def test_memory_stats_counts_live_transcripts(store):
+    before = memory_stats()
+    transcript = filled(store, 50)
+    after = memory_stats()
+    assert after["sessions"] == before["sessions"] + 1
+    assert after["spilled_messages"] - before["spilled_messages"] == transcript.spilled
+    assert after["memory_bytes"] - before["memory_bytes"] == transcript.tail_bytes
+
+
+def test_spill_store_defaults_to_one_process_wide_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_store, "_store", None)
+    monkeypatch.setitem(session_store.SESSION_CONFIG, "spill_path", str(tmp_path / "shared.db"))
+    transcript = SessionTranscript("s1", budget_bytes=1)
+    transcript.append(message(0))
+    transcript.append(message(1))
+    assert transcript.store is session_store.get_spill_store()
+    assert transcript.store.path == str(tmp_path / "shared.db")
+
+
+# Snapshots shared across hosts
+
+@pytest.fixture
+def backend():
+    return MemoryBackend()
+
+
+def other_host(monkeypatch, tmp_path):
+    """Point the process-wide spill store at a fresh file, as on another host."""
+    monkeypatch.setattr(session_store, "_store", SpillStore(str(tmp_path / "other-host.db")))
+
+
+def test_snapshot_round_trip_on_another_host(store, backend, tmp_path, monkeypatch):
+    transcript = filled(store, 50)
+    transcript.publish(backend)
+    data = json.loads(json.dumps(transcript.to_dict()))
+    other_host(monkeypatch, tmp_path)
+    restored = SessionTranscript.from_dict(data, backend, transcript.budget_bytes)
+    assert restored.store is not store
+    assert list(restored) == [message(i) for i in range(50)]
+    assert restored[3:5] == [message(3), message(4)]
+    assert (restored.spilled, restored.tail_bytes) == (transcript.spilled, transcript.tail_bytes)
+
+
+def test_publish_sends_each_spilled_message_once(store, backend):
+    transcript = filled(store, 30)
+    transcript.publish(backend)
+    transcript.publish(backend)
+    first = list(transcript.shared)
+    for i in range(30, 60):
+        transcript.append(message(i))
+    transcript.publish(backend)
+    assert len(first) == 1
+    assert transcript.shared[:1] == first
+    assert transcript.shared[-1][1] == transcript.spilled
+    start, stop = transcript.shared[-1]
+    assert json.loads(backend.get(f"transcript:s1:{start}")) == [message(i) for i in range(start, stop)]
+
+
+def test_snapshot_needs_publish_first(store, backend):
+    transcript = filled(store, 50)
+    with pytest.raises(ValueError):
+        transcript.to_dict()
+    assert filled(store, 5).to_dict()["shared"] == []
+
+
+def test_restore_fails_when_spilled_messages_expired(store, backend, tmp_path, monkeypatch):
+    transcript = filled(store, 50)
+    transcript.publish(backend)
+    data = transcript.to_dict()
+    backend.delete("transcript:s1:0")
+    other_host(monkeypatch, tmp_path)
+    with pytest.raises(LookupError):
+        SessionTranscript.from_dict(data, backend)
+
+
+def test_engine_resumes_a_long_session_on_another_host(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_store, "_store", SpillStore(str(tmp_path / "host-a.db")))
+    backend = SQLiteBackend(str(tmp_path / "shared.db"))
+    session = InterviewEngine("test-key", history=False, backend=backend).new_session()
+    session.messages.budget_bytes = 20 * message_size(message(0))
+    for i in range(50):
+        session.messages.append(message(i))
+    session.engine.save_session(session)
+
+    other_host(monkeypatch, tmp_path)
+    engine = InterviewEngine("test-key", history=False, backend=backend)
+    resumed = engine.load_session(session.id)
+    assert resumed.version == session.version
+    assert list(resumed.messages) == [message(i) for i in range(50)]
+
+    backend.delete(f"transcript:{session.id}:0")
+    assert engine.load_session(session.id) is None
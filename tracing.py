@@ -0,0 +1,310 @@
+"""Per-stage timing spans for turns, feedback and background work.
+
+From the outside, a slow turn could have been spent in Whisper, the
+completion, gTTS, audio delivery or the page itself. Each turn now carries a
+``Trace``, and every stage it passes through records a span:
+
+- ``audio_prep``, ``transcription``, ``context_fold``, ``prefetch_check``,
+  ``question_bank``, ``prompt_build``;
+- ``queue`` (waiting for the scheduler), ``completion``, ``completion_ttft``;
+- ``tts`` (one span per synthesized segment);
+- ``audio_delivery``, ``audio_embed``, ``render`` (on the Streamlit page);
+- ``turn`` (the whole turn), and ``feedback`` / ``scoring_wait`` for feedback.
+
+Spans feed rolling per-stage summaries (p50/p95, count, sum), served as
+Prometheus text on the engine server's ``/metrics`` (or on
+``TRACING_CONFIG["metrics_port"]`` for the Streamlit process). With
+``TRACE_JSONL`` set, each span is also appended as one JSON line, for
+``python -m benchmarks.trace_report``.
+
+Only a ``sample_rate`` share of traces is recorded. An unsampled trace is a
+shared no-op object, so untraced stages cost a method call each.
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import TRACING_CONFIG
+
+
+class _Span:
+    __slots__ = ("trace", "stage", "attrs", "started")
+
+    def __init__(self, trace, stage, attrs):
+        self.trace = trace
+        self.stage = stage
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach details known only once the stage has run."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.record(self.stage, time.perf_counter() - self.started, **self.attrs)
+        return False
+
+
+class Trace:
+    """Spans of one turn (or feedback, or background call)."""
+
+    sampled = True
+
+    def __init__(self, recorder, kind, session_id=None):
+        self.recorder = recorder
+        self.id = uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.session_id = session_id
+
+    def span(self, stage, **attrs):
+        """``with trace.span("tts"):`` times the block as one span."""
+        return _Span(self, stage, attrs)
+
+    def record(self, stage, seconds, **attrs):
+        self.recorder.record(self, stage, seconds, attrs)
+
+    def observe(self, name, value):
+        """A non-timing measurement, e.g. completion tokens per second."""
+        self.recorder.observe(self, name, value)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _NullTrace:
+    """Stand-in for an unsampled trace; records nothing."""
+
+    sampled = False
+    id = None
+    kind = None
+    session_id = None
+    _span = _NullSpan()
+
+    def span(self, stage, **attrs):
+        return self._span
+
+    def record(self, stage, seconds, **attrs):
+        pass
+
+    def observe(self, name, value):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class _Series:
+    __slots__ = ("recent", "count", "total")
+
+    def __init__(self, window):
+        self.recent = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.recent.append(value)
+        self.count += 1
+        self.total += value
+
+    def snapshot(self):
+        ordered = sorted(self.recent)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+        }
+
+
+class _JSONLSink:
+    """Appends records to a file from a writer thread, off the hot path."""
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        threading.Thread(target=self._run, name="trace-sink", daemon=True).start()
+        atexit.register(self.flush)
+
+    def write(self, record):
+        self._queue.put(record)
+
+    def flush(self, timeout=2.0):
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                item = self._queue.get()
+                if isinstance(item, threading.Event):
+                    f.flush()
+                    item.set()
+                    continue
+                f.write(json.dumps(item, separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+
+class TraceRecorder:
+    """Process-wide span aggregates, by trace kind and stage."""
+
+    def __init__(self, sample_rate=1.0, jsonl_path=None, window=1000):
+        self.sample_rate = sample_rate
+        self.window = window
+        self.stages = {}  # (kind, stage) -> _Series of seconds
+        self.values = {}  # (kind, name) -> _Series
+        self.traces = {}  # (kind, sampled) -> count
+        self.sink = _JSONLSink(jsonl_path) if jsonl_path else None
+        self._lock = threading.Lock()
+
+    def start(self, kind, session_id=None):
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        with self._lock:
+            self.traces[(kind, sampled)] = self.traces.get((kind, sampled), 0) + 1
+        return Trace(self, kind, session_id) if sampled else NULL_TRACE
+
+    def _add(self, table, key, value):
+        with self._lock:
+            series = table.get(key)
+            if series is None:
+                series = table[key] = _Series(self.window)
+            series.add(value)
+
+    def record(self, trace, stage, seconds, attrs):
+        self._add(self.stages, (trace.kind, stage), seconds)
+        if self.sink is not None:
+            self.sink.write({
+                "ts": round(time.time(), 3), "trace": trace.id, "kind": trace.kind,
+                "session": trace.session_id, "stage": stage, "seconds": round(seconds, 6), **attrs
+            })
+
+    def observe(self, trace, name, value):
+        self._add(self.values, (trace.kind, name), value)
+
+    def snapshot(self):
+        """``{kind: {stage or measurement: {count, sum, p50, p95}}}``"""
+        with self._lock:
+            series = list(self.stages.items()) + list(self.values.items())
+            stats = {}
+            for (kind, name), values in series:
+                stats.setdefault(kind, {})[name] = values.snapshot()
+            return stats
+
+    def prometheus(self):
+        """The aggregates in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP interview_trace_sample_rate Share of traces whose spans are recorded.",
+                "# TYPE interview_trace_sample_rate gauge",
+                f"interview_trace_sample_rate {self.sample_rate}",
+                "# HELP interview_traces_total Traces started, by kind and whether they were sampled.",
+                "# TYPE interview_traces_total counter",
+            ]
+            for (kind, sampled), count in sorted(self.traces.items()):
+                lines.append(f'interview_traces_total{{kind="{kind}",sampled="{str(sampled).lower()}"}} {count}')
+            families = [("interview_stage_seconds", "Seconds per stage (quantiles over recent spans).",
+                         self.stages, "stage")]
+            for name in sorted({name for _, name in self.values}):
+                families.append((f"interview_{name}", f"{name.replace('_', ' ').capitalize()}.",
+                                 {k: v for k, v in self.values.items() if k[1] == name}, None))
+            for family, help_text, table, label in families:
+                lines += [f"# HELP {family} {help_text}", f"# TYPE {family} summary"]
+                for (kind, name), series in sorted(table.items()):
+                    labels = f'kind="{kind}"' + (f',{label}="{name}"' if label else "")
+                    snapshot = series.snapshot()
+                    for quantile, key in ((0.5, "p50"), (0.95, "p95")):
+                        lines.append(f'{family}{{{labels},quantile="{quantile}"}} {snapshot[key]}')
+                    lines.append(f"{family}_sum{{{labels}}} {snapshot['sum']}")
+                    lines.append(f"{family}_count{{{labels}}} {snapshot['count']}")
+        return "\n".join(lines) + "\n"
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """The process's recorder; TRACE_SAMPLE_RATE and TRACE_JSONL override the config."""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            rate = float(os.getenv("TRACE_SAMPLE_RATE") or TRACING_CONFIG["sample_rate"])
+            _recorder = TraceRecorder(
+                rate if TRACING_CONFIG["enabled"] else 0.0,
+                os.getenv("TRACE_JSONL") or TRACING_CONFIG["jsonl_path"],
+                TRACING_CONFIG["window"]
+            )
+        return _recorder
+
+
+def start_trace(kind, session_id=None):
+    """A new trace, or ``NULL_TRACE`` when this one isn't sampled."""
+    return get_recorder().start(kind, session_id)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = "".join(
+            [get_recorder().prometheus()] + [export() for export in self.server.exporters]
+        ).encode()
+        self.send_response(200)
+        self.send_header("content-type", "text/plain; version=0.0.4")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_metrics_server = None
+
+
+def serve_metrics(*exporters):
+    """Serve ``/metrics`` on ``TRACING_CONFIG["metrics_port"]``, if set; once per process.
+
+    ``exporters`` are callables returning more Prometheus text to append,
+    such as ``route_stats.prometheus``.
+    """
+    global _metrics_server
+    with _recorder_lock:
+        if _metrics_server is None and TRACING_CONFIG["metrics_port"]:
+            _metrics_server = ThreadingHTTPServer(
+                (TRACING_CONFIG["metrics_host"], TRACING_CONFIG["metrics_port"]), _MetricsHandler
+            )
+            _metrics_server.exporters = exporters
+            _metrics_server.daemon_threads = True
+            threading.Thread(target=_metrics_server.serve_forever, name="trace-metrics", daemon=True).start()
+        return _metrics_server
@@ -0,0 +1,37 @@
+"""Speech-to-text for recorded answers.
+
+Recorder bytes go to Whisper as an in-memory file object, so concurrent
+sessions never share a path on disk and nothing is left open. A private
+temporary file is used instead only when configured to (e.g. for a backend
+that insists on a real file).
+"""
+import os
+import tempfile
+from io import BytesIO
+
+from config import TRANSCRIPTION_CONFIG
+
+
+async def transcribe_async(client, audio_bytes, filename="answer.wav"):
+    """Return the transcript text for one recorded utterance (``AsyncOpenAI``)."""
+    if TRANSCRIPTION_CONFIG["use_tempfile"]:
+        # Unique per call and removed on close; the extension tells the API the format
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1] or ".wav") as audio_file:
+            audio_file.write(audio_bytes)
+            audio_file.flush()
+            audio_file.seek(0)
+            # The SDK wants the real file object, not the wrapper
+            return await _create(client, audio_file.file)
+
+    with BytesIO(audio_bytes) as audio_file:
+        # The API infers the format from the file name
+        audio_file.name = filename
+        return await _create(client, audio_file)
+
+
+async def _create(client, audio_file):
+    transcript = await client.audio.transcriptions.create(
+        model=TRANSCRIPTION_CONFIG["model"],
+        file=audio_file
+    )
+    return transcript.text
@@ -0,0 +1,164 @@
+"""Content-addressed cache for synthesized speech.
+
+Audio is keyed by a hash of (text, lang, voice). Recent entries live in an
+in-memory LRU bounded by total bytes; an optional directory tier keeps every
+rendered clip on disk so other sessions and worker processes can reuse it.
+With a shared state backend (see shared_state.py) clips are also shared with
+workers on other machines, and a clip several workers miss at once is
+rendered only once.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from config import TTS_CONFIG
+from shared_state import get_shared_backend, single_flight
+
+
+def cache_key(text, lang, voice):
+    payload = "\0".join([lang, voice, text]).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, max_bytes, cache_dir=None, backend=None, ttl=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.backend = backend  # shared across workers, or None
+        self.ttl = ttl  # seconds a clip is kept in the backend
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".mp3")
+
+    def get(self, key):
+        with self._lock:
+            audio = self.entries.get(key)
+            if audio is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return audio
+
+        audio = self._read_disk(key)
+        if audio is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(key, audio)
+            return audio
+
+        audio = self.backend.get("tts:" + key) if self.backend is not None else None
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+        self._remember(key, audio)
+        self._write_disk(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        self._remember(key, audio)
+        self._write_disk(key, audio)
+        if self.backend is not None:
+            self.backend.set("tts:" + key, audio, self.ttl)
+
+    def fetch(self, key, render):
+        """Cached audio for ``key``; on a miss ``render()`` makes it, once
+        across all workers when the backend is shared."""
+        audio = self.get(key)
+        if audio is not None:
+            return audio
+        if self.backend is None:
+            audio = render()
+            self.put(key, audio)
+            return audio
+        audio = single_flight(self.backend, "tts:" + key, render, self.ttl)
+        self._remember(key, audio)
+        self._write_disk(key, audio)
+        return audio
+
+    def _remember(self, key, audio):
+        # Clips larger than the whole budget are only kept on disk
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.entries[key] = audio
+            self.size += len(audio)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, audio):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial clip
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.shared_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hit_rate": (self.hits + self.disk_hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache():
+    """Process-wide cache shared by every Streamlit session."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            backend = get_shared_backend()
+            _cache = TTSCache(
+                TTS_CONFIG["cache_max_bytes"],
+                os.getenv("TTS_CACHE_DIR") or TTS_CONFIG["cache_dir"],
+                backend if backend.shared else None,
+                TTS_CONFIG["cache_ttl"]
+            )
+        return _cache